@@ -12,17 +12,24 @@ Juniper - Medical Research Assistant
 Main Flask Application
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from flask_cors import CORS
 from datetime import datetime
 import logging
+import json
 import os
 
 from config import get_config, Config
-from backend.vector_store import VectorStore
+from backend.vector_store import create_vector_store
 from backend.llm_service import LLMService
 from backend.rag_engine import RAGEngine
+from backend.retrieval_policy import AdaptiveRetrievalPolicy
+from backend.response_cache import SemanticResponseCache
+from backend.prompt_budget import PromptBudget, load_token_counter
+from backend.prompt_templates import PromptTemplates
+from backend.model_router import ModelRouter
 from backend.user_auth import UserAuth
+from backend.knowledge_base import get_all_categories, get_knowledge_by_category
 
 # Configure logging
 logging.basicConfig(
@@ -44,8 +51,13 @@ rag_engine = None
 user_auth = None
 
 
-def initialize_rag_engine():
-    """Initialize RAG engine with vector store and LLM service"""
+def initialize_rag_engine(engine_class=RAGEngine):
+    """
+    Initialize RAG engine with vector store and LLM service
+
+    Args:
+        engine_class: RAG engine class (or factory) to build, e.g. AsyncRAGEngine for the ASGI server
+    """
     global rag_engine
 
     try:
@@ -58,24 +70,37 @@ def initialize_rag_engine():
 
         # Initialize vector store
         logger.info("Loading vector store...")
-        vector_store = VectorStore(
-            db_path=Config.CHROMA_DB_PATH,
-            collection_name=Config.COLLECTION_NAME,
-            embedding_model_name=Config.EMBEDDING_MODEL
-        )
+        vector_store = create_vector_store(Config)
+
+        # Start from a prebuilt index artifact when the deploy ships one
+        if Config.INDEX_SNAPSHOT_PATH and os.path.exists(Config.INDEX_SNAPSHOT_PATH):
+            vector_store.load_snapshot(Config.INDEX_SNAPSHOT_PATH, verify=Config.INDEX_SNAPSHOT_VERIFY, if_stale=True)
 
         # Check if vector store has documents
-        if vector_store.collection.count() == 0:
+        if vector_store.count() == 0:
             logger.error("Vector store is empty. Please run 'python initialize_kb.py' first")
             return False
 
-        # Initialize LLM service
+        # Initialize LLM service (easy turns optionally go to a faster model)
         logger.info("Initializing LLM service...")
+        router = None
+        if Config.ROUTER_FAST_MODEL:
+            router = ModelRouter(
+                fast_model=Config.ROUTER_FAST_MODEL,
+                large_model=Config.LLM_MODEL,
+                max_query_chars=Config.ROUTER_MAX_QUERY_CHARS,
+                max_followup_chars=Config.ROUTER_MAX_FOLLOWUP_CHARS,
+                min_similarity=Config.ROUTER_MIN_SIMILARITY,
+                fast_languages=Config.ROUTER_FAST_LANGUAGES
+            )
+
         llm_service = LLMService(
             api_key=Config.GROQ_API_KEY,
             model=Config.LLM_MODEL,
             temperature=Config.LLM_TEMPERATURE,
-            max_tokens=Config.LLM_MAX_TOKENS
+            max_tokens=Config.LLM_MAX_TOKENS,
+            prompt_templates=PromptTemplates(Config.PROMPT_TEMPLATES_DIR, Config.PROMPT_TEMPLATE_VERSION),
+            router=router
         )
 
         # Test LLM connection
@@ -83,11 +108,41 @@ def initialize_rag_engine():
             logger.error("Failed to connect to Groq API. Please check your API key")
             return False
 
-        # Initialize RAG engine
-        rag_engine = RAGEngine(
+        # Initialize RAG engine (context and prompt budgets share one token counter: the local tokenizer
+        # once PROMPT_TOKENIZER is set, otherwise the characters-per-token estimate)
+        token_counter = load_token_counter(Config.PROMPT_TOKENIZER)
+
+        retrieval_policy = None
+        if Config.ADAPTIVE_RETRIEVAL:
+            retrieval_policy = AdaptiveRetrievalPolicy(
+                min_similarity=Config.RETRIEVAL_MIN_SIMILARITY,
+                score_gap=Config.RETRIEVAL_SCORE_GAP,
+                max_context_tokens=Config.CONTEXT_MAX_TOKENS,
+                count_tokens=token_counter.count
+            )
+
+        prompt_budget = PromptBudget(
+            counter=token_counter,
+            max_prompt_tokens=Config.PROMPT_MAX_TOKENS,
+            min_passage_tokens=Config.PROMPT_MIN_PASSAGE_TOKENS
+        )
+
+        response_cache = None
+        if Config.RESPONSE_CACHE_SIZE > 0:
+            response_cache = SemanticResponseCache(
+                max_size=Config.RESPONSE_CACHE_SIZE,
+                ttl_seconds=Config.RESPONSE_CACHE_TTL,
+                similarity_threshold=Config.RESPONSE_CACHE_SIMILARITY
+            )
+
+        rag_engine = engine_class(
             vector_store=vector_store,
             llm_service=llm_service,
-            top_k=Config.TOP_K_RESULTS
+            top_k=Config.TOP_K_RESULTS,
+            retrieval_policy=retrieval_policy,
+            response_cache=response_cache,
+            coalesce=Config.COALESCE_REQUESTS,
+            prompt_budget=prompt_budget
         )
 
         logger.info("✓ RAG engine initialized successfully")
@@ -98,6 +153,16 @@ def initialize_rag_engine():
         return False
 
 
+def reinitialize_after_fork():
+    """
+    Re-create per-worker state after gunicorn forks a preloaded master.
+    Read-only state (model weights, memory-mapped index, knowledge base)
+    stays shared copy-on-write; connections and clients are rebuilt.
+    """
+    if rag_engine is not None:
+        rag_engine.after_fork()
+
+
 # ==========================================
 # ROUTES
 # ==========================================
@@ -134,61 +199,104 @@ def health_check():
         }), 500
 
 
-@app.route('/api/chat', methods=['POST'])
-def chat():
+def validate_chat_request(data):
     """
-    Main chat endpoint
-    Expects JSON: {"message": "user query", "conversation_id": "optional_id"}
+    Validate a chat request body (shared by the Flask and ASGI chat endpoints)
+
+    Args:
+        data: Decoded JSON body
+
+    Returns:
+        Tuple of (query arguments for the RAG engine, None) or (None, (error message, HTTP status))
     """
-    try:
-        # Validate RAG engine
-        if rag_engine is None:
-            return jsonify({
-                'error': 'System not initialized. Please contact administrator.'
-            }), 503
+    if not data or 'message' not in data:
+        return None, ('Missing required field: message', 400)
 
-        # Get request data
-        data = request.get_json()
+    user_message = data['message'].strip()
+    category = data.get('category')  # Optional category scope for this conversation
 
-        if not data or 'message' not in data:
-            return jsonify({
-                'error': 'Missing required field: message'
-            }), 400
+    # Validate message
+    if not user_message:
+        return None, ('Message cannot be empty', 400)
 
-        user_message = data['message'].strip()
-        conversation_id = data.get('conversation_id')
-        language = data.get('language', 'en')  # Get language, default to English
+    if len(user_message) > Config.MAX_MESSAGE_LENGTH:
+        return None, (f'Message too long. Maximum {Config.MAX_MESSAGE_LENGTH} characters', 400)
 
-        # Validate message
-        if not user_message:
-            return jsonify({
-                'error': 'Message cannot be empty'
-            }), 400
+    if category and category not in get_all_categories():
+        return None, (f'Unknown category: {category}', 400)
 
-        if len(user_message) > Config.MAX_MESSAGE_LENGTH:
-            return jsonify({
-                'error': f'Message too long. Maximum {Config.MAX_MESSAGE_LENGTH} characters'
-            }), 400
+    return {
+        'user_query': user_message,
+        'conversation_id': data.get('conversation_id'),
+        'language': data.get('language', 'en'),  # Get language, default to English
+        'category': category
+    }, None
 
-        logger.info(f"Processing chat request (lang: {language}): '{user_message[:100]}...'")
 
-        # Process query through RAG engine with language parameter
-        result = rag_engine.query(
-            user_query=user_message,
-            conversation_id=conversation_id,
-            language=language
-        )
+def parse_chat_request():
+    """
+    Read and validate a chat request body
 
-        # Build response
-        response_data = {
-            'response': result['response'],
-            'conversation_id': result.get('conversation_id'),
-            'sources': result.get('sources', []),
-            'timestamp': datetime.utcnow().isoformat()
-        }
+    Returns:
+        Tuple of (query arguments for the RAG engine, None) or (None, error response)
+    """
+    # Validate RAG engine
+    if rag_engine is None:
+        return None, (jsonify({
+            'error': 'System not initialized. Please contact administrator.'
+        }), 503)
+
+    query_args, error = validate_chat_request(request.get_json())
+    if error:
+        message, status = error
+        return None, (jsonify({'error': message}), status)
+
+    return query_args, None
+
+
+def build_chat_response(result: dict) -> dict:
+    """
+    Shape a RAG engine result into the /api/chat response body
+
+    Args:
+        result: Result of RAGEngine.query
+
+    Returns:
+        Response body
+    """
+    return {
+        'response': result['response'],
+        'conversation_id': result.get('conversation_id'),
+        'sources': result.get('sources', []),
+        'category': result.get('category'),
+        'retrieval': result.get('retrieval'),
+        'prompt': result.get('prompt'),
+        'model': result.get('model'),
+        'cached': result.get('cached', False),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
+@app.route('/api/chat', methods=['POST'])
+def chat():
+    """
+    Main chat endpoint
+    Expects JSON: {"message": "user query", "conversation_id": "optional_id",
+                   "category": "optional category scope ('' clears it)"}
+    """
+    try:
+        query_args, error = parse_chat_request()
+        if error:
+            return error
+
+        logger.info(f"Processing chat request (lang: {query_args['language']}): "
+                    f"'{query_args['user_query'][:100]}...'")
+
+        # Process query through RAG engine with language parameter
+        result = rag_engine.query(**query_args)
 
         logger.info("Chat request processed successfully")
-        return jsonify(response_data), 200
+        return jsonify(build_chat_response(result)), 200
 
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
@@ -197,6 +305,58 @@ def chat():
         }), 500
 
 
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Streaming chat endpoint (Server-Sent Events)
+    Expects the same JSON as /api/chat. Emits 'sources' right after retrieval,
+    'delta' events with generated text, then 'done' with the full response
+    (or 'error'). Disconnecting cancels the generation.
+    """
+    query_args, error = parse_chat_request()
+    if error:
+        return error
+
+    logger.info(f"Processing streaming chat request (lang: {query_args['language']}): "
+                f"'{query_args['user_query'][:100]}...'")
+
+    def generate():
+        events = rag_engine.stream_query(**query_args)
+        try:
+            for event, data in events:
+                if event in ('done', 'error'):
+                    data = dict(data, timestamp=datetime.utcnow().isoformat())
+                yield sse_event(event, data)
+        finally:
+            # Runs when the client goes away mid-stream: stops the upstream generation
+            events.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Don't let a reverse proxy buffer the stream
+        }
+    )
+
+
+@app.route('/api/categories', methods=['GET'])
+def list_categories():
+    """List knowledge base categories a conversation can be scoped to"""
+    return jsonify({
+        'categories': [
+            {'name': category, 'topics': len(get_knowledge_by_category(category))}
+            for category in get_all_categories()
+        ]
+    }), 200
+
+
 @app.route('/api/clear', methods=['POST'])
 def clear_conversation():
     """Clear conversation history"""
@@ -374,8 +534,13 @@ def internal_error(error):
 # APPLICATION STARTUP
 # ==========================================
 
-def startup():
-    """Application startup tasks"""
+def startup(engine_class=RAGEngine):
+    """
+    Application startup tasks
+
+    Args:
+        engine_class: RAG engine class (or factory) to build
+    """
     global user_auth
 
     print("\n" + "=" * 60)
@@ -394,7 +559,7 @@ def startup():
         print("⚠ User authentication initialization failed (continuing without auth)")
 
     # Initialize RAG engine
-    if not initialize_rag_engine():
+    if not initialize_rag_engine(engine_class):
         print("\nWARNING: RAG engine initialization failed")
         print("\nPlease ensure:")
         print("  1. You have created a .env file with your GROQ_API_KEY")
@@ -0,0 +1,232 @@
+"""
+ASGI Entry Point (asyncio alternative to wsgi.py)
+    uvicorn asgi:application --host 0.0.0.0 --port 8080 --workers 4
+
+The chat endpoints run natively on the event loop: AsyncRAGEngine awaits
+AsyncGroq for generation and runs query encoding and index search on a
+bounded thread pool (ASYNC_SEARCH_WORKERS), so one worker keeps hundreds
+of LLM calls in flight. Every other route is the Flask app, served through
+asgiref's WSGI adapter.
+"""
+
+from contextlib import suppress
+from datetime import datetime
+from functools import partial
+import asyncio
+import json
+import logging
+
+from asgiref.wsgi import WsgiToAsgi
+
+import app as flask_app
+from backend.async_rag_engine import AsyncRAGEngine
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Chat bodies are a message plus a few ids; anything larger is rejected unread
+MAX_BODY_BYTES = 64 * 1024
+
+flask_asgi = WsgiToAsgi(flask_app.app)
+
+
+class RequestError(Exception):
+    """Unreadable request body, answered with its HTTP status"""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+async def read_json(receive):
+    """Read and decode a JSON request body"""
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise RequestError('Client disconnected', 400)
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_BYTES:
+            raise RequestError('Request body too large', 413)
+        if not message.get('more_body'):
+            break
+
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        raise RequestError('Invalid JSON body', 400)
+
+
+def cors_headers(scope) -> list:
+    """Access-Control headers matching the Flask-CORS setup for /api/*"""
+    origin = dict(scope['headers']).get(b'origin')
+    if origin is None:
+        return []
+    if '*' in Config.CORS_ORIGINS:
+        return [(b'access-control-allow-origin', b'*')]
+    if origin.decode('latin-1') in Config.CORS_ORIGINS:
+        return [(b'access-control-allow-origin', origin), (b'vary', b'Origin')]
+    return []
+
+
+async def send_json(scope, send, data: dict, status: int = 200):
+    """Send a complete JSON response"""
+    body = json.dumps(data).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode())] + cors_headers(scope)
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def until_disconnected(receive):
+    """Return once the client has gone away"""
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def run_until_disconnected(work, receive):
+    """
+    Run a handler coroutine, cancelling it if the client disconnects first
+
+    Cancelling aborts the pending Groq request (or closes its stream), so
+    an abandoned request stops costing upstream tokens.
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(until_disconnected(receive))
+    await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    watcher.cancel()
+
+    if not task.done():
+        logger.info("Client disconnected; request cancelled")
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+        return
+
+    task.result()
+
+
+async def read_chat_request(scope, receive, send):
+    """
+    Read and validate a chat request, answering errors directly
+
+    Returns:
+        Query arguments for the RAG engine, or None if an error was sent
+    """
+    if flask_app.rag_engine is None:
+        await send_json(scope, send, {'error': 'System not initialized. Please contact administrator.'}, 503)
+        return None
+
+    try:
+        data = await read_json(receive)
+    except RequestError as e:
+        await send_json(scope, send, {'error': str(e)}, e.status)
+        return None
+
+    query_args, error = flask_app.validate_chat_request(data)
+    if error:
+        message, status = error
+        await send_json(scope, send, {'error': message}, status)
+        return None
+
+    return query_args
+
+
+async def chat(scope, receive, send):
+    """POST /api/chat on the event loop (same contract as the Flask endpoint)"""
+    query_args = await read_chat_request(scope, receive, send)
+    if query_args is None:
+        return
+
+    logger.info(f"Processing async chat request (lang: {query_args['language']}): "
+                f"'{query_args['user_query'][:100]}...'")
+
+    async def respond():
+        try:
+            result = await flask_app.rag_engine.aquery(**query_args)
+        except Exception as e:
+            logger.error(f"Error in async chat endpoint: {e}")
+            await send_json(scope, send, {
+                'error': 'An error occurred processing your request. Please try again.'
+            }, 500)
+            return
+
+        await send_json(scope, send, flask_app.build_chat_response(result))
+
+    await run_until_disconnected(respond(), receive)
+
+
+async def chat_stream(scope, receive, send):
+    """POST /api/chat/stream on the event loop (Server-Sent Events, same events as the Flask endpoint)"""
+    query_args = await read_chat_request(scope, receive, send)
+    if query_args is None:
+        return
+
+    logger.info(f"Processing async streaming chat request (lang: {query_args['language']}): "
+                f"'{query_args['user_query'][:100]}...'")
+
+    async def pump():
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'text/event-stream; charset=utf-8'),
+                        (b'cache-control', b'no-cache'),
+                        (b'x-accel-buffering', b'no')] + cors_headers(scope)
+        })
+
+        events = flask_app.rag_engine.astream_query(**query_args)
+        try:
+            async for event, data in events:
+                if event in ('done', 'error'):
+                    data = dict(data, timestamp=datetime.utcnow().isoformat())
+                await send({'type': 'http.response.body', 'more_body': True,
+                            'body': flask_app.sse_event(event, data).encode('utf-8')})
+        finally:
+            # Runs on disconnect too (the task is cancelled): stops the upstream generation
+            await events.aclose()
+
+        await send({'type': 'http.response.body', 'body': b''})
+
+    await run_until_disconnected(pump(), receive)
+
+
+NATIVE_ROUTES = {
+    ('POST', '/api/chat'): chat,
+    ('POST', '/api/chat/stream'): chat_stream,
+}
+
+
+async def lifespan(receive, send):
+    """Build the async RAG engine at server start, stop its search pool at shutdown"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            engine_class = partial(AsyncRAGEngine, search_workers=Config.ASYNC_SEARCH_WORKERS)
+            if flask_app.startup(engine_class):
+                await send({'type': 'lifespan.startup.complete'})
+            else:
+                await send({'type': 'lifespan.startup.failed', 'message': 'Failed to initialize application'})
+                return
+
+        elif message['type'] == 'lifespan.shutdown':
+            if flask_app.rag_engine is not None:
+                flask_app.rag_engine.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    """ASGI application"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+
+    handler = NATIVE_ROUTES.get((scope.get('method'), scope.get('path'))) if scope['type'] == 'http' else None
+    if handler is not None:
+        await handler(scope, receive, send)
+        return
+
+    await flask_asgi(scope, receive, send)
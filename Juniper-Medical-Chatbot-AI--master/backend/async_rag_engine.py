@@ -0,0 +1,317 @@
+"""
+Async RAG Engine Module
+asyncio variant of the RAG pipeline: LLM calls await AsyncGroq, and the
+CPU-bound query encoding and index search run on a bounded thread pool
+so they never stall the event loop
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Any, AsyncIterator, Tuple
+import asyncio
+import time
+import logging
+from .rag_engine import RAGEngine
+from .vector_store import VectorStore
+from .llm_service import LLMService
+from .retrieval_policy import AdaptiveRetrievalPolicy
+from .response_cache import SemanticResponseCache
+from .single_flight import AsyncSingleFlight, FlightAbandoned
+from .prompt_budget import PromptBudget
+from .embedding_cache import normalize_query
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AsyncRAGEngine(RAGEngine):
+    """
+    RAG engine for an asyncio server.
+
+    Conversation state is only touched on the event loop thread; the pool
+    threads run _search, which reads the vector store and its (locked)
+    caches. The pool size caps how many encodes/searches run at once, so
+    hundreds of in-flight LLM calls share a few CPU-bound threads instead
+    of each holding one.
+    """
+
+    def __init__(self, vector_store: VectorStore, llm_service: LLMService, top_k: int = 5,
+                 retrieval_policy: Optional[AdaptiveRetrievalPolicy] = None,
+                 response_cache: Optional[SemanticResponseCache] = None, coalesce: bool = True,
+                 prompt_budget: Optional[PromptBudget] = None, search_workers: int = 4):
+        """
+        Initialize async RAG engine
+
+        Args:
+            vector_store: Vector store instance
+            llm_service: LLM service instance
+            top_k: Number of documents to retrieve
+            retrieval_policy: Optional policy that trims the retrieved documents
+            response_cache: Optional cache of answers to stateless (no-history) turns
+            coalesce: Share one retrieval (and, for stateless turns, one LLM call)
+                between identical concurrent requests
+            prompt_budget: Optional per-request prompt token budget (trims history and context)
+            search_workers: Threads running query encoding and index search
+        """
+        super().__init__(vector_store, llm_service, top_k=top_k, retrieval_policy=retrieval_policy,
+                         response_cache=response_cache, coalesce=coalesce, prompt_budget=prompt_budget)
+        self.search_workers = max(search_workers, 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.search_workers, thread_name_prefix='rag-search')
+
+        # Coalesced on the event loop, so waiting callers hold no pool thread
+        self.async_retrieval_flights = AsyncSingleFlight('retrieval') if coalesce else None
+        self.async_generation_flights = AsyncSingleFlight('generation') if coalesce else None
+
+    async def _aretrieve(self, user_query: str, category: Optional[str]):
+        """Run the search on the search pool, once for identical concurrent queries"""
+        loop = asyncio.get_running_loop()
+
+        def search():
+            return loop.run_in_executor(self._executor, self._search, user_query, category)
+
+        if self.async_retrieval_flights is None:
+            return await search()
+        return await self.async_retrieval_flights.do((normalize_query(user_query), category), search)
+
+    async def _acached_response(self, user_query: str, language: str, context_docs, conversation_history,
+                                model: str):
+        """Run _cached_response on the search pool (it may have to embed the query)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._cached_response, user_query, language,
+                                          context_docs, conversation_history, model)
+
+    async def _afit_prompt(self, user_query: str, language: str, context_docs, conversation_history):
+        """Run _fit_prompt (tokenization) on the search pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._fit_prompt, user_query, language,
+                                          context_docs, conversation_history)
+
+    async def aquery(self, user_query: str, conversation_id: Optional[str] = None, language: str = 'en',
+                     category: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Process a user query using the RAG pipeline without blocking the event loop
+
+        Args:
+            user_query: User's question
+            conversation_id: Optional conversation ID for context
+            language: Language for response ('en' for English, 'ur' for Roman Urdu)
+            category: Scope the conversation to one category ('' clears the scope,
+                None keeps the conversation's current scope)
+
+        Returns:
+            Dictionary containing response and metadata (same shape as query())
+        """
+        try:
+            logger.info(f"Processing async query (lang: {language}): '{user_query[:100]}...'")
+
+            category = self._resolve_scope(conversation_id, category)
+            retrieved_docs, context_docs, retrieval_report = await self._aretrieve(user_query, category)
+
+            if not retrieved_docs:
+                logger.warning("No relevant documents found")
+                return {
+                    'response': self._generate_fallback_response(user_query, language),
+                    'sources': [],
+                    'conversation_id': conversation_id,
+                    'category': category
+                }
+
+            conversation_history = self._get_conversation_history(conversation_id)
+            model = self._route(user_query, language, context_docs, conversation_history)
+            cache_slot, response = await self._acached_response(user_query, language, context_docs,
+                                                                conversation_history, model)
+            cached = response is not None
+            prompt_report = None
+            passages = context_docs
+
+            if not cached:
+                history, passages, prompt_report = await self._afit_prompt(user_query, language, context_docs,
+                                                                           conversation_history)
+
+                async def generate():
+                    with self.timings.time('generation'):
+                        generated = await self.llm_service.agenerate_rag_response(
+                            query=user_query,
+                            context=self._build_context(passages),
+                            conversation_history=history,
+                            language=language,
+                            model=model
+                        )
+
+                    if cache_slot:
+                        self.response_cache.put(*cache_slot, generated)
+                    return generated
+
+                flight_key = self._flight_key(user_query, language, context_docs, conversation_history, model)
+                if flight_key:
+                    response = await self.async_generation_flights.do(flight_key, generate)
+                else:
+                    response = await generate()
+
+            if conversation_id:
+                self._update_conversation(conversation_id, user_query, response)
+
+            logger.info("Async query processed successfully")
+
+            return {
+                'response': response,
+                'sources': self._format_sources(passages),
+                'conversation_id': conversation_id,
+                'category': category,
+                'retrieved_docs_count': len(retrieved_docs),
+                'retrieval': retrieval_report,
+                'prompt': prompt_report,
+                'model': model,
+                'cached': cached
+            }
+
+        except Exception as e:
+            logger.error(f"Error processing async query: {e}")
+            return {
+                'response': self._error_message(language),
+                'sources': [],
+                'conversation_id': conversation_id,
+                'error': str(e)
+            }
+
+    async def astream_query(self, user_query: str, conversation_id: Optional[str] = None, language: str = 'en',
+                            category: Optional[str] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Async counterpart of stream_query (same events, same history rules)
+
+        Callers should aclose() the generator when they stop early; that
+        closes the upstream Groq stream.
+
+        Args:
+            user_query: User's question
+            conversation_id: Optional conversation ID for context
+            language: Language for response ('en' for English, 'ur' for Roman Urdu)
+            category: Scope the conversation to one category ('' clears the scope,
+                None keeps the conversation's current scope)
+
+        Yields:
+            (event name, event data) tuples
+        """
+        deltas = None
+        flight = None
+        try:
+            logger.info(f"Streaming async query (lang: {language}): '{user_query[:100]}...'")
+            start = time.perf_counter()
+
+            category = self._resolve_scope(conversation_id, category)
+            retrieved_docs, context_docs, retrieval_report = await self._aretrieve(user_query, category)
+
+            sources_event = {
+                'sources': [],
+                'conversation_id': conversation_id,
+                'category': category,
+                'retrieved_docs_count': len(retrieved_docs),
+                'retrieval': retrieval_report
+            }
+
+            if not retrieved_docs:
+                logger.warning("No relevant documents found")
+                yield 'sources', sources_event
+                response = self._generate_fallback_response(user_query, language)
+                yield 'delta', {'text': response}
+                yield 'done', {'response': response, 'conversation_id': conversation_id}
+                return
+
+            conversation_history = self._get_conversation_history(conversation_id)
+            model = self._route(user_query, language, context_docs, conversation_history)
+            cache_slot, response = await self._acached_response(user_query, language, context_docs,
+                                                                conversation_history, model)
+            cached = response is not None
+
+            # Sources are the passages that fit the prompt budget
+            history, passages, prompt_report = [], context_docs, None
+            if not cached:
+                history, passages, prompt_report = await self._afit_prompt(user_query, language, context_docs,
+                                                                           conversation_history)
+            sources_event['sources'] = self._format_sources(passages)
+            yield 'sources', sources_event
+
+            flight_key = None if cached else self._flight_key(user_query, language, context_docs,
+                                                               conversation_history, model)
+            if flight_key:
+                flight, response = await self.async_generation_flights.acquire(flight_key)
+
+            if response is not None:
+                if conversation_id:
+                    self._update_conversation(conversation_id, user_query, response)
+                yield 'delta', {'text': response}
+                yield 'done', {'response': response, 'conversation_id': conversation_id, 'cached': cached,
+                               'model': model}
+                return
+
+            deltas = self.llm_service.astream_rag_response(
+                query=user_query,
+                context=self._build_context(passages),
+                conversation_history=history,
+                language=language,
+                model=model
+            )
+
+            parts = []
+            generation_start = time.perf_counter()
+            async for delta in deltas:
+                if not parts:
+                    self.timings.record('first_token', (time.perf_counter() - start) * 1000)
+                parts.append(delta)
+                yield 'delta', {'text': delta}
+            self.timings.record('generation', (time.perf_counter() - generation_start) * 1000)
+
+            response = ''.join(parts).strip()
+            if conversation_id:
+                self._update_conversation(conversation_id, user_query, response)
+            if cache_slot:
+                self.response_cache.put(*cache_slot, response)
+            if flight is not None:
+                self.async_generation_flights.land(flight, result=response)
+                flight = None
+
+            logger.info("Streamed async query processed successfully")
+            yield 'done', {'response': response, 'conversation_id': conversation_id, 'cached': False,
+                           'prompt': prompt_report, 'model': model}
+
+        except (GeneratorExit, asyncio.CancelledError):
+            logger.info("Client disconnected; streamed query cancelled")
+            raise
+
+        except Exception as e:
+            logger.error(f"Error streaming async query: {e}")
+            if flight is not None:
+                self.async_generation_flights.land(flight, error=e)
+                flight = None
+            yield 'error', {'response': self._error_message(language), 'error': str(e),
+                            'conversation_id': conversation_id}
+
+        finally:
+            if deltas is not None:
+                await deltas.aclose()
+            if flight is not None:
+                self.async_generation_flights.land(flight, error=FlightAbandoned())
+
+    def close(self):
+        """Stop the search pool (waits for running searches)"""
+        self._executor.shutdown(wait=True)
+
+    def after_fork(self):
+        """Re-create per-process handles, including the search pool's threads"""
+        super().after_fork()
+        self._executor = ThreadPoolExecutor(max_workers=self.search_workers, thread_name_prefix='rag-search')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get RAG engine statistics
+
+        Returns:
+            Dictionary with statistics
+        """
+        stats = super().get_stats()
+        stats['search_workers'] = self.search_workers
+        if self.async_retrieval_flights:
+            stats['coalescing'] = {
+                'retrieval': self.async_retrieval_flights.get_stats(),
+                'generation': self.async_generation_flights.get_stats()
+            }
+        return stats
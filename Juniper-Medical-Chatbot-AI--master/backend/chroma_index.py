@@ -0,0 +1,377 @@
+"""
+Chroma Index Module
+ChromaDB (HNSW) storage backend for the vector store
+"""
+
+import chromadb
+from chromadb.config import Settings
+from typing import List, Dict, Any, Optional
+import numpy as np
+import json
+import os
+import logging
+
+from .filters import to_chroma_where
+from .index_generation import CollectionGeneration
+from .metrics import StageTimings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# hnswlib settings ChromaDB uses when a collection does not set them
+HNSW_DEFAULTS = {'M': 16, 'construction_ef': 100, 'search_ef': 10}
+
+
+class ChromaIndex:
+    """
+    Persistent ChromaDB collection with cosine HNSW search
+    """
+
+    name = 'chroma'
+
+    def __init__(self, db_path: str, collection_name: str, timings: Optional[StageTimings] = None,
+                 hnsw_params: Optional[Dict[str, int]] = None):
+        """
+        Initialize Chroma index
+
+        Args:
+            db_path: Path to ChromaDB storage
+            collection_name: Name of the collection
+            timings: Optional shared stage timing table
+            hnsw_params: HNSW settings for a new collection ('M', 'construction_ef',
+                'search_ef'; missing or None keeps the ChromaDB default)
+        """
+        self.db_path = db_path
+        self.collection_name = collection_name
+        self.timings = timings or StageTimings()
+        self.hnsw_params = {key: value for key, value in (hnsw_params or {}).items() if value is not None}
+
+        # Collection handle reuse counters
+        self.generation = CollectionGeneration(db_path, collection_name)
+        self.snapshot_marker_path = os.path.join(db_path, f"{collection_name}.snapshot")
+        self.collection_refreshes = 0
+        self.collection_reuses = 0
+
+        self._initialize_chromadb()
+
+    def _initialize_chromadb(self):
+        """Initialize ChromaDB client and collection"""
+        try:
+            # Create directory if it doesn't exist
+            os.makedirs(self.db_path, exist_ok=True)
+
+            # Initialize ChromaDB client with persistent storage
+            self.client = chromadb.PersistentClient(
+                path=self.db_path,
+                settings=Settings(
+                    anonymized_telemetry=False,
+                    allow_reset=True
+                )
+            )
+
+            # Get or create collection (generation read first: a later bump means a newer handle)
+            self._collection_generation = self.generation.current()
+            try:
+                self.collection = self.client.get_collection(name=self.collection_name)
+                logger.info(f"Loaded existing collection: {self.collection_name}")
+                logger.info(f"Collection contains {self.collection.count()} documents")
+                self._check_hnsw_params()
+            except:
+                metadata = {"hnsw:space": "cosine"}  # Use cosine similarity
+                metadata.update({f"hnsw:{key}": value for key, value in self.hnsw_params.items()})
+                self.collection = self.client.create_collection(
+                    name=self.collection_name,
+                    metadata=metadata
+                )
+                logger.info(f"Created new collection: {self.collection_name} ({self.get_hnsw_params()})")
+
+        except Exception as e:
+            logger.error(f"Error initializing ChromaDB: {e}")
+            raise
+
+    def get_hnsw_params(self) -> Dict[str, int]:
+        """HNSW settings the collection was built with"""
+        metadata = self._get_collection().metadata or {}
+        return {key: metadata.get(f"hnsw:{key}", default) for key, default in HNSW_DEFAULTS.items()}
+
+    def _check_hnsw_params(self):
+        """Warn when an existing collection was built with other HNSW settings"""
+        actual = self.get_hnsw_params()
+        differing = {key: value for key, value in self.hnsw_params.items() if actual.get(key) != value}
+        if differing:
+            # ChromaDB fixes HNSW settings at creation; rebuilding applies the new ones
+            logger.warning(f"Collection {self.collection_name} uses HNSW {actual}, configured {differing}; "
+                           f"run 'python initialize_kb.py --reset' to rebuild with the configured values")
+
+    def _get_collection(self, force: bool = False):
+        """
+        Get the collection handle, re-fetching it only when it may be stale
+
+        Args:
+            force: Re-fetch even if the generation marker is unchanged
+
+        Returns:
+            ChromaDB collection
+        """
+        generation = self.generation.current()
+
+        if force or generation != self._collection_generation:
+            self.collection = self.client.get_collection(name=self.collection_name)
+            self._collection_generation = generation
+            self.collection_refreshes += 1
+            logger.info(f"Refreshed collection handle: {self.collection_name}")
+        else:
+            self.collection_reuses += 1
+
+        return self.collection
+
+    def _query_collection(self, collection, query_embeddings: List[List[float]], top_k: int,
+                          where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run a (possibly multi-vector, possibly filtered) query against the collection"""
+        kwargs = {'where': where} if where else {}
+        return collection.query(
+            query_embeddings=query_embeddings,
+            n_results=top_k,
+            include=['documents', 'metadatas', 'distances'],
+            **kwargs
+        )
+
+    def add(self, ids: List[str], embeddings: np.ndarray, texts: List[str], metadatas: List[Dict[str, Any]]):
+        """
+        Add one batch of embedded documents
+
+        Args:
+            ids: Document IDs
+            embeddings: Embedding matrix, one row per document
+            texts: Document texts
+            metadatas: Document metadata
+        """
+        self._get_collection().add(
+            ids=ids,
+            embeddings=np.asarray(embeddings).tolist(),
+            documents=texts,
+            metadatas=metadatas
+        )
+
+    def upsert(self, ids: List[str], embeddings: np.ndarray, texts: List[str], metadatas: List[Dict[str, Any]]):
+        """
+        Add or replace one batch of embedded documents
+
+        Args:
+            ids: Document IDs
+            embeddings: Embedding matrix, one row per document
+            texts: Document texts
+            metadatas: Document metadata
+        """
+        self._get_collection().upsert(
+            ids=ids,
+            embeddings=np.asarray(embeddings).tolist(),
+            documents=texts,
+            metadatas=metadatas
+        )
+
+    def delete(self, ids: List[str]):
+        """
+        Remove documents by id
+
+        Args:
+            ids: Document IDs
+        """
+        if ids:
+            self._get_collection().delete(ids=list(ids))
+
+    def flush(self):
+        """Publish added documents to other processes by bumping the generation"""
+        self.generation.bump()
+        self._collection_generation = self.generation.current()
+
+    def mark_snapshot(self, checksum: str):
+        """
+        Record that the collection was just loaded from a snapshot
+
+        The marker holds the generation token current after the load, so any
+        later write (which bumps the generation) invalidates it.
+
+        Args:
+            checksum: Checksum of the loaded snapshot
+        """
+        tmp_path = f"{self.snapshot_marker_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'snapshot_checksum': checksum, 'generation': self.generation.token()}, f)
+        os.replace(tmp_path, self.snapshot_marker_path)
+
+    def snapshot_checksum(self) -> str:
+        """
+        Checksum of the snapshot the collection holds unchanged
+
+        Returns:
+            Checksum, or '' if it was not loaded from a snapshot or has changed since
+        """
+        try:
+            with open(self.snapshot_marker_path, 'r') as f:
+                marker = json.load(f)
+        except (OSError, ValueError):
+            return ''
+
+        if marker.get('generation') != self.generation.token():
+            return ''
+        return marker.get('snapshot_checksum', '')
+
+    def query(self, query_embeddings: np.ndarray, top_k: int,
+              filters: Optional[Dict[str, List[Any]]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Query the collection with precomputed embeddings
+
+        Args:
+            query_embeddings: Query embedding matrix, one row per query
+            top_k: Number of top results to return per query
+            filters: Optional normalized metadata filter (pushed into the where clause)
+
+        Returns:
+            One formatted result list per query embedding
+        """
+        query_embeddings = np.asarray(query_embeddings).tolist()
+        where = to_chroma_where(filters)
+
+        # Reuse the collection handle unless the generation marker moved
+        with self.timings.time('collection'):
+            collection = self._get_collection()
+
+        try:
+            results = self._query_collection(collection, query_embeddings, top_k, where)
+        except Exception as e:
+            # Handle went stale without a generation bump; refresh once and retry
+            logger.warning(f"Collection query failed, refreshing handle: {e}")
+            collection = self._get_collection(force=True)
+            results = self._query_collection(collection, query_embeddings, top_k, where)
+
+        # Format results
+        formatted = []
+        for row in range(len(query_embeddings)):
+            formatted_results = []
+            if results['ids'] and row < len(results['ids']):
+                for idx in range(len(results['ids'][row])):
+                    formatted_results.append({
+                        'id': results['ids'][row][idx],
+                        'document': results['documents'][row][idx],
+                        'metadata': results['metadatas'][row][idx],
+                        'distance': results['distances'][row][idx],
+                        'similarity': 1 - results['distances'][row][idx]  # Convert distance to similarity
+                    })
+            formatted.append(formatted_results)
+
+        return formatted
+
+    def get(self, ids: List[str], include_embeddings: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch stored documents by id
+
+        Args:
+            ids: Document IDs
+            include_embeddings: Also return each document's embedding
+
+        Returns:
+            Mapping of id to {'id', 'document', 'metadata'[, 'embedding']}
+        """
+        if not ids:
+            return {}
+
+        include = ['documents', 'metadatas'] + (['embeddings'] if include_embeddings else [])
+        results = self._get_collection().get(ids=list(ids), include=include)
+
+        found = {}
+        for idx, doc_id in enumerate(results['ids']):
+            found[doc_id] = {
+                'id': doc_id,
+                'document': results['documents'][idx],
+                'metadata': results['metadatas'][idx]
+            }
+            if include_embeddings:
+                found[doc_id]['embedding'] = np.asarray(results['embeddings'][idx], dtype=np.float32)
+        return found
+
+    def get_metadata(self, page_size: int = 1000) -> Dict[str, Dict[str, Any]]:
+        """
+        Read back the metadata of every stored document
+
+        Args:
+            page_size: Documents fetched per request
+
+        Returns:
+            Mapping of id to metadata
+        """
+        metadata = {}
+        collection = self._get_collection()
+        total = collection.count()
+
+        for offset in range(0, total, page_size):
+            page = collection.get(limit=page_size, offset=offset, include=['metadatas'])
+            metadata.update(zip(page['ids'], page['metadatas']))
+
+        return metadata
+
+    def export(self, page_size: int = 1000):
+        """
+        Read back every stored document with its embedding
+
+        Args:
+            page_size: Documents fetched per request
+
+        Returns:
+            Tuple of (ids, embeddings, documents, metadatas)
+        """
+        ids, blocks, documents, metadatas = [], [], [], []
+        collection = self._get_collection()
+        total = collection.count()
+
+        for offset in range(0, total, page_size):
+            page = collection.get(
+                limit=page_size,
+                offset=offset,
+                include=['embeddings', 'documents', 'metadatas']
+            )
+            ids.extend(page['ids'])
+            blocks.append(np.asarray(page['embeddings'], dtype=np.float32))
+            documents.extend(page['documents'])
+            metadatas.extend(page['metadatas'])
+
+        embeddings = np.concatenate(blocks) if blocks else np.empty((0, 0), dtype=np.float32)
+        return ids, embeddings, documents, metadatas
+
+    def count(self) -> int:
+        """Get number of documents in the collection"""
+        return self._get_collection().count()
+
+    def delete_collection(self):
+        """Delete the entire collection (use with caution)"""
+        self.client.delete_collection(name=self.collection_name)
+        self.generation.bump()
+        logger.info(f"Deleted collection: {self.collection_name}")
+
+    def reset(self):
+        """Reset collection (delete and recreate)"""
+        self.delete_collection()
+        self._initialize_chromadb()
+        self.flush()
+
+    def after_fork(self):
+        """Open a fresh ChromaDB client; SQLite handles must not cross fork()"""
+        try:
+            # PersistentClient caches its system per path; drop the parent's copy
+            from chromadb.api.client import SharedSystemClient
+            SharedSystemClient.clear_system_cache()
+        except (ImportError, AttributeError):
+            pass
+
+        self._initialize_chromadb()
+        logger.info(f"Re-opened ChromaDB client in worker {os.getpid()}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics about the index"""
+        return {
+            'backend': self.name,
+            'generation': self.generation.token(),
+            'collection_refreshes': self.collection_refreshes,
+            'collection_reuses': self.collection_reuses,
+            'hnsw': self.get_hnsw_params()
+        }
@@ -0,0 +1,238 @@
+"""
+Chunking Module
+Splits knowledge articles into overlapping, sentence- and paragraph-aligned
+chunks for embedding, and stitches neighbouring chunks back together
+"""
+
+from typing import List, Dict, Any, Tuple
+import re
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+(?=\S)')
+_WORD_RE = re.compile(r'\S+')
+
+
+def chunk_id(parent_id: str, chunk_index: int) -> str:
+    """
+    ID of one chunk of a parent document
+
+    Args:
+        parent_id: ID of the source document
+        chunk_index: Position of the chunk within the document
+
+    Returns:
+        Chunk ID
+    """
+    return f"{parent_id}_c{chunk_index:03d}"
+
+
+def _split_long_span(text: str, start: int, end: int, max_size: int) -> List[Tuple[int, int]]:
+    """Cut a span longer than max_size at word boundaries"""
+    pieces = []
+    piece_start = None
+    piece_end = None
+
+    for word in _WORD_RE.finditer(text, start, end):
+        if piece_start is None:
+            piece_start = word.start()
+        elif word.end() - piece_start > max_size:
+            pieces.append((piece_start, piece_end))
+            piece_start = word.start()
+        piece_end = word.end()
+
+    if piece_start is not None:
+        pieces.append((piece_start, piece_end))
+    return pieces
+
+
+def _sentence_spans(text: str, max_size: int) -> List[Tuple[int, int, bool]]:
+    """
+    Split text into sentence spans
+
+    Returns:
+        (start, end, starts_paragraph) tuples; sentences longer than
+        max_size are cut at word boundaries
+    """
+    spans = []
+    paragraph_start = 0
+
+    for paragraph_end in [m.start() for m in _PARAGRAPH_RE.finditer(text)] + [len(text)]:
+        first = True
+        sentence_start = paragraph_start
+        boundaries = [m.start() for m in _SENTENCE_END_RE.finditer(text, paragraph_start, paragraph_end)]
+
+        for sentence_end in boundaries + [paragraph_end]:
+            segment = text[sentence_start:sentence_end]
+            stripped = segment.strip()
+            if stripped:
+                start = sentence_start + segment.index(stripped[0])
+                end = start + len(stripped)
+                for piece_start, piece_end in _split_long_span(text, start, end, max_size) if end - start > max_size else [(start, end)]:
+                    spans.append((piece_start, piece_end, first))
+                    first = False
+            sentence_start = sentence_end
+
+        match = _PARAGRAPH_RE.match(text, paragraph_end)
+        paragraph_start = match.end() if match else paragraph_end
+
+    return spans
+
+
+def _overlap_start(text: str, spans: List[Tuple[int, int, bool]], first: int, last: int, overlap: int) -> int:
+    """
+    Where the next chunk should start so it repeats up to `overlap`
+    characters of the chunk ending with spans[last]
+
+    Whole trailing sentences are preferred; otherwise the overlap falls
+    back to a word boundary inside the window.
+    """
+    end = spans[last][1]
+    if overlap <= 0:
+        return -1
+
+    start = -1
+    for idx in range(last, first, -1):
+        if end - spans[idx][0] > overlap:
+            break
+        start = spans[idx][0]
+    if start >= 0:
+        return start
+
+    for word in _WORD_RE.finditer(text, spans[first][0], end):
+        if word.start() >= end - overlap:
+            return word.start()
+    return -1
+
+
+def chunk_text(text: str, chunk_size: int = 500, chunk_overlap: int = 50) -> List[Tuple[int, int]]:
+    """
+    Split text into chunks that end on sentence boundaries, preferring
+    paragraph boundaries, with a small overlap between consecutive chunks
+
+    Args:
+        text: Text to split
+        chunk_size: Target maximum chunk length in characters
+        chunk_overlap: Characters repeated at the start of the next chunk
+
+    Returns:
+        (start, end) character offsets of every chunk in text
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap must be smaller than chunk_size")
+
+    spans = _sentence_spans(text, chunk_size)
+    chunks = []
+
+    first = 0
+    chunk_start = spans[0][0] if spans else 0
+    while first < len(spans):
+        # Greedily take sentences while they fit
+        last = first
+        while last + 1 < len(spans) and spans[last + 1][1] - chunk_start <= chunk_size:
+            last += 1
+
+        # Back off to the last paragraph break if it keeps the chunk at least half full
+        if last + 1 < len(spans):
+            for idx in range(last, first, -1):
+                if spans[idx][2]:
+                    if spans[idx][0] - chunk_start >= chunk_size // 2:
+                        last = idx - 1
+                    break
+
+        chunks.append((chunk_start, spans[last][1]))
+
+        if last + 1 >= len(spans):
+            break
+
+        # Next chunk starts at the next sentence, or earlier to repeat the overlap
+        next_first = last + 1
+        next_start = spans[next_first][0]
+        if not spans[next_first][2]:
+            overlap_start = _overlap_start(text, spans, first, last, chunk_overlap)
+            # ...unless the repeated text would push the next sentence past chunk_size
+            if overlap_start > chunk_start and spans[next_first][1] - overlap_start <= chunk_size:
+                next_start = overlap_start
+
+        first = next_first
+        chunk_start = next_start
+
+    return chunks
+
+
+def chunk_documents(documents: List[Dict[str, Any]], chunk_size: int = 500,
+                    chunk_overlap: int = 50) -> List[Dict[str, Any]]:
+    """
+    Split documents into chunks ready for indexing
+
+    Each chunk's text is the document title followed by its slice of the
+    body, so every chunk embeds with its topic. Chunk metadata keeps the
+    parent's metadata plus parent_id, chunk_index, chunk_count and the
+    chunk's character offsets (used to stitch neighbours back together).
+
+    Args:
+        documents: Documents with 'id', 'text' (body) and 'metadata' (with 'title')
+        chunk_size: Target maximum chunk body length in characters
+        chunk_overlap: Characters shared by consecutive chunks
+
+    Returns:
+        List of chunks with 'id', 'text', and 'metadata'
+    """
+    chunks = []
+
+    for document in documents:
+        metadata = document.get('metadata', {})
+        body = document['text']
+        header = f"Title: {metadata['title']}\n\n" if metadata.get('title') else ''
+
+        spans = chunk_text(body, chunk_size, chunk_overlap)
+        for chunk_index, (start, end) in enumerate(spans):
+            chunks.append({
+                'id': chunk_id(document['id'], chunk_index),
+                'text': header + body[start:end],
+                'metadata': dict(
+                    metadata,
+                    parent_id=document['id'],
+                    chunk_index=chunk_index,
+                    chunk_count=len(spans),
+                    char_start=start,
+                    char_end=end
+                )
+            })
+
+    logger.info(f"Split {len(documents)} documents into {len(chunks)} chunks "
+                f"(chunk_size={chunk_size}, chunk_overlap={chunk_overlap})")
+    return chunks
+
+
+def merge_chunks(chunks: List[Dict[str, Any]]) -> str:
+    """
+    Stitch consecutive chunks of one document into a single passage
+
+    Args:
+        chunks: Chunk results ('document' and 'metadata') of one parent, in chunk order
+
+    Returns:
+        Title header followed by the merged body, with overlaps removed
+    """
+    first = chunks[0]
+    body_length = first['metadata']['char_end'] - first['metadata']['char_start']
+    header = first['document'][:len(first['document']) - body_length]
+
+    parts = [first['document'][len(header):]]
+    covered = first['metadata']['char_end']
+
+    for chunk in chunks[1:]:
+        metadata = chunk['metadata']
+        body = chunk['document'][len(chunk['document']) - (metadata['char_end'] - metadata['char_start']):]
+        skip = covered - metadata['char_start']
+        if skip > 0:
+            parts.append(body[skip:])
+        else:
+            parts.append('\n' + body)
+        covered = max(covered, metadata['char_end'])
+
+    return header + ''.join(parts)
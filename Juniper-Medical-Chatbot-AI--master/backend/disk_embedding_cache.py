@@ -0,0 +1,208 @@
+"""
+Disk Embedding Cache Module
+Persistent, content-addressed embedding cache keyed by model name, model
+revision and the SHA-256 of the text, stored as an append-only float32 blob
+"""
+
+from typing import List, Dict, Any, Optional
+import numpy as np
+import threading
+import hashlib
+import json
+import re
+import os
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_UNSAFE_CHARS_RE = re.compile(r'[^A-Za-z0-9._+-]+')
+
+KEY_BYTES = 32  # SHA-256 digest
+
+
+def text_digest(text: str) -> bytes:
+    """
+    Content address of a text
+
+    Args:
+        text: Text that was embedded
+
+    Returns:
+        Raw SHA-256 digest
+    """
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+
+class DiskEmbeddingCache:
+    """
+    Append-only embedding cache shared by every process on the host.
+
+    One directory per (model, revision) holds ``embeddings.f32`` (raw
+    float32 rows) and ``keys.bin`` (one 32-byte text digest per row, in the
+    same order). Rows are only ever appended: the embedding is written
+    before its key, so a key on disk always has a complete row, and a torn
+    tail left by a crash is truncated by the next writer. Readers memory-map
+    the blob, so cached rows are served from the page cache without
+    re-encoding. Only digests are stored, never the texts themselves.
+    """
+
+    def __init__(self, root: str, model_name: str, revision: str = 'main', dimension: Optional[int] = None):
+        """
+        Open (or create) the cache for one model
+
+        Args:
+            root: Cache root directory
+            model_name: Embedding model name
+            revision: Model revision / variant (embeddings of different revisions never mix)
+            dimension: Embedding dimension (read from disk if the cache already exists)
+        """
+        self.model_name = model_name
+        self.revision = revision
+        self.path = os.path.join(root, f"{_UNSAFE_CHARS_RE.sub('_', model_name)}@{_UNSAFE_CHARS_RE.sub('_', revision)}")
+        os.makedirs(self.path, exist_ok=True)
+
+        self._keys_path = os.path.join(self.path, 'keys.bin')
+        self._embeddings_path = os.path.join(self.path, 'embeddings.f32')
+        self._lock_path = os.path.join(self.path, '.lock')
+        meta_path = os.path.join(self.path, 'meta.json')
+
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if dimension is not None and meta['dimension'] != dimension:
+                raise ValueError(f"Embedding cache {self.path} has dimension {meta['dimension']}, expected {dimension}")
+            dimension = meta['dimension']
+        else:
+            if dimension is None:
+                raise ValueError("dimension is required to create an embedding cache")
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump({'model': model_name, 'revision': revision, 'dimension': dimension}, f)
+
+        self.dimension = dimension
+        self._row_bytes = dimension * 4
+
+        self._row_by_key = {}
+        self._keys_read = 0
+        self._embeddings = np.empty((0, dimension), dtype=np.float32)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.appended = 0
+
+        self._refresh()
+        logger.info(f"Opened embedding cache {self.path} with {len(self._row_by_key)} entries")
+
+    def _refresh(self):
+        """Pick up rows appended by this or other processes"""
+        try:
+            keys_size = os.path.getsize(self._keys_path)
+            rows_on_disk = os.path.getsize(self._embeddings_path) // self._row_bytes
+        except FileNotFoundError:
+            return
+
+        # Only whole key records whose rows are complete
+        readable = min(keys_size // KEY_BYTES, rows_on_disk) * KEY_BYTES
+        if readable > self._keys_read:
+            with open(self._keys_path, 'rb') as f:
+                f.seek(self._keys_read)
+                data = f.read(readable - self._keys_read)
+
+            first_row = self._keys_read // KEY_BYTES
+            for offset in range(0, len(data), KEY_BYTES):
+                self._row_by_key.setdefault(data[offset:offset + KEY_BYTES], first_row + offset // KEY_BYTES)
+            self._keys_read = readable
+
+        rows = self._keys_read // KEY_BYTES
+        if rows > len(self._embeddings):
+            self._embeddings = np.memmap(self._embeddings_path, dtype=np.float32, mode='r',
+                                         shape=(rows, self.dimension))
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up cached embeddings
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            One embedding (or None on miss) per text
+        """
+        digests = [text_digest(text) for text in texts]
+
+        with self._lock:
+            if any(digest not in self._row_by_key for digest in digests):
+                self._refresh()
+
+            found = []
+            for digest in digests:
+                row = self._row_by_key.get(digest)
+                found.append(None if row is None else np.array(self._embeddings[row]))
+
+        hits = sum(embedding is not None for embedding in found)
+        self.hits += hits
+        self.misses += len(found) - hits
+        return found
+
+    def put_many(self, texts: List[str], embeddings: np.ndarray):
+        """
+        Append embeddings for texts that are not cached yet
+
+        Args:
+            texts: Embedded texts
+            embeddings: Embedding matrix, one row per text
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+        if embeddings.shape[1] != self.dimension:
+            raise ValueError(f"Embedding dimension {embeddings.shape[1]} does not match cache dimension {self.dimension}")
+
+        with self._lock, open(self._lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            self._refresh()
+
+            new_rows = {}
+            for text, embedding in zip(texts, embeddings):
+                digest = text_digest(text)
+                if digest not in self._row_by_key and digest not in new_rows:
+                    new_rows[digest] = embedding
+            if not new_rows:
+                return
+
+            # Drop any torn tail a crashed writer left behind
+            rows = self._keys_read // KEY_BYTES
+            for path, size in ((self._embeddings_path, rows * self._row_bytes), (self._keys_path, self._keys_read)):
+                if os.path.exists(path) and os.path.getsize(path) > size:
+                    os.truncate(path, size)
+
+            # Rows first, then keys: a visible key always has a complete row
+            with open(self._embeddings_path, 'ab') as f:
+                f.write(np.ascontiguousarray(np.stack(list(new_rows.values()))).tobytes())
+            with open(self._keys_path, 'ab') as f:
+                f.write(b''.join(new_rows.keys()))
+
+            self.appended += len(new_rows)
+            self._refresh()
+
+    def __len__(self) -> int:
+        return len(self._row_by_key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'entries': len(self._row_by_key),
+            'size_mb': round(self._keys_read // KEY_BYTES * self._row_bytes / 1024 ** 2, 2),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'appended': self.appended
+        }
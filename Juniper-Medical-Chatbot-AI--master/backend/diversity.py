@@ -0,0 +1,52 @@
+"""
+Diversity Module
+Maximal marginal relevance (MMR) re-selection of retrieved passages, so
+near-duplicate hits do not fill the LLM context with the same facts
+"""
+
+from typing import List
+import numpy as np
+
+
+def maximal_marginal_relevance(relevance: np.ndarray, embeddings: np.ndarray, k: int,
+                               lambda_mult: float = 0.7) -> List[int]:
+    """
+    Greedily pick k candidates that are relevant but unlike each other
+
+    Each step takes the candidate maximizing
+    lambda * relevance - (1 - lambda) * max cosine similarity to the picks so far.
+
+    Args:
+        relevance: Relevance score of each candidate (e.g. query similarity)
+        embeddings: Candidate embedding matrix, one row per candidate
+        k: Number of candidates to pick
+        lambda_mult: 1.0 ranks by relevance only, 0.0 by diversity only
+
+    Returns:
+        Indices of the picked candidates, in pick order
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    count = min(k, len(relevance))
+    if count <= 0:
+        return []
+
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    units = embeddings / np.maximum(norms, 1e-12)
+    pairwise = units @ units.T
+
+    picked = [int(np.argmax(relevance))]
+    # Highest similarity of every candidate to anything picked so far
+    redundancy = pairwise[picked[0]].copy()
+    available = np.ones(len(relevance), dtype=bool)
+    available[picked[0]] = False
+
+    while len(picked) < count:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        np.maximum(redundancy, pairwise[best], out=redundancy)
+
+    return picked
@@ -0,0 +1,220 @@
+"""
+Query Embedding Cache Module
+Bounded LRU cache mapping normalized query text to embedding vectors
+"""
+
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+import numpy as np
+import threading
+import time
+import os
+import re
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize query text so trivially different spellings share a cache entry
+
+    Args:
+        query: Raw query text
+
+    Returns:
+        Lowercased query with collapsed whitespace
+    """
+    return _WHITESPACE_RE.sub(' ', query).strip().lower()
+
+
+class QueryEmbeddingCache:
+    """
+    Thread-safe LRU cache for query embeddings with size and TTL limits.
+
+    Under gevent the threading lock is monkey-patched into a greenlet lock,
+    so the same class is safe for both worker types.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 86400,
+                 spill_path: Optional[str] = None, spill_every: int = 100):
+        """
+        Initialize query embedding cache
+
+        Args:
+            max_size: Maximum number of cached embeddings (0 disables caching)
+            ttl_seconds: Seconds before an entry expires (0 means no expiry)
+            spill_path: Optional .npz file used to persist the cache across restarts
+            spill_every: Number of new entries between automatic spills to disk
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.spill_path = spill_path
+        self.spill_every = spill_every
+
+        self._entries = OrderedDict()  # key -> (embedding, created_at)
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if self.spill_path:
+            self.load()
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Look up a cached embedding
+
+        Args:
+            key: Normalized query text
+
+        Returns:
+            Cached embedding or None on miss
+        """
+        if self.max_size <= 0:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            embedding, created_at = entry
+            if self._is_expired(created_at, now):
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, key: str, embedding: np.ndarray):
+        """
+        Store an embedding, evicting the least recently used entry when full
+
+        Args:
+            key: Normalized query text
+            embedding: Embedding vector
+        """
+        if self.max_size <= 0:
+            return
+
+        embedding = np.asarray(embedding, dtype=np.float32)
+        embedding.flags.writeable = False
+
+        with self._lock:
+            self._entries[key] = (embedding, time.time())
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+            self._unsaved += 1
+            should_spill = bool(self.spill_path) and self._unsaved >= self.spill_every
+
+        if should_spill:
+            self.save()
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def save(self):
+        """Persist non-expired entries to the spill file (atomic replace)"""
+        if not self.spill_path:
+            return
+
+        now = time.time()
+        with self._lock:
+            items = [
+                (key, embedding, created_at)
+                for key, (embedding, created_at) in self._entries.items()
+                if not self._is_expired(created_at, now)
+            ]
+            self._unsaved = 0
+
+        if not items:
+            return
+
+        try:
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            tmp_path = f"{self.spill_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    keys=np.array([key for key, _, _ in items]),
+                    embeddings=np.stack([embedding for _, embedding, _ in items]),
+                    created_at=np.array([created_at for _, _, created_at in items], dtype=np.float64)
+                )
+            os.replace(tmp_path, self.spill_path)
+            logger.info(f"Saved {len(items)} query embeddings to {self.spill_path}")
+
+        except Exception as e:
+            logger.error(f"Error saving query embedding cache: {e}")
+
+    def load(self):
+        """Warm the cache from the spill file if it exists"""
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+
+        try:
+            with np.load(self.spill_path, allow_pickle=False) as data:
+                keys = data['keys'].tolist()
+                embeddings = data['embeddings'].astype(np.float32)
+                created = data['created_at'].tolist()
+
+            now = time.time()
+            loaded = 0
+            with self._lock:
+                # Oldest first so the newest entries end up most recently used
+                for idx in np.argsort(created):
+                    if self._is_expired(created[idx], now):
+                        continue
+                    embedding = embeddings[idx]
+                    embedding.flags.writeable = False
+                    self._entries[keys[idx]] = (embedding, created[idx])
+                    loaded += 1
+
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+            logger.info(f"Loaded {loaded} query embeddings from {self.spill_path}")
+
+        except Exception as e:
+            logger.error(f"Error loading query embedding cache: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            size = len(self._entries)
+
+        lookups = self.hits + self.misses
+        return {
+            'size': size,
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'spill_path': self.spill_path
+        }
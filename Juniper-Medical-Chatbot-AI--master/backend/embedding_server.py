@@ -0,0 +1,477 @@
+"""
+Embedding Server Module
+Sidecar process that loads the embedding model once and serves every
+gunicorn worker over a Unix socket, merging concurrent requests into
+micro-batches
+
+Run from the project root:
+    python -m backend.embedding_server
+
+Wait until it serves requests (e.g. before starting gunicorn):
+    python -m backend.embedding_server --wait 120
+"""
+
+from typing import List, Dict, Any, Optional, Callable
+import numpy as np
+import argparse
+import socketserver
+import threading
+import socket
+import struct
+import queue
+import json
+import time
+import os
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Wire format: every frame is a 4-byte big-endian length followed by the payload.
+# Requests are JSON ({"op": "encode", "texts": [...]} or {"op": "info"}).
+# Responses start with a status byte: b'O' + raw float32 rows, b'J' + JSON, b'E' + error text.
+_HEADER = struct.Struct('>I')
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Read exactly size bytes from a socket"""
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed by peer")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return _recv_exact(sock, size)
+
+
+class _EncodeJob:
+    """One client request waiting in the micro-batch queue"""
+
+    __slots__ = ('texts', 'done', 'result', 'error')
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Collects concurrent encode requests and runs them as one batch once
+    max_batch_size texts are queued or max_wait_ms has passed
+    """
+
+    def __init__(self, encoder, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        """
+        Initialize micro-batcher
+
+        Args:
+            encoder: Encoder used for the merged batches
+            max_batch_size: Maximum texts per merged batch
+            max_wait_ms: Maximum time the first request waits for company
+        """
+        self.encoder = encoder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.texts = 0
+        self.requests = 0
+
+        self._thread = threading.Thread(target=self._run, name='embedding-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> np.ndarray:
+        """
+        Queue texts for encoding and wait for the merged batch to finish
+
+        Args:
+            texts: Texts to encode
+
+        Returns:
+            Embedding matrix, one row per text
+        """
+        job = _EncodeJob(texts)
+        self._queue.put(job)
+        job.done.wait()
+
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _collect(self) -> List[_EncodeJob]:
+        """Block for the first job, then gather more until the batch is full or the wait expires"""
+        jobs = [self._queue.get()]
+        size = len(jobs[0].texts)
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            size += len(job.texts)
+
+        return jobs
+
+    def _run(self):
+        while True:
+            jobs = self._collect()
+            texts = [text for job in jobs for text in job.texts]
+
+            try:
+                embeddings = self.encoder.encode(texts, batch_size=max(len(texts), 1))
+                offset = 0
+                for job in jobs:
+                    job.result = embeddings[offset:offset + len(job.texts)]
+                    offset += len(job.texts)
+            except Exception as e:
+                logger.error(f"Error encoding batch of {len(texts)} texts: {e}")
+                for job in jobs:
+                    job.error = e
+
+            self.batches += 1
+            self.requests += len(jobs)
+            self.texts += len(texts)
+
+            for job in jobs:
+                job.done.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics"""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': self.batches,
+            'requests': self.requests,
+            'texts': self.texts,
+            'avg_batch_size': round(self.texts / self.batches, 2) if self.batches else 0.0,
+            'queue_depth': self._queue.qsize()
+        }
+
+
+class _EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    """Serves frames on one client connection until it closes"""
+
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                request = json.loads(_recv_frame(self.request))
+            except (ConnectionError, OSError):
+                return
+
+            try:
+                if request.get('op') == 'info':
+                    payload = b'J' + json.dumps({
+                        'model': server.encoder.model_name,
+                        'revision': server.revision,
+                        'dimension': server.encoder.dimension,
+                        'backend': getattr(server.encoder, 'backend', ''),
+                        'batching': server.batcher.get_stats()
+                    }).encode('utf-8')
+                else:
+                    embeddings = server.batcher.submit(list(request['texts']))
+                    payload = b'O' + np.ascontiguousarray(embeddings, dtype=np.float32).tobytes()
+            except Exception as e:
+                payload = b'E' + str(e).encode('utf-8')
+
+            try:
+                _send_frame(self.request, payload)
+            except OSError:
+                return
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket embedding server with dynamic micro-batching
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, encoder, max_batch_size: int = 64, max_wait_ms: float = 5.0,
+                 revision: str = ''):
+        """
+        Initialize embedding server
+
+        Args:
+            socket_path: Filesystem path of the Unix socket
+            encoder: Encoder that owns the (single) model copy
+            max_batch_size: Maximum texts per merged batch
+            max_wait_ms: Maximum time a request waits to be merged
+            revision: Embedding revision label of the encoder (see encoders.embedding_revision)
+        """
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+        self.encoder = encoder
+        self.revision = revision
+        self.batcher = MicroBatcher(encoder, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        super().__init__(socket_path, _EmbeddingRequestHandler)
+        os.chmod(socket_path, 0o660)
+
+        logger.info(f"Embedding server listening on {socket_path} "
+                    f"(max_batch_size={max_batch_size}, max_wait_ms={max_wait_ms})")
+
+
+class RemoteEncoder:
+    """
+    Client for the embedding server with in-process fallback.
+
+    The local model is only loaded if the server cannot be reached, so
+    workers that talk to the sidecar never hold their own model copy.
+    """
+
+    backend = 'embedding-server'
+
+    def __init__(self, socket_path: str, model_name: str, revision: str = '',
+                 fallback_factory: Optional[Callable[[], Any]] = None,
+                 dimension_hint: Optional[Callable[[], Optional[int]]] = None,
+                 timeout: float = 10.0, retry_interval: float = 30.0):
+        """
+        Initialize remote encoder
+
+        Args:
+            socket_path: Filesystem path of the server's Unix socket
+            model_name: Expected embedding model name
+            revision: Expected embedding revision label (PyTorch, ONNX and int8
+                variants of one model differ)
+            fallback_factory: Creates a local encoder when the server is down
+            dimension_hint: Reads the embedding dimension from the model's config
+                files (no weights), used when the server is down at startup
+            timeout: Socket timeout in seconds
+            retry_interval: Seconds to wait before retrying a server that failed
+        """
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.revision = revision
+        self.fallback_factory = fallback_factory
+        self.dimension_hint = dimension_hint
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+
+        self._fallback = None
+        self._fallback_lock = threading.Lock()
+        self._down_until = 0.0
+        self._dimension = None
+        self._verified = False
+
+        self.remote_requests = 0
+        self.fallback_requests = 0
+        self.server_errors = 0
+
+    def _request(self, request: Dict[str, Any]) -> bytes:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+            _send_frame(sock, json.dumps(request).encode('utf-8'))
+            payload = _recv_frame(sock)
+        finally:
+            sock.close()
+
+        if payload[:1] == b'E':
+            raise RuntimeError(payload[1:].decode('utf-8', 'replace'))
+        return payload
+
+    def _server_available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _mark_down(self, error: Exception):
+        self.server_errors += 1
+        self._down_until = time.monotonic() + self.retry_interval
+        logger.warning(f"Embedding server unavailable ({error}); "
+                       f"using in-process encoding for {self.retry_interval:.0f}s")
+
+    def _get_fallback(self):
+        if self._fallback is None:
+            with self._fallback_lock:
+                if self._fallback is None:
+                    if self.fallback_factory is None:
+                        raise RuntimeError("Embedding server unavailable and no fallback encoder configured")
+                    self._fallback = self.fallback_factory()
+        return self._fallback
+
+    def _release_fallback(self):
+        """Drop the in-process model once the server answers again"""
+        with self._fallback_lock:
+            if self._fallback is not None:
+                self._fallback = None
+                logger.info("Embedding server is back; released the in-process embedding model")
+
+    def server_info(self) -> Dict[str, Any]:
+        """
+        Query the server for its model and batching statistics
+
+        Returns:
+            Server info dictionary
+        """
+        info = json.loads(self._request({'op': 'info'})[1:])
+        if info['model'] != self.model_name:
+            raise RuntimeError(f"Embedding server serves {info['model']}, expected {self.model_name}")
+        if info.get('revision') != self.revision:
+            raise RuntimeError(f"Embedding server serves revision {info.get('revision')}, expected {self.revision}")
+        if self._dimension is not None and info['dimension'] != self._dimension:
+            raise RuntimeError(f"Embedding server returns dimension {info['dimension']}, expected {self._dimension}")
+        self._verified = True
+        return info
+
+    @property
+    def dimension(self) -> int:
+        """
+        Embedding dimension
+
+        Asked from the server; if it is not up yet, read from the model's
+        config files, so a server that is still starting never makes this
+        process load its own model copy. Only when neither works is the
+        fallback model loaded.
+        """
+        if self._dimension is None:
+            try:
+                self._dimension = self.server_info()['dimension']
+            except Exception as e:
+                dimension = self.dimension_hint() if self.dimension_hint else None
+                if dimension is None:
+                    self._mark_down(e)
+                    dimension = self._get_fallback().dimension
+                else:
+                    logger.warning(f"Embedding server not reachable yet ({e}); "
+                                   f"using dimension {dimension} from the model config")
+                self._dimension = dimension
+        return self._dimension
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Encode texts on the server, falling back to in-process encoding
+
+        Args:
+            texts: Texts to encode
+            batch_size: Used only by the fallback encoder
+            show_progress_bar: Used only by the fallback encoder
+
+        Returns:
+            Float32 embedding matrix, one row per text
+        """
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        if self._server_available():
+            try:
+                # Never mix embeddings from a server running a different model or variant
+                if not self._verified:
+                    self.server_info()
+
+                payload = self._request({'op': 'encode', 'texts': texts})
+                embeddings = np.frombuffer(payload, dtype=np.float32, offset=1)
+                self.remote_requests += 1
+                if self._fallback is not None:
+                    self._release_fallback()
+                return embeddings.reshape(len(texts), -1)
+            except Exception as e:
+                self._mark_down(e)
+
+        self.fallback_requests += 1
+        return self._get_fallback().encode(texts, batch_size=batch_size, show_progress_bar=show_progress_bar)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get encoder statistics"""
+        return {
+            'backend': self.backend,
+            'model': self.model_name,
+            'revision': self.revision,
+            'socket': self.socket_path,
+            'server_available': self._server_available(),
+            'remote_requests': self.remote_requests,
+            'fallback_requests': self.fallback_requests,
+            'server_errors': self.server_errors,
+            'fallback_loaded': self._fallback is not None
+        }
+
+
+def wait_for_server(socket_path: str, model_name: str, timeout: float, revision: str = '') -> bool:
+    """
+    Wait until the server at socket_path answers info requests
+
+    Args:
+        socket_path: Filesystem path of the server's Unix socket
+        model_name: Expected embedding model name
+        timeout: Seconds to wait
+        revision: Expected embedding revision label
+
+    Returns:
+        True once the server is ready, False on timeout
+    """
+    client = RemoteEncoder(socket_path, model_name, revision=revision, timeout=5.0)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            client.server_info()
+            return True
+        except Exception as e:
+            if time.monotonic() >= deadline:
+                logger.error(f"Embedding server on {socket_path} not ready after {timeout:.0f}s: {e}")
+                return False
+            time.sleep(0.5)
+
+
+def main():
+    """Run the embedding server (or wait for it) with settings from Config"""
+    from config import Config
+    from .encoders import create_encoder_from_config, embedding_revision
+
+    parser = argparse.ArgumentParser(description="Shared embedding server")
+    parser.add_argument('--wait', type=float, metavar='SECONDS',
+                        help="Don't serve; wait until the configured server is ready (no-op when none is configured)")
+    args = parser.parse_args()
+
+    if args.wait is not None:
+        if not Config.EMBEDDING_SERVER_SOCKET:
+            return
+        if not wait_for_server(Config.EMBEDDING_SERVER_SOCKET, Config.EMBEDDING_MODEL, args.wait,
+                               revision=embedding_revision(Config)):
+            raise SystemExit(1)
+        logger.info(f"Embedding server on {Config.EMBEDDING_SERVER_SOCKET} is ready")
+        return
+
+    if not Config.EMBEDDING_SERVER_SOCKET:
+        print("ERROR: EMBEDDING_SERVER_SOCKET is not set")
+        raise SystemExit(1)
+
+    encoder = create_encoder_from_config(Config, use_server=False)
+    server = EmbeddingServer(
+        Config.EMBEDDING_SERVER_SOCKET,
+        encoder,
+        max_batch_size=Config.EMBEDDING_SERVER_MAX_BATCH,
+        max_wait_ms=Config.EMBEDDING_SERVER_MAX_WAIT_MS,
+        revision=embedding_revision(Config)
+    )
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(Config.EMBEDDING_SERVER_SOCKET):
+            os.remove(Config.EMBEDDING_SERVER_SOCKET)
+
+
+if __name__ == "__main__":
+    main()
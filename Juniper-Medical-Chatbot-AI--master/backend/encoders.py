@@ -0,0 +1,188 @@
+"""
+Encoders Module
+Text embedding backends used by the vector store
+"""
+
+from typing import List, Dict, Any, Optional
+import numpy as np
+import json
+import os
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SentenceTransformerEncoder:
+    """
+    In-process sentence-transformers (PyTorch) encoder
+    """
+
+    backend = 'sentence-transformers'
+
+    def __init__(self, model_name: str):
+        """
+        Load the embedding model
+
+        Args:
+            model_name: Name of the sentence-transformer model
+        """
+        from sentence_transformers import SentenceTransformer
+
+        logger.info(f"Loading embedding model: {model_name}")
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Encode texts into embeddings
+
+        Args:
+            texts: Texts to encode
+            batch_size: Texts per forward pass
+            show_progress_bar: Display a progress bar for long inputs
+
+        Returns:
+            Float32 embedding matrix, one row per text
+        """
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=show_progress_bar,
+            convert_to_numpy=True
+        ).astype(np.float32)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get encoder statistics"""
+        return {
+            'backend': self.backend,
+            'model': self.model_name
+        }
+
+
+def create_local_encoder(model_name: str, backend: str = 'sentence-transformers',
+                         onnx_model_dir: Optional[str] = None, onnx_quantized: bool = True,
+                         onnx_threads: int = 0):
+    """
+    Create an in-process encoder
+
+    Args:
+        model_name: Name of the embedding model
+        backend: 'sentence-transformers' (PyTorch) or 'onnx'
+        onnx_model_dir: Directory written by export_onnx.py
+        onnx_quantized: Use the int8 ONNX model
+        onnx_threads: onnxruntime intra-op threads (0 = library default)
+
+    Returns:
+        Encoder instance
+    """
+    if backend == 'sentence-transformers':
+        return SentenceTransformerEncoder(model_name)
+
+    if backend == 'onnx':
+        from .onnx_encoder import OnnxEncoder
+        return OnnxEncoder(
+            onnx_model_dir,
+            quantized=onnx_quantized,
+            num_threads=onnx_threads,
+            expected_model=model_name
+        )
+
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+def local_encoder_dimension(model_name: str, backend: str = 'sentence-transformers',
+                            onnx_model_dir: Optional[str] = None, **_) -> Optional[int]:
+    """
+    Embedding dimension of a local encoder, read from its config files without loading weights
+
+    Args:
+        model_name: Name of the embedding model
+        backend: 'sentence-transformers' (PyTorch) or 'onnx'
+        onnx_model_dir: Directory written by export_onnx.py
+
+    Returns:
+        Dimension, or None if the config can't be read
+    """
+    try:
+        if backend == 'onnx':
+            from .onnx_encoder import ENCODER_CONFIG_FILE
+            with open(os.path.join(onnx_model_dir, ENCODER_CONFIG_FILE), 'r', encoding='utf-8') as f:
+                return int(json.load(f)['dimension'])
+
+        # Mean-pooled transformer without a Dense head: the hidden size
+        from transformers import AutoConfig
+        return int(AutoConfig.from_pretrained(model_name).hidden_size)
+
+    except Exception as e:
+        logger.warning(f"Could not read the embedding dimension of {model_name} from its config: {e}")
+        return None
+
+
+def create_encoder(model_name: str, backend: str = 'sentence-transformers',
+                   server_socket: Optional[str] = None, revision: str = '', **local_options):
+    """
+    Create the configured encoder
+
+    Args:
+        model_name: Name of the embedding model
+        backend: In-process backend ('sentence-transformers' or 'onnx')
+        server_socket: Optional Unix socket of a shared embedding server
+        revision: Embedding revision label the server must report (see embedding_revision)
+        **local_options: Extra options for create_local_encoder (ONNX settings)
+
+    Returns:
+        Encoder instance
+    """
+    if server_socket:
+        from .embedding_server import RemoteEncoder
+        return RemoteEncoder(
+            server_socket,
+            model_name,
+            revision=revision,
+            fallback_factory=lambda: create_local_encoder(model_name, backend, **local_options),
+            dimension_hint=lambda: local_encoder_dimension(model_name, backend, **local_options)
+        )
+
+    return create_local_encoder(model_name, backend, **local_options)
+
+
+def embedding_revision(config) -> str:
+    """
+    Revision label under which embeddings from a Config are cached
+
+    ONNX exports (and their int8 copies) produce slightly different vectors
+    than the PyTorch model, so each variant gets its own label.
+
+    Args:
+        config: Configuration class or instance (see config.Config)
+
+    Returns:
+        Revision label
+    """
+    if config.EMBEDDING_BACKEND == 'onnx':
+        return f"{config.EMBEDDING_MODEL_REVISION}+onnx{'-int8' if config.ONNX_QUANTIZED else ''}"
+    return config.EMBEDDING_MODEL_REVISION
+
+
+def create_encoder_from_config(config, use_server: bool = True):
+    """
+    Create the encoder described by a Config class
+
+    Args:
+        config: Configuration class or instance (see config.Config)
+        use_server: Route through the embedding server when one is configured
+
+    Returns:
+        Encoder instance
+    """
+    return create_encoder(
+        config.EMBEDDING_MODEL,
+        backend=config.EMBEDDING_BACKEND,
+        server_socket=config.EMBEDDING_SERVER_SOCKET if use_server else None,
+        revision=embedding_revision(config),
+        onnx_model_dir=config.ONNX_MODEL_DIR,
+        onnx_quantized=config.ONNX_QUANTIZED,
+        onnx_threads=config.ONNX_NUM_THREADS
+    )
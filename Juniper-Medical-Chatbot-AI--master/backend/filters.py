@@ -0,0 +1,70 @@
+"""
+Filters Module
+Metadata filters for retrieval: {field: value} or {field: [values]}, all
+fields must match; translated to ChromaDB `where` clauses or evaluated
+against per-partition row ranges of the NumPy index
+"""
+
+from typing import List, Dict, Any, Optional
+
+# Metadata field the NumPy and lexical indexes are partitioned by
+PARTITION_FIELD = 'category'
+
+
+def normalize_filters(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, List[Any]]]:
+    """
+    Normalize a filter to {field: [allowed values]}
+
+    Args:
+        filters: {field: value} or {field: [values]}; None or empty means no filter
+
+    Returns:
+        Normalized filter, or None when nothing is filtered
+    """
+    if not filters:
+        return None
+
+    normalized = {}
+    for field, value in filters.items():
+        values = list(value) if isinstance(value, (list, tuple, set, frozenset)) else [value]
+        if not values:
+            raise ValueError(f"Filter on '{field}' allows no values")
+        normalized[field] = values
+    return normalized
+
+
+def to_chroma_where(filters: Optional[Dict[str, List[Any]]]) -> Optional[Dict[str, Any]]:
+    """
+    Translate a normalized filter into a ChromaDB where clause
+
+    Args:
+        filters: Normalized filter
+
+    Returns:
+        ChromaDB where clause, or None
+    """
+    if not filters:
+        return None
+
+    clauses = [
+        {field: values[0]} if len(values) == 1 else {field: {'$in': values}}
+        for field, values in filters.items()
+    ]
+    return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+def matches(metadata: Optional[Dict[str, Any]], filters: Optional[Dict[str, List[Any]]]) -> bool:
+    """
+    Check document metadata against a normalized filter
+
+    Args:
+        metadata: Document metadata
+        filters: Normalized filter
+
+    Returns:
+        True if every filtered field has an allowed value
+    """
+    if not filters:
+        return True
+    metadata = metadata or {}
+    return all(metadata.get(field) in values for field, values in filters.items())
@@ -0,0 +1,81 @@
+"""
+Index Generation Module
+File-based generation marker shared by every process that uses a collection
+"""
+
+from typing import Optional, Tuple
+import uuid
+import os
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CollectionGeneration:
+    """
+    Generation marker stored next to the index data.
+
+    Writers bump the marker whenever the collection changes; readers compare
+    a cheap os.stat() of the marker against the value they last saw instead
+    of re-fetching the collection from the database on every request.
+    External re-indexing jobs can bump it by calling bump() or by simply
+    rewriting the marker file.
+    """
+
+    def __init__(self, db_path: str, collection_name: str):
+        """
+        Initialize generation marker
+
+        Args:
+            db_path: Directory holding the index data
+            collection_name: Name of the collection the marker tracks
+        """
+        self.path = os.path.join(db_path, f"{collection_name}.generation")
+
+    def current(self) -> Optional[Tuple[int, int, int]]:
+        """
+        Get the current marker value
+
+        Returns:
+            Opaque marker (inode, mtime, size) or None if never bumped
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def token(self) -> str:
+        """
+        Get the human-readable generation token written by the last bump
+
+        Returns:
+            Generation token, or an empty string if never bumped
+        """
+        try:
+            with open(self.path, 'r') as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return ''
+
+    def bump(self) -> str:
+        """
+        Advance the generation so every reader refreshes its handle
+
+        Returns:
+            The new generation token
+        """
+        token = uuid.uuid4().hex
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Atomic replace gives the marker a new inode, so readers always notice
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(token)
+        os.replace(tmp_path, self.path)
+
+        logger.info(f"Bumped collection generation: {token}")
+        return token
@@ -0,0 +1,218 @@
+"""
+Ingestion Module
+Pipelined document embedding: a producer encodes batches (optionally across
+a process pool) while the consumer writes finished batches to the index
+"""
+
+from typing import List, Dict, Any, Iterator, Tuple
+from collections import deque
+import multiprocessing
+import concurrent.futures
+import threading
+import queue
+import time
+import os
+import logging
+
+from .metrics import StageTimings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Encoder owned by each pool worker process
+_worker_encoder = None
+
+
+def _init_worker(encoder_options: Dict[str, Any], threads: int):
+    """Load the embedding model once per pool worker, with a share of the CPU threads"""
+    global _worker_encoder
+
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    from .encoders import create_local_encoder
+    options = dict(encoder_options)
+    if options.get('backend') == 'onnx':
+        options['onnx_threads'] = threads
+    _worker_encoder = create_local_encoder(**options)
+
+
+def _encode_in_worker(texts: List[str]):
+    return _worker_encoder.encode(texts, batch_size=len(texts))
+
+
+class _Failed:
+    """Producer error handed to the consumer"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_DONE = object()
+
+
+class IngestionPipeline:
+    """
+    Bounded producer/consumer ingestion.
+
+    The producer thread encodes batches, in-process or on a pool of worker
+    processes for large corpora, and hands them to the consumer through a
+    bounded queue, so the CPU keeps encoding while the index is written and
+    at most queue_depth encoded batches wait for the writer. Each batch is
+    upserted as soon as it is ready and the index is flushed every
+    flush_every batches: ChromaDB has already written the rows, while the
+    NumPy index only stages them, so its flush is what publishes them and
+    bounds the staged batches held in memory. Since stored metadata carries
+    the content hash, a crashed run resumes by re-running the sync, which
+    skips flushed batches and reads the rest from the embedding cache.
+    """
+
+    def __init__(self, vector_store, workers: int = 0, queue_depth: int = 4, pool_min_docs: int = 2000,
+                 flush_every: int = 10):
+        """
+        Initialize ingestion pipeline
+
+        Args:
+            vector_store: VectorStore whose encoder, embedding cache and index are used
+            workers: Encoder processes (0 or 1 encodes in-process)
+            queue_depth: Encoded batches allowed to wait for the writer
+            pool_min_docs: Smallest corpus that is worth starting the process pool for
+            flush_every: Written batches between index flushes (0 leaves flushing to the caller)
+        """
+        self.vector_store = vector_store
+        self.workers = workers
+        self.queue_depth = max(queue_depth, 1)
+        self.pool_min_docs = pool_min_docs
+        self.flush_every = flush_every
+        self.timings = StageTimings()
+
+    def _encode_local(self, batches: List[List[Dict[str, Any]]]) -> Iterator[Tuple[List[Dict[str, Any]], Any]]:
+        """Encode batches in this process"""
+        for batch in batches:
+            with self.timings.time('encode'):
+                embeddings = self.vector_store.encode_texts([doc['text'] for doc in batch], batch_size=len(batch))
+            yield batch, embeddings
+
+    def _encode_pool(self, batches: List[List[Dict[str, Any]]]) -> Iterator[Tuple[List[Dict[str, Any]], Any]]:
+        """Encode batches on a process pool, yielding them in order"""
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+
+        # spawn: forking a process that already holds torch/OpenMP threads can deadlock
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.vector_store.encoder_options, threads)
+        ) as pool:
+            pending = deque()
+
+            def finish():
+                batch, embeddings, missing, future = pending.popleft()
+                if future is not None:
+                    with self.timings.time('encode'):
+                        encoded = future.result()
+                    embeddings[missing] = encoded
+                    self.vector_store.store_cached([batch[idx]['text'] for idx in missing], encoded)
+                return batch, embeddings
+
+            for batch in batches:
+                # Cache lookups stay in the parent; only misses go to the pool
+                with self.timings.time('cache'):
+                    embeddings, missing = self.vector_store.lookup_cached([doc['text'] for doc in batch])
+
+                future = pool.submit(_encode_in_worker, [batch[idx]['text'] for idx in missing]) if missing else None
+                pending.append((batch, embeddings, missing, future))
+
+                # Bounded in-flight work keeps memory flat
+                if len(pending) >= self.workers * 2:
+                    yield finish()
+
+            while pending:
+                yield finish()
+
+    def run(self, documents: List[Dict[str, Any]], batch_size: int = 100) -> Dict[str, Any]:
+        """
+        Encode and upsert documents
+
+        Args:
+            documents: Documents with 'id', 'text', and 'metadata'
+            batch_size: Documents per batch
+
+        Returns:
+            Throughput report with per-stage timings
+        """
+        start = time.perf_counter()
+        batches = [documents[i:i + batch_size] for i in range(0, len(documents), batch_size)]
+        use_pool = self.workers > 1 and len(documents) >= self.pool_min_docs
+        encode = self._encode_pool if use_pool else self._encode_local
+
+        ready = queue.Queue(maxsize=self.queue_depth)
+        stop = threading.Event()
+
+        def offer(item) -> bool:
+            """Queue an item, blocking while the writer is behind; False once the writer stopped"""
+            while not stop.is_set():
+                try:
+                    ready.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for item in encode(batches):
+                    # Blocks while the writer is behind (backpressure)
+                    with self.timings.time('backpressure'):
+                        if not offer(item):
+                            return
+                offer(_DONE)
+            except BaseException as e:
+                offer(_Failed(e))
+
+        producer = threading.Thread(target=produce, name='ingest-encoder', daemon=True)
+        producer.start()
+
+        written = 0
+        written_batches = 0
+        try:
+            while True:
+                with self.timings.time('writer_idle'):
+                    item = ready.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failed):
+                    raise item.error
+
+                batch, embeddings = item
+                with self.timings.time('write'):
+                    self.vector_store.index.upsert(
+                        [doc['id'] for doc in batch],
+                        embeddings,
+                        [doc['text'] for doc in batch],
+                        [self.vector_store.stamp_metadata(doc) for doc in batch]
+                    )
+
+                written += len(batch)
+                written_batches += 1
+                if self.flush_every and written_batches % self.flush_every == 0:
+                    with self.timings.time('flush'):
+                        self.vector_store.index.flush()
+                logger.info(f"Ingested {written}/{len(documents)} documents")
+        finally:
+            stop.set()
+            producer.join()
+
+        elapsed = time.perf_counter() - start
+        stages = self.timings.get_stats()
+        return {
+            'documents': written,
+            'batches': len(batches),
+            'workers': self.workers if use_pool else 1,
+            'seconds': round(elapsed, 3),
+            'docs_per_sec': round(written / elapsed, 1) if elapsed > 0 else 0.0,
+            'stage_seconds': {stage: round(entry['total_ms'] / 1000, 3) for stage, entry in stages.items()}
+        }
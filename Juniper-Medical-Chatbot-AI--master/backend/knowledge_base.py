@@ -1250,29 +1250,40 @@ in high-risk patients, monitor renal function and blood pressure, avoid in patie
 ]
 
 
+# Category index, built once at import
+_CATEGORY_INDEX = {}
+for _item in MEDICAL_KNOWLEDGE:
+    _CATEGORY_INDEX.setdefault(_item['category'], []).append(_item)
+
+
 def get_knowledge_by_category(category):
     """Get all knowledge entries for a specific category"""
-    return [item for item in MEDICAL_KNOWLEDGE if item['category'] == category]
+    return list(_CATEGORY_INDEX.get(category, []))
 
 
 def get_all_categories():
     """Get list of all unique categories"""
-    return list(set(item['category'] for item in MEDICAL_KNOWLEDGE))
+    return sorted(_CATEGORY_INDEX)
+
 
+_keyword_index = None
 
-def search_knowledge(query):
-    """Simple keyword search across all knowledge (fallback for testing)"""
-    query_lower = query.lower()
-    results = []
 
-    for item in MEDICAL_KNOWLEDGE:
-        title_match = query_lower in item['title'].lower()
-        content_match = query_lower in item['content'].lower()
+def search_knowledge(query, top_k=None):
+    """Keyword (BM25) search across all knowledge (fallback for testing)"""
+    global _keyword_index
+    from .lexical_index import LexicalIndex
 
-        if title_match or content_match:
-            results.append(item)
+    # Inverted index is built once, on first use
+    if _keyword_index is None:
+        _keyword_index = LexicalIndex()
+        _keyword_index.add(
+            [str(idx) for idx in range(len(MEDICAL_KNOWLEDGE))],
+            [f"{item['title']}\n{item['content']}" for item in MEDICAL_KNOWLEDGE]
+        )
 
-    return results
+    hits = _keyword_index.search(query, top_k or len(MEDICAL_KNOWLEDGE))
+    return [MEDICAL_KNOWLEDGE[int(doc_id)] for doc_id, _ in hits]
 
 
 # Summary statistics
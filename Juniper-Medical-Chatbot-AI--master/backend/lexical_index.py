@@ -0,0 +1,292 @@
+"""
+Lexical Index Module
+Tokenized inverted index with BM25 scoring for exact-term retrieval
+(drug names, acronyms such as NSAIDs, CABG, ARBs)
+"""
+
+from typing import List, Dict, Any, Optional, Tuple, Collection
+import numpy as np
+import json
+import os
+import re
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i in is it its of on or
+that the their this to was were what when where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into normalized index terms
+
+    Lowercases, drops stopwords and strips a plural 's' so that
+    "ARBs" / "ARB" and "NSAIDs" / "NSAID" share a term.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+def lexical_index_path(data_path: str, collection_name: str) -> str:
+    """
+    Location of a collection's lexical index, next to its vector data
+
+    Args:
+        data_path: Directory holding the vector index
+        collection_name: Name of the collection
+
+    Returns:
+        Path of the BM25 index file
+    """
+    return os.path.join(data_path, f"{collection_name}.bm25.json")
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse several ranked id lists with reciprocal rank fusion
+
+    Args:
+        rankings: Ranked id lists, best first
+        k: RRF damping constant
+
+    Returns:
+        (id, fused score) pairs, best first
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index.
+
+    Term frequencies and document lengths are stored; per-posting BM25
+    weights are precomputed on load, so a query is a handful of vectorized
+    array additions followed by argpartition.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize lexical index
+
+        Args:
+            path: Optional JSON file the index is persisted to
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+
+        self.ids = []
+        self.doc_lengths = []
+        self.partitions = []  # Partition (category) of every document
+        self.term_freqs = {}  # term -> {doc index: tf}
+
+        self._postings = {}  # term -> (doc indices, BM25 weights)
+        self._row_by_id = {}
+        self._file_stat = None
+
+        if self.path:
+            self.load()
+
+    def add(self, ids: List[str], texts: List[str], partitions: Optional[List[str]] = None):
+        """
+        Index documents (replacing any with the same id)
+
+        Args:
+            ids: Document IDs
+            texts: Document texts
+            partitions: Optional partition (category) of every document, for filtered search
+        """
+        removed = [doc_id for doc_id in ids if doc_id in self._row_by_id]
+        if removed:
+            self.delete(removed)
+
+        for doc_id, text, partition in zip(ids, texts, partitions or [''] * len(ids)):
+            row = len(self.ids)
+            terms = tokenize(text)
+            self.ids.append(doc_id)
+            self.doc_lengths.append(len(terms))
+            self.partitions.append(partition or '')
+            self._row_by_id[doc_id] = row
+
+            counts = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                self.term_freqs.setdefault(term, {})[row] = tf
+
+        self._finalize()
+
+    def delete(self, ids: List[str]):
+        """
+        Remove documents from the index
+
+        Args:
+            ids: Document IDs to remove
+        """
+        drop = {self._row_by_id[doc_id] for doc_id in ids if doc_id in self._row_by_id}
+        if not drop:
+            return
+
+        keep = [row for row in range(len(self.ids)) if row not in drop]
+        new_row = {old: new for new, old in enumerate(keep)}
+
+        self.ids = [self.ids[row] for row in keep]
+        self.doc_lengths = [self.doc_lengths[row] for row in keep]
+        self.partitions = [self.partitions[row] for row in keep]
+        self.term_freqs = {
+            term: {new_row[row]: tf for row, tf in postings.items() if row in new_row}
+            for term, postings in self.term_freqs.items()
+        }
+        self.term_freqs = {term: postings for term, postings in self.term_freqs.items() if postings}
+        self._finalize()
+
+    def clear(self):
+        """Drop every document"""
+        self.ids = []
+        self.doc_lengths = []
+        self.partitions = []
+        self.term_freqs = {}
+        self._finalize()
+
+    def _finalize(self):
+        """Precompute BM25 weights for every posting"""
+        self._row_by_id = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self._postings = {}
+        self._partition_array = np.asarray(self.partitions, dtype=object)
+
+        n_docs = len(self.ids)
+        if not n_docs:
+            return
+
+        doc_lengths = np.asarray(self.doc_lengths, dtype=np.float32)
+        avg_length = max(float(doc_lengths.mean()), 1.0)
+        length_norm = self.k1 * (1 - self.b + self.b * doc_lengths / avg_length)
+
+        for term, postings in self.term_freqs.items():
+            rows = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tfs = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            idf = np.log(1 + (n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            self._postings[term] = (rows, idf * tfs * (self.k1 + 1) / (tfs + length_norm[rows]))
+
+    def search(self, query: str, top_k: int = 5,
+               partitions: Optional[Collection[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Rank documents by BM25 score
+
+        Args:
+            query: Search query
+            top_k: Number of results
+            partitions: Only rank documents in these partitions (categories)
+
+        Returns:
+            (id, score) pairs, best first; documents without any query term are omitted
+        """
+        postings = [self._postings[term] for term in set(tokenize(query)) if term in self._postings]
+        if not postings:
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for rows, weights in postings:
+            scores[rows] += weights
+
+        if partitions is not None:
+            scores[~np.isin(self._partition_array, list(partitions))] = 0
+
+        matched = np.flatnonzero(scores)
+        k = min(top_k, len(matched))
+        if not k:
+            return []
+        best = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        best = best[np.argsort(-scores[best])]
+
+        return [(self.ids[row], float(scores[row])) for row in best]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def save(self):
+        """Persist term frequencies and document lengths (atomic replace)"""
+        if not self.path:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'k1': self.k1,
+                'b': self.b,
+                'ids': self.ids,
+                'doc_lengths': self.doc_lengths,
+                'partitions': self.partitions,
+                'term_freqs': {term: [list(postings.keys()), list(postings.values())]
+                               for term, postings in self.term_freqs.items()}
+            }, f)
+        os.replace(tmp_path, self.path)
+        self._file_stat = self._stat()
+        logger.info(f"Saved lexical index with {len(self.ids)} documents to {self.path}")
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except (FileNotFoundError, TypeError):
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def load(self):
+        """Load the index from its file (an absent file means an empty index)"""
+        self._file_stat = self._stat()
+        if self._file_stat is None:
+            self.clear()
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        self.k1 = data['k1']
+        self.b = data['b']
+        self.ids = data['ids']
+        self.doc_lengths = data['doc_lengths']
+        self.partitions = data.get('partitions') or [''] * len(self.ids)
+        self.term_freqs = {term: dict(zip(rows, tfs)) for term, (rows, tfs) in data['term_freqs'].items()}
+        self._finalize()
+        logger.info(f"Loaded lexical index with {len(self.ids)} documents")
+
+    def refresh(self):
+        """Reload if another process rewrote the index file"""
+        if self.path and self._stat() != self._file_stat:
+            self.load()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        return {
+            'documents': len(self.ids),
+            'terms': len(self._postings),
+            'path': self.path
+        }
@@ -12,9 +12,13 @@ LLM Service Module
 Handles integration with Groq API for text generation
 """
 
-from groq import Groq
+from groq import Groq, AsyncGroq
+import asyncio
+import time
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator
+from .prompt_templates import PromptTemplates
+from .model_router import ModelRouter, ModelUsage
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,8 +29,13 @@ class LLMService:
     Service for interacting with Groq LLM API
     """
 
+    # Most recent history messages sent with a RAG turn (3 exchanges)
+    HISTORY_MESSAGES = 6
+
     def __init__(self, api_key: str, model: str = "llama-3.1-70b-versatile",
-                 temperature: float = 0.3, max_tokens: int = 1024):
+                 temperature: float = 0.3, max_tokens: int = 1024,
+                 prompt_templates: Optional[PromptTemplates] = None,
+                 router: Optional[ModelRouter] = None):
         """
         Initialize LLM service
 
@@ -35,20 +44,76 @@ class LLMService:
             model: Model name
             temperature: Temperature for generation (0-2)
             max_tokens: Maximum tokens to generate
+            prompt_templates: RAG prompt templates (defaults to the bundled prompts/v1)
+            router: Optional fast/large model router for RAG turns (None sends every turn to model)
         """
         if not api_key:
             raise ValueError("Groq API key is required")
 
+        self.api_key = api_key
         self.client = Groq(api_key=api_key)
+        self._async_client = None
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.prompt_templates = prompt_templates or PromptTemplates()
+        self.router = router
+
+        # Per-model latency and token usage
+        self.usage = ModelUsage()
 
         logger.info(f"Initialized LLM service with model: {model}")
 
+    @property
+    def prompt_version(self) -> str:
+        """Version of the prompt templates, part of every key an answer is shared under"""
+        return self.prompt_templates.version
+
+    @property
+    def async_client(self) -> AsyncGroq:
+        """AsyncGroq client, created on first use so WSGI workers never build one"""
+        if self._async_client is None:
+            self._async_client = AsyncGroq(api_key=self.api_key)
+        return self._async_client
+
+    def route(self, query: str, language: str, top_similarity: float, has_history: bool) -> str:
+        """
+        Choose the model for a RAG turn
+
+        Args:
+            query: User query
+            language: Response language
+            top_similarity: Similarity of the best context passage
+            has_history: Whether the conversation has earlier turns
+
+        Returns:
+            Model name (the default model when no router is configured)
+        """
+        if self.router is None:
+            return self.model
+        return self.router.route(query, language, top_similarity, has_history)[0]
+
+    @staticmethod
+    def _chunk_usage(chunk):
+        """Token usage carried by a stream chunk (Groq sends it on the last one), if any"""
+        return getattr(chunk, 'usage', None) or getattr(getattr(chunk, 'x_groq', None), 'usage', None)
+
+    def _completion_args(self, messages: List[Dict[str, str]], temperature: Optional[float],
+                         max_tokens: Optional[int], stream: bool, model: Optional[str] = None) -> Dict:
+        """Keyword arguments of a chat completion request"""
+        return {
+            'model': model or self.model,
+            'messages': messages,
+            'temperature': temperature or self.temperature,
+            'max_tokens': max_tokens or self.max_tokens,
+            'top_p': 1,
+            'stream': stream
+        }
+
     def generate_response(self, messages: List[Dict[str, str]],
                          temperature: Optional[float] = None,
-                         max_tokens: Optional[int] = None) -> str:
+                         max_tokens: Optional[int] = None,
+                         model: Optional[str] = None) -> str:
         """
         Generate a response using the LLM
 
@@ -56,32 +121,203 @@ class LLMService:
             messages: List of message dictionaries with 'role' and 'content'
             temperature: Override default temperature
             max_tokens: Override default max_tokens
+            model: Override default model
 
         Returns:
             Generated response text
         """
+        model = model or self.model
+        start = time.perf_counter()
         try:
             response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature or self.temperature,
-                max_tokens=max_tokens or self.max_tokens,
-                top_p=1,
-                stream=False
+                **self._completion_args(messages, temperature, max_tokens, stream=False, model=model)
             )
 
             generated_text = response.choices[0].message.content.strip()
-            logger.info(f"Generated response ({len(generated_text)} chars)")
+            self.usage.record(model, (time.perf_counter() - start) * 1000, getattr(response, 'usage', None))
+            logger.info(f"Generated response with {model} ({len(generated_text)} chars)")
 
             return generated_text
 
         except Exception as e:
+            self.usage.record(model, (time.perf_counter() - start) * 1000, error=True)
             logger.error(f"Error generating response: {e}")
             raise
 
+    def stream_response(self, messages: List[Dict[str, str]],
+                        temperature: Optional[float] = None,
+                        max_tokens: Optional[int] = None,
+                        model: Optional[str] = None) -> Iterator[str]:
+        """
+        Generate a response using the LLM, yielding text deltas as they arrive
+
+        Closing the generator early (e.g. the client disconnected) closes
+        the upstream HTTP stream, which stops generation on Groq's side.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            temperature: Override default temperature
+            max_tokens: Override default max_tokens
+            model: Override default model
+
+        Yields:
+            Response text deltas
+        """
+        model = model or self.model
+        stream = None
+        generated = 0
+        usage = None
+        first_token_ms = None
+        start = time.perf_counter()
+        try:
+            stream = self.client.chat.completions.create(
+                **self._completion_args(messages, temperature, max_tokens, stream=True, model=model)
+            )
+
+            for chunk in stream:
+                usage = self._chunk_usage(chunk) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - start) * 1000
+                    generated += len(delta)
+                    yield delta
+
+            self.usage.record(model, (time.perf_counter() - start) * 1000, usage,
+                              first_token_ms=first_token_ms or 0.0)
+            logger.info(f"Streamed response with {model} ({generated} chars)")
+
+        except GeneratorExit:
+            logger.info(f"Response stream cancelled after {generated} chars")
+            raise
+
+        except Exception as e:
+            self.usage.record(model, (time.perf_counter() - start) * 1000, error=True)
+            logger.error(f"Error streaming response: {e}")
+            raise
+
+        finally:
+            if stream is not None:
+                close = getattr(stream, 'close', None) or stream.response.close
+                close()
+
+    async def agenerate_response(self, messages: List[Dict[str, str]],
+                                 temperature: Optional[float] = None,
+                                 max_tokens: Optional[int] = None,
+                                 model: Optional[str] = None) -> str:
+        """
+        Generate a response using the LLM without blocking the event loop
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            temperature: Override default temperature
+            max_tokens: Override default max_tokens
+            model: Override default model
+
+        Returns:
+            Generated response text
+        """
+        model = model or self.model
+        start = time.perf_counter()
+        try:
+            response = await self.async_client.chat.completions.create(
+                **self._completion_args(messages, temperature, max_tokens, stream=False, model=model)
+            )
+
+            generated_text = response.choices[0].message.content.strip()
+            self.usage.record(model, (time.perf_counter() - start) * 1000, getattr(response, 'usage', None))
+            logger.info(f"Generated response with {model} ({len(generated_text)} chars)")
+
+            return generated_text
+
+        except Exception as e:
+            self.usage.record(model, (time.perf_counter() - start) * 1000, error=True)
+            logger.error(f"Error generating response: {e}")
+            raise
+
+    async def astream_response(self, messages: List[Dict[str, str]],
+                               temperature: Optional[float] = None,
+                               max_tokens: Optional[int] = None,
+                               model: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Async counterpart of stream_response
+
+        Closing the generator (aclose(), or cancelling the task iterating
+        it) closes the upstream HTTP stream.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            temperature: Override default temperature
+            max_tokens: Override default max_tokens
+            model: Override default model
+
+        Yields:
+            Response text deltas
+        """
+        model = model or self.model
+        stream = None
+        generated = 0
+        usage = None
+        first_token_ms = None
+        start = time.perf_counter()
+        try:
+            stream = await self.async_client.chat.completions.create(
+                **self._completion_args(messages, temperature, max_tokens, stream=True, model=model)
+            )
+
+            async for chunk in stream:
+                usage = self._chunk_usage(chunk) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - start) * 1000
+                    generated += len(delta)
+                    yield delta
+
+            self.usage.record(model, (time.perf_counter() - start) * 1000, usage,
+                              first_token_ms=first_token_ms or 0.0)
+            logger.info(f"Streamed response with {model} ({generated} chars)")
+
+        except (GeneratorExit, asyncio.CancelledError):
+            logger.info(f"Response stream cancelled after {generated} chars")
+            raise
+
+        except Exception as e:
+            self.usage.record(model, (time.perf_counter() - start) * 1000, error=True)
+            logger.error(f"Error streaming response: {e}")
+            raise
+
+        finally:
+            if stream is not None:
+                close = getattr(stream, 'close', None) or stream.response.aclose
+                await close()
+
+    def build_rag_messages(self, query: str, context: str,
+                           conversation_history: Optional[List[Dict[str, str]]] = None,
+                           language: str = 'en') -> List[Dict[str, str]]:
+        """
+        Build the chat messages for a RAG turn
+
+        Args:
+            query: User query
+            context: Retrieved context from vector store
+            conversation_history: Previous conversation turns
+            language: Language for response ('en' for English, 'ur' for Roman Urdu)
+
+        Returns:
+            Messages for the chat completion API
+        """
+        # Precompiled per language; the system message is the same string on every request
+        return self.prompt_templates.build_messages(language, context, query,
+                                                    (conversation_history or [])[-self.HISTORY_MESSAGES:])
+
     def generate_rag_response(self, query: str, context: str,
-                            conversation_history: Optional[List[Dict[str, str]]] = None,
-                            language: str = 'en') -> str:
+                              conversation_history: Optional[List[Dict[str, str]]] = None,
+                              language: str = 'en', model: Optional[str] = None) -> str:
         """
         Generate a response using RAG context
 
@@ -90,94 +326,91 @@ class LLMService:
             context: Retrieved context from vector store
             conversation_history: Previous conversation turns
             language: Language for response ('en' for English, 'ur' for Roman Urdu)
+            model: Model to use (e.g. from route()); defaults to the service's model
 
         Returns:
             Generated response
         """
-        # Build system message with instructions based on language
-        if language == 'ur':
-            system_message = """You are Juniper, an AI-powered medical research assistant who speaks ONLY in Roman Urdu.
-
-CRITICAL RULE - RESPOND IN ROMAN URDU ONLY:
-⚠️ DO NOT write in English
-⚠️ You MUST write your ENTIRE response in Roman Urdu (Urdu language written using English alphabet)
-⚠️ Every single sentence must be in Roman Urdu
-⚠️ DO NOT mix English and Roman Urdu - use ONLY Roman Urdu
-
-IMPORTANT GUIDELINES:
-1. Base your answers primarily on the provided CONTEXT
-2. Use simple Roman Urdu that is easy to understand
-3. Explain medical terms in Roman Urdu when possible (e.g., "diabetes" = "sugar ki bimari")
-4. If the context doesn't fully answer the question, provide what information is available
-5. Always remind users to consult healthcare professionals (doctor se mashwara zaroor lein)
-6. Be empathetic and supportive in your responses
-
-FORMATTING RULES:
-- Write in Roman Urdu using Latin alphabet (a-z)
-- Use a natural, conversational tone in Roman Urdu
-- Use simple paragraphs separated by blank lines
-- DO NOT use markdown headers (##, ===, ---)
-- DO NOT use bold (**text**) or italic formatting
-- DO NOT reference sources explicitly like [Source 1] or [Source 5] in the response
-
-EXAMPLES of Roman Urdu responses:
-- "Diabetes ya sugar ki bimari aik aisi bemari hai jis mein khoon mein sugar ki miqdar bohat zyada barh jati hai."
-- "Ye bemari do qisam ki hoti hai - Type 1 aur Type 2. Type 1 diabetes mein jism insulin nahi bana pata."
-- "Is ki wajah se aap ko ye alamat ho sakti hain: zyada pyas lagna, bar bar peshab ana, aur kamzori mehsoos hona."
-- "Behtar hoga ke aap kisi doctor se salah karein aur apna check-up zaroor karwayen."
-
-Remember: Write your COMPLETE response in Roman Urdu. Every word, every sentence must be in Roman Urdu, NOT English."""
-        else:
-            system_message = """You are Juniper, an AI-powered medical research assistant. Your role is to provide accurate, helpful, and clear medical information based on the knowledge provided to you.
-
-IMPORTANT GUIDELINES:
-1. Base your answers primarily on the provided CONTEXT
-2. Provide clear, concise, and professional responses without excessive formatting
-3. Use medical terminology appropriately but explain complex terms
-4. If the context doesn't fully answer the question, provide what information is available and acknowledge limitations
-5. Always remind users to consult healthcare professionals for medical advice
-6. Be empathetic and supportive in your responses
-
-FORMATTING RULES:
-- Write in a natural, conversational tone
-- Use simple paragraphs separated by blank lines
-- DO NOT use markdown headers (##, ===, ---)
-- DO NOT use bold (**text**) or italic formatting
-- DO NOT reference sources explicitly like [Source 1] or [Source 5] in the response
-- DO NOT create artificial sections with headers
-- Present information in a flowing, readable manner
-
-Remember: You are a research and educational tool, not a substitute for professional medical advice."""
-
-        # Build user message with context and query
-        if language == 'ur':
-            user_message = f"""CONTEXT (Retrieved Medical Knowledge):
-{context}
-
-USER QUESTION (in Roman Urdu):
-{query}
-
-IMPORTANT: You MUST respond in ROMAN URDU ONLY. Do NOT write in English. Write your complete answer in Roman Urdu (Urdu language using English alphabet). Start your response immediately in Roman Urdu without any English words. Use simple Roman Urdu that is easy to understand."""
-        else:
-            user_message = f"""CONTEXT (Retrieved Medical Knowledge):
-{context}
-
-USER QUESTION:
-{query}
-
-Please provide a clear and professional answer based on the context above. Write in a natural, conversational style without markdown formatting, headers, or source citations."""
-
-        # Build messages list
-        messages = [{"role": "system", "content": system_message}]
-
-        # Add conversation history if provided
-        if conversation_history:
-            messages.extend(conversation_history[-6:])  # Last 3 exchanges
-
-        # Add current query
-        messages.append({"role": "user", "content": user_message})
-
-        return self.generate_response(messages)
+        messages = self.build_rag_messages(query, context, conversation_history, language)
+        return self.generate_response(messages, model=model)
+
+    def stream_rag_response(self, query: str, context: str,
+                            conversation_history: Optional[List[Dict[str, str]]] = None,
+                            language: str = 'en', model: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream a response using RAG context
+
+        Args:
+            query: User query
+            context: Retrieved context from vector store
+            conversation_history: Previous conversation turns
+            language: Language for response ('en' for English, 'ur' for Roman Urdu)
+            model: Model to use (e.g. from route()); defaults to the service's model
+
+        Returns:
+            Iterator of response text deltas
+        """
+        messages = self.build_rag_messages(query, context, conversation_history, language)
+        return self.stream_response(messages, model=model)
+
+    async def agenerate_rag_response(self, query: str, context: str,
+                                     conversation_history: Optional[List[Dict[str, str]]] = None,
+                                     language: str = 'en', model: Optional[str] = None) -> str:
+        """
+        Async counterpart of generate_rag_response
+
+        Args:
+            query: User query
+            context: Retrieved context from vector store
+            conversation_history: Previous conversation turns
+            language: Language for response ('en' for English, 'ur' for Roman Urdu)
+            model: Model to use (e.g. from route()); defaults to the service's model
+
+        Returns:
+            Generated response
+        """
+        messages = self.build_rag_messages(query, context, conversation_history, language)
+        return await self.agenerate_response(messages, model=model)
+
+    def astream_rag_response(self, query: str, context: str,
+                             conversation_history: Optional[List[Dict[str, str]]] = None,
+                             language: str = 'en', model: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Async counterpart of stream_rag_response
+
+        Args:
+            query: User query
+            context: Retrieved context from vector store
+            conversation_history: Previous conversation turns
+            language: Language for response ('en' for English, 'ur' for Roman Urdu)
+            model: Model to use (e.g. from route()); defaults to the service's model
+
+        Returns:
+            Async iterator of response text deltas
+        """
+        messages = self.build_rag_messages(query, context, conversation_history, language)
+        return self.astream_response(messages, model=model)
+
+    def after_fork(self):
+        """Create a fresh Groq client; pooled HTTP connections must not cross fork()"""
+        self.client = Groq(api_key=self.api_key)
+        self._async_client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get LLM service statistics
+
+        Returns:
+            Dictionary with statistics
+        """
+        return {
+            'model': self.model,
+            'temperature': self.temperature,
+            'max_tokens': self.max_tokens,
+            'prompt_templates': self.prompt_templates.get_stats(),
+            'routing': self.router.get_stats() if self.router else None,
+            'models': self.usage.get_stats()
+        }
 
     def test_connection(self) -> bool:
         """
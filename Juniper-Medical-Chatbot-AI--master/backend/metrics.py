@@ -0,0 +1,89 @@
+"""
+Metrics Module
+Lightweight in-process stage timing for the retrieval and generation pipeline
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Any
+import threading
+import time
+import os
+
+
+class StageTimings:
+    """
+    Thread-safe accumulator of per-stage latency (count, total, max, last)
+    """
+
+    def __init__(self):
+        """Initialize empty timing table"""
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, elapsed_ms: float):
+        """
+        Record one observation for a stage
+
+        Args:
+            stage: Stage name (e.g. 'encode', 'query')
+            elapsed_ms: Elapsed time in milliseconds
+        """
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0}
+
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['last_ms'] = elapsed_ms
+
+    @contextmanager
+    def time(self, stage: str):
+        """
+        Context manager that records the wall time of the enclosed block
+
+        Args:
+            stage: Stage name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-stage timing summary in milliseconds"""
+        with self._lock:
+            return {
+                stage: {
+                    'count': entry['count'],
+                    'total_ms': round(entry['total_ms'], 3),
+                    'avg_ms': round(entry['total_ms'] / entry['count'], 3) if entry['count'] else 0.0,
+                    'max_ms': round(entry['max_ms'], 3),
+                    'last_ms': round(entry['last_ms'], 3)
+                }
+                for stage, entry in self._stages.items()
+            }
+
+
+def get_process_memory() -> Dict[str, Any]:
+    """
+    Get resident memory of the current process (Linux only)
+
+    RssFile counts file-backed pages such as memory-mapped indexes, which
+    are shared between workers; RssAnon is memory private to this worker.
+
+    Returns:
+        Dictionary with pid and RSS figures in megabytes
+    """
+    memory = {'pid': os.getpid()}
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'RssAnon', 'RssFile', 'RssShmem'):
+                    memory[f"{key.lower()}_mb"] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        pass
+    return memory
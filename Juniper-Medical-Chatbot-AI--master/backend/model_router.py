@@ -0,0 +1,184 @@
+"""
+Model Router Module
+Routes each RAG turn to a fast or a large model from cheap request signals,
+and records per-model latency and token usage
+"""
+
+from collections import deque
+from typing import Dict, Any, Iterable, Optional, Tuple
+import threading
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Recent latencies kept per model for percentiles
+LATENCY_WINDOW = 512
+
+
+class ModelRouter:
+    """
+    Chooses the model for a RAG turn.
+
+    A turn goes to the fast model only when every signal says it is easy:
+    its language is one the fast model answers well, the question is short
+    (follow-ups, which lean on the conversation, have their own, usually
+    tighter, limit) and retrieval found a confident match. Anything else
+    goes to the large model. The decision uses nothing that costs a model
+    call, so it adds no latency.
+    """
+
+    def __init__(self, fast_model: str, large_model: str, max_query_chars: int = 200,
+                 max_followup_chars: int = 100, min_similarity: float = 0.55,
+                 fast_languages: Iterable[str] = ('en',)):
+        """
+        Initialize model router
+
+        Args:
+            fast_model: Model for easy turns (empty routes everything to large_model)
+            large_model: Model for everything else
+            max_query_chars: Longest first-turn question the fast model gets
+            max_followup_chars: Longest question with history the fast model gets (0 = none)
+            min_similarity: Best context passage's similarity needed for the fast model
+            fast_languages: Response languages the fast model may answer
+        """
+        self.fast_model = fast_model
+        self.large_model = large_model
+        self.max_query_chars = max_query_chars
+        self.max_followup_chars = max_followup_chars
+        self.min_similarity = min_similarity
+        self.fast_languages = frozenset(fast_languages)
+
+        self._lock = threading.Lock()
+        self._decisions = {}  # reason -> count
+
+    def route(self, query: str, language: str, top_similarity: float, has_history: bool) -> Tuple[str, str]:
+        """
+        Choose the model for a turn
+
+        Args:
+            query: User query
+            language: Response language
+            top_similarity: Similarity of the best context passage
+            has_history: Whether the conversation has earlier turns
+
+        Returns:
+            Tuple of (model name, reason)
+        """
+        query_chars = len(query.strip())
+        if not self.fast_model:
+            model, reason = self.large_model, 'fast_model_disabled'
+        elif language not in self.fast_languages:
+            model, reason = self.large_model, 'language'
+        elif has_history and query_chars > self.max_followup_chars:
+            model, reason = self.large_model, 'long_followup'
+        elif not has_history and query_chars > self.max_query_chars:
+            model, reason = self.large_model, 'long_query'
+        elif top_similarity < self.min_similarity:
+            model, reason = self.large_model, 'low_confidence'
+        else:
+            model, reason = self.fast_model, 'followup' if has_history else 'simple'
+
+        with self._lock:
+            self._decisions[reason] = self._decisions.get(reason, 0) + 1
+
+        logger.info(f"Routed to {model} ({reason})")
+        return model, reason
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing rules and decision counts by reason"""
+        with self._lock:
+            decisions = dict(self._decisions)
+
+        return {
+            'fast_model': self.fast_model,
+            'large_model': self.large_model,
+            'max_query_chars': self.max_query_chars,
+            'max_followup_chars': self.max_followup_chars,
+            'min_similarity': self.min_similarity,
+            'fast_languages': sorted(self.fast_languages),
+            'decisions': decisions
+        }
+
+
+class ModelUsage:
+    """
+    Thread-safe per-model request counts, latency and token usage
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        """
+        Initialize usage table
+
+        Args:
+            window: Recent latencies kept per model for p50/p95
+        """
+        self.window = window
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, elapsed_ms: float, usage: Any = None,
+               first_token_ms: Optional[float] = None, error: bool = False):
+        """
+        Record one completion
+
+        Args:
+            model: Model that served the request
+            elapsed_ms: Wall time of the whole request in milliseconds
+            usage: The response's usage object (prompt_tokens, completion_tokens), if reported
+            first_token_ms: Time to the first streamed text in milliseconds
+            error: Whether the request failed
+        """
+        with self._lock:
+            entry = self._models.get(model)
+            if entry is None:
+                entry = self._models[model] = {
+                    'requests': 0, 'errors': 0, 'total_ms': 0.0, 'latencies': deque(maxlen=self.window),
+                    'streams': 0, 'first_token_ms': 0.0,
+                    'usage_reported': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'usage_ms': 0.0
+                }
+
+            entry['requests'] += 1
+            if error:
+                entry['errors'] += 1
+                return
+
+            entry['total_ms'] += elapsed_ms
+            entry['latencies'].append(elapsed_ms)
+            if first_token_ms is not None:
+                entry['streams'] += 1
+                entry['first_token_ms'] += first_token_ms
+            if usage is not None:
+                entry['usage_reported'] += 1
+                entry['prompt_tokens'] += getattr(usage, 'prompt_tokens', 0) or 0
+                entry['completion_tokens'] += getattr(usage, 'completion_tokens', 0) or 0
+                entry['usage_ms'] += elapsed_ms
+
+    @staticmethod
+    def _percentile(ordered, fraction: float) -> float:
+        return round(ordered[min(int(fraction * len(ordered)), len(ordered) - 1)], 3) if ordered else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-model latency (ms) and token summaries"""
+        with self._lock:
+            models = {model: dict(entry, latencies=sorted(entry['latencies']))
+                      for model, entry in self._models.items()}
+
+        stats = {}
+        for model, entry in models.items():
+            completed = entry['requests'] - entry['errors']
+            reported = entry['usage_reported']
+            stats[model] = {
+                'requests': entry['requests'],
+                'errors': entry['errors'],
+                'avg_ms': round(entry['total_ms'] / completed, 3) if completed else 0.0,
+                'p50_ms': self._percentile(entry['latencies'], 0.5),
+                'p95_ms': self._percentile(entry['latencies'], 0.95),
+                'avg_first_token_ms': round(entry['first_token_ms'] / entry['streams'], 3) if entry['streams'] else None,
+                'prompt_tokens': entry['prompt_tokens'],
+                'completion_tokens': entry['completion_tokens'],
+                'avg_completion_tokens': round(entry['completion_tokens'] / reported, 1) if reported else None,
+                'completion_tokens_per_s': (round(entry['completion_tokens'] / (entry['usage_ms'] / 1000), 1)
+                                            if entry['usage_ms'] else None)
+            }
+        return stats
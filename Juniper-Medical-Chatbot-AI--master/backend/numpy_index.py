@@ -0,0 +1,637 @@
+"""
+NumPy Index Module
+In-process exact cosine search over a memory-mapped embedding matrix
+"""
+
+from typing import List, Dict, Any, Optional
+import numpy as np
+import shutil
+import json
+import time
+import uuid
+import os
+import logging
+
+from .filters import PARTITION_FIELD
+from .index_generation import CollectionGeneration
+from .metrics import StageTimings
+from .snapshot import IndexSnapshot
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rows scored per block when the matrix is stored as float16
+SCORE_BLOCK_ROWS = 65536
+
+# A version published from a snapshot keeps the snapshot file as-is
+SNAPSHOT_FILENAME = 'index.snap'
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize the rows of a matrix so dot products equal cosine similarity
+
+    Args:
+        matrix: Embedding matrix
+
+    Returns:
+        Row-normalized float32 matrix
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int):
+    """
+    Select the k highest scores per row using argpartition
+
+    Args:
+        scores: Score matrix, one row per query
+        k: Number of results per row
+
+    Returns:
+        Tuple of (indices, scores), both sorted by descending score
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(scores.dtype)
+
+    # argpartition is O(n); only the k survivors are fully sorted
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1)
+
+    return (
+        np.take_along_axis(candidates, order, axis=1),
+        np.take_along_axis(candidate_scores, order, axis=1)
+    )
+
+
+def partition_key(metadata: Optional[Dict[str, Any]], field: str = PARTITION_FIELD) -> str:
+    """Partition a document's rows are grouped under ('' when the field is missing)"""
+    value = (metadata or {}).get(field)
+    return '' if value is None else str(value)
+
+
+def group_by_partition(embeddings: np.ndarray, ids: List[str], documents: List[str],
+                       metadatas: List[Dict[str, Any]], field: str = PARTITION_FIELD):
+    """
+    Order rows by partition so each partition is one contiguous slice
+
+    Args:
+        embeddings: Embedding matrix, one row per document
+        ids: Document IDs
+        documents: Document texts
+        metadatas: Document metadata
+        field: Metadata field to partition by
+
+    Returns:
+        Tuple of (embeddings, ids, documents, metadatas, {partition: [start, end]})
+    """
+    keys = [partition_key(metadata, field) for metadata in metadatas]
+    order = sorted(range(len(ids)), key=keys.__getitem__)
+    if order != list(range(len(ids))):
+        embeddings = embeddings[order]
+        ids = [ids[row] for row in order]
+        documents = [documents[row] for row in order]
+        metadatas = [metadatas[row] for row in order]
+        keys = [keys[row] for row in order]
+
+    partitions = {}
+    for row, key in enumerate(keys):
+        partitions.setdefault(key, [row, row])[1] = row + 1
+    return embeddings, list(ids), list(documents), list(metadatas), partitions
+
+
+class MappedStrings:
+    """
+    Read-only sequence of strings stored as one memory-mapped UTF-8 blob
+    plus an offsets array, so every worker shares the same page-cache pages
+    instead of holding its own decoded copy of the corpus.
+    """
+
+    def __init__(self, prefix: str, as_json: bool = False, mmap: bool = True):
+        """
+        Open a string blob
+
+        Args:
+            prefix: Path prefix of the '<prefix>.bin' / '<prefix>.offsets.npy' pair
+            as_json: Decode every item as JSON (used for metadata)
+            mmap: Memory-map the blob instead of reading it into RAM
+        """
+        self.as_json = as_json
+        self._offsets = np.load(f"{prefix}.offsets.npy", mmap_mode='r' if mmap else None)
+
+        blob_path = f"{prefix}.bin"
+        if os.path.getsize(blob_path) == 0:
+            self._blob = np.empty(0, dtype=np.uint8)
+        elif mmap:
+            self._blob = np.memmap(blob_path, dtype=np.uint8, mode='r')
+        else:
+            self._blob = np.fromfile(blob_path, dtype=np.uint8)
+
+    @classmethod
+    def from_arrays(cls, offsets: np.ndarray, blob: np.ndarray, as_json: bool = False) -> 'MappedStrings':
+        """
+        Wrap an offsets array and UTF-8 blob that are already mapped (e.g. snapshot sections)
+
+        Args:
+            offsets: int64 offsets, one more than the number of strings
+            blob: uint8 blob
+            as_json: Decode every item as JSON
+        """
+        strings = cls.__new__(cls)
+        strings.as_json = as_json
+        strings._offsets = offsets
+        strings._blob = blob
+        return strings
+
+    def __len__(self) -> int:
+        return max(len(self._offsets) - 1, 0)
+
+    def __getitem__(self, idx: int):
+        start, end = int(self._offsets[idx]), int(self._offsets[idx + 1])
+        value = self._blob[start:end].tobytes().decode('utf-8')
+        return json.loads(value) if self.as_json else value
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    @staticmethod
+    def write(prefix: str, values: List[Any], as_json: bool = False):
+        """
+        Write a string blob
+
+        Args:
+            prefix: Path prefix of the blob/offsets pair
+            values: Strings (or JSON-serializable values when as_json is set)
+            as_json: Encode every item as JSON
+        """
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        with open(f"{prefix}.bin", 'wb') as f:
+            for idx, value in enumerate(values):
+                data = (json.dumps(value) if as_json else value).encode('utf-8')
+                f.write(data)
+                offsets[idx + 1] = offsets[idx] + len(data)
+        np.save(f"{prefix}.offsets.npy", offsets)
+
+
+class NumpyIndex:
+    """
+    Exact cosine top-k over a normalized embedding matrix.
+
+    Each published version of the index is a directory under ``versions/``
+    holding ``embeddings.npy`` plus memory-mapped id/text/metadata blobs;
+    the ``current`` symlink is swapped atomically to publish a new version.
+    Every file is opened read-only and memory-mapped, so all gunicorn
+    workers share one copy through the OS page cache and a restarted worker
+    maps the existing files instead of reloading anything from ChromaDB.
+    For small corpora one matrix-vector product is far cheaper than an HNSW
+    lookup through ChromaDB's SQLite/persistence layers.
+
+    Rows are published grouped by the partition field (category), with the
+    row range of every partition in ``partitions.json``, so a category
+    filter scores one contiguous slice of the matrix instead of all of it.
+    """
+
+    name = 'numpy'
+
+    # Published versions kept on disk (current + previous for in-flight readers)
+    KEEP_VERSIONS = 2
+
+    def __init__(self, index_path: str, collection_name: str, dtype: str = 'float32',
+                 mmap: bool = True, timings: Optional[StageTimings] = None,
+                 partition_field: str = PARTITION_FIELD):
+        """
+        Initialize NumPy index
+
+        Args:
+            index_path: Directory holding the index files
+            collection_name: Name of the collection (used for the generation marker)
+            dtype: Storage dtype for embeddings ('float32' or 'float16')
+            mmap: Memory-map the index files instead of reading them into RAM
+            timings: Optional shared stage timing table
+            partition_field: Metadata field rows are grouped by
+        """
+        if dtype not in ('float32', 'float16'):
+            raise ValueError(f"Unsupported index dtype: {dtype}")
+
+        self.index_path = index_path
+        self.collection_name = collection_name
+        self.dtype = np.dtype(dtype)
+        self.mmap = mmap
+        self.timings = timings or StageTimings()
+        self.partition_field = partition_field
+
+        self.current_path = os.path.join(index_path, 'current')
+        self.versions_path = os.path.join(index_path, 'versions')
+        self.generation = CollectionGeneration(index_path, collection_name)
+        self.reloads = 0
+
+        self._pending = []
+        self._pending_deletes = set()
+        os.makedirs(self.versions_path, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Memory-map the currently published index version"""
+        self._generation = self.generation.current()
+
+        if not os.path.exists(self.current_path):
+            self._embeddings = np.empty((0, 0), dtype=self.dtype)
+            self.ids = []
+            self.documents = []
+            self.metadatas = []
+            self.manifest = {}
+            self._row_by_id = None
+            self._partitions = {}
+            self._value_rows = {}
+            logger.info(f"Created new NumPy index: {self.index_path}")
+            return
+
+        # Resolve the symlink once so a concurrent publish can't mix versions
+        version_dir = os.path.realpath(self.current_path)
+        mmap_mode = 'r' if self.mmap else None
+
+        self._row_by_id = None
+        self._value_rows = {}
+
+        snapshot_path = os.path.join(version_dir, SNAPSHOT_FILENAME)
+        if os.path.exists(snapshot_path):
+            # Checked when it was imported; published versions are immutable
+            self._load_snapshot(IndexSnapshot(snapshot_path, verify=False))
+            logger.info(f"Mapped NumPy index snapshot version {os.path.basename(version_dir)} "
+                        f"with {len(self.ids)} documents ({self._embeddings.dtype})")
+            return
+
+        with open(os.path.join(version_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+        self._embeddings = np.load(os.path.join(version_dir, 'embeddings.npy'), mmap_mode=mmap_mode)
+        self.ids = MappedStrings(os.path.join(version_dir, 'ids'), mmap=self.mmap)
+        self.documents = MappedStrings(os.path.join(version_dir, 'documents'), mmap=self.mmap)
+        self.metadatas = MappedStrings(os.path.join(version_dir, 'metadatas'), as_json=True, mmap=self.mmap)
+
+        partitions_path = os.path.join(version_dir, 'partitions.json')
+        if os.path.exists(partitions_path):
+            with open(partitions_path, 'r', encoding='utf-8') as f:
+                self._partitions = {value: slice(start, end) for value, (start, end) in json.load(f).items()}
+        else:
+            # Versions published before partitioning: fall back to scanned row lists
+            self._partitions = None
+
+        logger.info(f"Mapped NumPy index version {os.path.basename(version_dir)} "
+                    f"with {len(self.ids)} documents ({self._embeddings.dtype})")
+
+    def _load_snapshot(self, snapshot: IndexSnapshot):
+        """Map every index array from the sections of a snapshot file"""
+        header = snapshot.header
+        self.manifest = {key: value for key, value in header.items() if key not in ('sections', 'partitions')}
+        self.manifest.update(snapshot.fingerprint, snapshot_checksum=snapshot.checksum)
+
+        self._embeddings = snapshot.embeddings if self.mmap else np.array(snapshot.embeddings)
+        self.ids = MappedStrings.from_arrays(*snapshot.strings('ids'))
+        self.documents = MappedStrings.from_arrays(*snapshot.strings('documents'))
+        self.metadatas = MappedStrings.from_arrays(*snapshot.strings('metadatas'), as_json=True)
+
+        partitions = header.get('partitions')
+        self._partitions = None if partitions is None else \
+            {value: slice(start, end) for value, (start, end) in partitions.items()}
+
+    def _refresh(self):
+        """Re-map the index if another process published a new version"""
+        if self.generation.current() != self._generation:
+            self._load()
+            self.reloads += 1
+
+    def add(self, ids: List[str], embeddings: np.ndarray, texts: List[str], metadatas: List[Dict[str, Any]]):
+        """
+        Stage one batch of embedded documents (written on flush; a staged
+        id that already exists replaces the stored document)
+
+        Args:
+            ids: Document IDs
+            embeddings: Embedding matrix, one row per document
+            texts: Document texts
+            metadatas: Document metadata
+        """
+        self._pending.append((list(ids), normalize_rows(embeddings), list(texts), list(metadatas)))
+
+    # Staged rows always replace existing ones on flush
+    upsert = add
+
+    def delete(self, ids: List[str]):
+        """
+        Stage documents for removal (applied on flush)
+
+        Args:
+            ids: Document IDs
+        """
+        self._pending_deletes.update(ids)
+
+    def flush(self, manifest: Optional[Dict[str, Any]] = None):
+        """
+        Write staged changes as a new version and publish it
+
+        Args:
+            manifest: Extra manifest fields (e.g. source generation)
+        """
+        if not self._pending and not self._pending_deletes:
+            return
+
+        # Latest staged copy of every id wins
+        staged = {}
+        for batch, (batch_ids, _, _, _) in enumerate(self._pending):
+            for row, doc_id in enumerate(batch_ids):
+                staged[doc_id] = (batch, row)
+
+        dropped = self._pending_deletes | staged.keys()
+        keep = [row for row, doc_id in enumerate(self.ids) if doc_id not in dropped]
+
+        ids = [self.ids[row] for row in keep]
+        documents = [self.documents[row] for row in keep]
+        metadatas = [self.metadatas[row] for row in keep]
+        blocks = [np.asarray(self._embeddings[keep], dtype=np.float32)] if keep else []
+
+        for batch, (batch_ids, batch_embeddings, batch_texts, batch_metadatas) in enumerate(self._pending):
+            rows = [row for row, doc_id in enumerate(batch_ids) if staged[doc_id] == (batch, row)]
+            ids.extend(batch_ids[row] for row in rows)
+            documents.extend(batch_texts[row] for row in rows)
+            metadatas.extend(batch_metadatas[row] for row in rows)
+            blocks.append(batch_embeddings[rows])
+
+        self._pending = []
+        self._pending_deletes = set()
+        embeddings = np.concatenate(blocks) if blocks else np.empty((0, 0), dtype=np.float32)
+        self.publish(embeddings, ids, documents, metadatas, manifest)
+
+    def publish(self, embeddings: np.ndarray, ids: List[str], documents: List[str],
+                metadatas: List[Dict[str, Any]], manifest: Optional[Dict[str, Any]] = None):
+        """
+        Write a complete index version and atomically make it current
+
+        Args:
+            embeddings: Embedding matrix, one row per document
+            ids: Document IDs
+            documents: Document texts
+            metadatas: Document metadata
+            manifest: Extra manifest fields (e.g. source generation)
+        """
+        embeddings = normalize_rows(embeddings).astype(self.dtype) if len(ids) else \
+            np.empty((0, 0), dtype=self.dtype)
+        embeddings, ids, documents, metadatas, partitions = group_by_partition(
+            embeddings, ids, documents, metadatas, self.partition_field)
+
+        version = uuid.uuid4().hex
+        version_dir = os.path.join(self.versions_path, version)
+        os.makedirs(version_dir)
+
+        np.save(os.path.join(version_dir, 'embeddings.npy'), embeddings)
+        MappedStrings.write(os.path.join(version_dir, 'ids'), ids)
+        MappedStrings.write(os.path.join(version_dir, 'documents'), documents)
+        MappedStrings.write(os.path.join(version_dir, 'metadatas'), metadatas, as_json=True)
+        with open(os.path.join(version_dir, 'partitions.json'), 'w', encoding='utf-8') as f:
+            json.dump(partitions, f)
+
+        with open(os.path.join(version_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(dict(manifest or {}, count=len(ids), dtype=str(embeddings.dtype),
+                           dimension=int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+                           created_at=time.time()), f)
+
+        self._activate(version)
+        logger.info(f"Published NumPy index version {version} with {len(ids)} documents")
+
+    def _activate(self, version: str):
+        """Freeze a written version directory and atomically make it current"""
+        version_dir = os.path.join(self.versions_path, version)
+
+        # Published versions are immutable; make that explicit for every worker
+        for filename in os.listdir(version_dir):
+            os.chmod(os.path.join(version_dir, filename), 0o444)
+
+        tmp_link = f"{self.current_path}.{os.getpid()}.tmp"
+        os.symlink(os.path.join('versions', version), tmp_link)
+        os.replace(tmp_link, self.current_path)
+
+        self.generation.bump()
+        self._load()
+        self._prune_versions(keep=version)
+
+    def import_snapshot(self, snapshot: IndexSnapshot):
+        """
+        Publish a snapshot file as the current version (copied once, then memory-mapped as-is)
+
+        Args:
+            snapshot: Opened (and verified) snapshot
+        """
+        self._pending = []
+        self._pending_deletes = set()
+
+        version = uuid.uuid4().hex
+        version_dir = os.path.join(self.versions_path, version)
+        os.makedirs(version_dir)
+        shutil.copyfile(snapshot.path, os.path.join(version_dir, SNAPSHOT_FILENAME))
+
+        self._activate(version)
+        logger.info(f"Published NumPy index version {version} from snapshot {snapshot.path} "
+                    f"with {len(self.ids)} documents")
+
+    def export(self):
+        """
+        Read back every stored document with its embedding
+
+        Returns:
+            Tuple of (ids, embeddings, documents, metadatas)
+        """
+        self._refresh()
+        return (list(self.ids), np.asarray(self._embeddings, dtype=np.float32),
+                list(self.documents), list(self.metadatas))
+
+    def _prune_versions(self, keep: str):
+        """Remove old versions (open memory maps stay valid after unlink)"""
+        versions = sorted(
+            (entry for entry in os.scandir(self.versions_path) if entry.is_dir()),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True
+        )
+        stale = [entry for entry in versions if entry.name != keep][self.KEEP_VERSIONS - 1:]
+        for entry in stale:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    def _rows_for(self, field: str, value: Any):
+        """Rows whose metadata field equals value (a slice for the partition field)"""
+        if field == self.partition_field and self._partitions is not None:
+            return self._partitions.get(str(value), slice(0, 0))
+
+        key = (field, value)
+        rows = self._value_rows.get(key)
+        if rows is None:
+            rows = np.array([row for row, metadata in enumerate(self.metadatas)
+                             if metadata.get(field) == value], dtype=np.int64)
+            self._value_rows[key] = rows
+        return rows
+
+    def _candidate_rows(self, filters: Dict[str, List[Any]]):
+        """
+        Rows allowed by a normalized filter
+
+        Returns:
+            A slice when the filter selects a single partition, else a sorted row array
+        """
+        selected = None
+        for field, values in filters.items():
+            parts = [self._rows_for(field, value) for value in values]
+            if len(filters) == 1 and len(parts) == 1 and isinstance(parts[0], slice):
+                return parts[0]
+
+            rows = np.unique(np.concatenate([
+                np.arange(part.start, part.stop) if isinstance(part, slice) else part for part in parts
+            ]))
+            selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+        return selected
+
+    def _scores(self, query_embeddings: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every query against every row of matrix"""
+        if matrix.dtype == np.float32:
+            return query_embeddings @ matrix.T
+
+        # float16 storage: upcast block by block to keep float32 accuracy and bounded memory
+        scores = np.empty((query_embeddings.shape[0], matrix.shape[0]), dtype=np.float32)
+        for start in range(0, matrix.shape[0], SCORE_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            scores[:, start:start + block.shape[0]] = query_embeddings @ block.T
+        return scores
+
+    def query(self, query_embeddings: np.ndarray, top_k: int,
+              filters: Optional[Dict[str, List[Any]]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Exact cosine top-k search
+
+        Args:
+            query_embeddings: Query embedding matrix, one row per query
+            top_k: Number of top results to return per query
+            filters: Optional normalized metadata filter (only matching rows are scored)
+
+        Returns:
+            One formatted result list per query embedding
+        """
+        with self.timings.time('collection'):
+            self._refresh()
+
+        queries = normalize_rows(query_embeddings)
+        if not self.ids:
+            return [[] for _ in range(queries.shape[0])]
+
+        if filters:
+            rows = self._candidate_rows(filters)
+            if isinstance(rows, slice):
+                matrix = self._embeddings[rows]  # view, no copy
+                rows = np.arange(rows.start, rows.stop)
+            else:
+                matrix = self._embeddings[rows]
+            if not len(rows):
+                return [[] for _ in range(queries.shape[0])]
+
+            local, scores = top_k_indices(self._scores(queries, matrix), top_k)
+            indices = rows[local]
+        else:
+            indices, scores = top_k_indices(self._scores(queries, self._embeddings), top_k)
+
+        formatted = []
+        for row in range(queries.shape[0]):
+            formatted.append([
+                {
+                    'id': self.ids[idx],
+                    'document': self.documents[idx],
+                    'metadata': self.metadatas[idx],
+                    'distance': 1 - float(score),  # Same cosine distance convention as Chroma
+                    'similarity': float(score)
+                }
+                for idx, score in zip(indices[row].tolist(), scores[row].tolist())
+            ])
+
+        return formatted
+
+    def get(self, ids: List[str], include_embeddings: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch stored documents by id
+
+        Args:
+            ids: Document IDs
+            include_embeddings: Also return each document's (normalized) embedding
+
+        Returns:
+            Mapping of id to {'id', 'document', 'metadata'[, 'embedding']}
+        """
+        self._refresh()
+        if self._row_by_id is None:
+            self._row_by_id = {doc_id: row for row, doc_id in enumerate(self.ids)}
+
+        found = {}
+        for doc_id in ids:
+            row = self._row_by_id.get(doc_id)
+            if row is None:
+                continue
+            found[doc_id] = {
+                'id': doc_id,
+                'document': self.documents[row],
+                'metadata': self.metadatas[row]
+            }
+            if include_embeddings:
+                found[doc_id]['embedding'] = np.asarray(self._embeddings[row], dtype=np.float32)
+        return found
+
+    def get_metadata(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Read back the metadata of every stored document
+
+        Returns:
+            Mapping of id to metadata
+        """
+        self._refresh()
+        return dict(zip(self.ids, self.metadatas))
+
+    def count(self) -> int:
+        """Get number of documents in the index"""
+        self._refresh()
+        return len(self.ids)
+
+    def delete_collection(self):
+        """Unpublish the index (use with caution)"""
+        if os.path.lexists(self.current_path):
+            os.remove(self.current_path)
+        shutil.rmtree(self.versions_path, ignore_errors=True)
+        os.makedirs(self.versions_path, exist_ok=True)
+        self._pending = []
+        self._pending_deletes = set()
+        self.generation.bump()
+        self._load()
+        logger.info(f"Deleted NumPy index: {self.index_path}")
+
+    def reset(self):
+        """Reset index (delete and start empty)"""
+        self.delete_collection()
+
+    def after_fork(self):
+        """Read-only memory maps are fork-safe and stay shared; nothing to re-open"""
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics about the index"""
+        return {
+            'backend': self.name,
+            'generation': self.generation.token(),
+            'dtype': str(self._embeddings.dtype),
+            'memory_mapped': isinstance(self._embeddings, np.memmap),
+            'version': os.path.basename(os.path.realpath(self.current_path)) if self.manifest else '',
+            'source_generation': self.manifest.get('source_generation', ''),
+            'snapshot': self.manifest.get('snapshot_checksum', '')[:12],
+            'partitions': len(self._partitions) if self._partitions is not None else None,
+            'reloads': self.reloads
+        }
@@ -0,0 +1,159 @@
+"""
+ONNX Encoder Module
+CPU embedding backend running an exported (optionally int8-quantized) ONNX
+copy of the sentence-transformer with onnxruntime + tokenizers, no torch
+
+Export the model once with: python export_onnx.py
+"""
+
+from typing import List, Dict, Any, Optional
+import numpy as np
+import json
+import os
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ONNX_FP32_FILE = 'model.onnx'
+ONNX_INT8_FILE = 'model.int8.onnx'
+ENCODER_CONFIG_FILE = 'encoder.json'
+TOKENIZER_FILE = 'tokenizer.json'
+
+
+class OnnxEncoder:
+    """
+    Sentence embedding with onnxruntime: tokenize, run the transformer,
+    mean-pool over the attention mask and (optionally) L2-normalize,
+    mirroring the sentence-transformers Pooling/Normalize modules
+    """
+
+    backend = 'onnx'
+
+    def __init__(self, model_dir: str, quantized: bool = True, num_threads: int = 0,
+                 expected_model: Optional[str] = None):
+        """
+        Load an exported ONNX encoder
+
+        Args:
+            model_dir: Directory written by export_onnx.py
+            quantized: Use the int8 model instead of the float32 one
+            num_threads: onnxruntime intra-op threads (0 = library default)
+            expected_model: Refuse to load an export of a different model
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, ENCODER_CONFIG_FILE), 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+
+        self.model_name = self.config['model_name']
+        if expected_model and expected_model != self.model_name:
+            raise ValueError(f"ONNX export in {model_dir} is for {self.model_name}, expected {expected_model}")
+
+        self.dimension = self.config['dimension']
+        self.normalize = self.config.get('normalize', True)
+        self.quantized = quantized
+
+        model_file = ONNX_INT8_FILE if quantized else ONNX_FP32_FILE
+        model_path = os.path.join(model_dir, model_file)
+        logger.info(f"Loading ONNX embedding model: {model_path}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+        self._input_names = {node.name for node in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.config['max_seq_length'])
+        self.tokenizer.enable_padding(pad_id=self.config.get('pad_id', 0), pad_token=self.config.get('pad_token', '[PAD]'))
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        inputs = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self._input_names:
+            inputs['token_type_ids'] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # Mean pooling over real (non-padding) tokens
+        mask = attention_mask[..., np.newaxis].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+        return pooled.astype(np.float32)
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Encode texts into embeddings
+
+        Args:
+            texts: Texts to encode
+            batch_size: Texts per inference call
+            show_progress_bar: Accepted for interface compatibility
+
+        Returns:
+            Float32 embedding matrix, one row per text
+        """
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        # Sorting by length keeps padding (and wasted compute) per batch small
+        order = np.argsort([len(text) for text in texts])
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            embeddings[rows] = self._encode_batch([texts[i] for i in rows])
+
+        return embeddings
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get encoder statistics"""
+        return {
+            'backend': self.backend,
+            'model': self.model_name,
+            'quantized': self.quantized
+        }
+
+
+def check_parity(reference, candidate, texts: List[str], top_k: int = 5) -> Dict[str, Any]:
+    """
+    Compare a candidate encoder against the reference model
+
+    Args:
+        reference: Reference encoder (full-precision sentence-transformers)
+        candidate: Encoder under test
+        texts: Texts to embed with both encoders
+        top_k: Neighbours compared for retrieval agreement
+
+    Returns:
+        Cosine agreement statistics and top-k neighbour overlap
+    """
+    ref = reference.encode(texts)
+    cand = candidate.encode(texts)
+
+    ref = ref / np.clip(np.linalg.norm(ref, axis=1, keepdims=True), 1e-12, None)
+    cand = cand / np.clip(np.linalg.norm(cand, axis=1, keepdims=True), 1e-12, None)
+    cosine = (ref * cand).sum(axis=1)
+
+    # Do both encoders rank the same neighbours for every text?
+    k = min(top_k + 1, len(texts))
+    ref_top = np.argsort(-(ref @ ref.T), axis=1)[:, :k]
+    cand_top = np.argsort(-(cand @ cand.T), axis=1)[:, :k]
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(ref_top.tolist(), cand_top.tolist())]
+
+    return {
+        'texts': len(texts),
+        'cosine_mean': float(cosine.mean()),
+        'cosine_min': float(cosine.min()),
+        'topk_overlap': float(np.mean(overlap))
+    }
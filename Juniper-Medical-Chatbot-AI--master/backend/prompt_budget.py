@@ -0,0 +1,287 @@
+"""
+Prompt Budget Module
+Counts prompt tokens with a local tokenizer and trims a RAG prompt to a
+per-request budget: oldest history first, then the lowest-scoring context
+passages, then passage tails
+"""
+
+from typing import List, Dict, Any, Callable, Optional, Tuple
+import threading
+import os
+import logging
+
+from .retrieval_policy import CHARS_PER_TOKEN, estimate_tokens
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Chat-template tokens around every message (role header and end-of-turn markers)
+MESSAGE_OVERHEAD_TOKENS = 5
+
+# Tokens of the blank line joining two context passages
+SEPARATOR_TOKENS = 1
+
+# Share of the budget held back when counts are estimated rather than tokenized
+# (Roman Urdu and medical terms run well under 4 characters per Llama 3 token)
+ESTIMATE_SAFETY_MARGIN = 0.2
+
+
+class TokenCounter:
+    """
+    Token counts from a local Hugging Face tokenizer (tokenizer.json),
+    via the tokenizers library already used by the ONNX encoder
+    """
+
+    def __init__(self, tokenizer, name: str):
+        """
+        Wrap a loaded tokenizer
+
+        Args:
+            tokenizer: tokenizers.Tokenizer
+            name: Model name or path it was loaded from
+        """
+        self.tokenizer = tokenizer
+        self.name = name
+
+        # Prompts are counted whole, never cut to the embedding model's input size
+        self.tokenizer.no_truncation()
+        self.tokenizer.no_padding()
+
+    def count(self, text: str) -> int:
+        """Number of tokens in a text"""
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids) if text else 0
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Cut a text to at most max_tokens tokens, at a word boundary
+
+        Args:
+            text: Text to cut
+            max_tokens: Token limit
+
+        Returns:
+            The text's head
+        """
+        offsets = self.tokenizer.encode(text, add_special_tokens=False).offsets
+        if len(offsets) <= max_tokens:
+            return text
+        if max_tokens <= 0:
+            return ''
+
+        head = text[:offsets[max_tokens - 1][1]]
+        cut = head.rfind(' ')
+        return (head[:cut] if cut > 0 else head).rstrip()
+
+
+class EstimatedTokenCounter:
+    """Fallback token counts from the characters-per-token estimate"""
+
+    name = 'estimate'
+
+    def count(self, text: str) -> int:
+        """Approximate number of tokens in a text"""
+        return estimate_tokens(text)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut a text to approximately max_tokens tokens, at a word boundary"""
+        limit = max_tokens * CHARS_PER_TOKEN
+        if len(text) <= limit:
+            return text
+
+        head = text[:max(limit, 0)]
+        cut = head.rfind(' ')
+        return (head[:cut] if cut > 0 else head).rstrip()
+
+
+def load_token_counter(name_or_path: str):
+    """
+    Load a local tokenizer for prompt token counting
+
+    Args:
+        name_or_path: tokenizer.json file, a directory holding one (e.g. the
+            ONNX export), or a Hugging Face model id; empty uses the estimate
+
+    Returns:
+        TokenCounter, or EstimatedTokenCounter if the tokenizer can't be loaded
+    """
+    if not name_or_path:
+        return EstimatedTokenCounter()
+
+    try:
+        from tokenizers import Tokenizer
+
+        path = os.path.join(name_or_path, 'tokenizer.json') if os.path.isdir(name_or_path) else name_or_path
+        if os.path.isfile(path):
+            tokenizer = Tokenizer.from_file(path)
+        else:
+            tokenizer = Tokenizer.from_pretrained(name_or_path)
+
+        logger.info(f"Loaded prompt tokenizer: {name_or_path}")
+        return TokenCounter(tokenizer, name_or_path)
+
+    except Exception as e:
+        logger.warning(f"Could not load prompt tokenizer {name_or_path} ({e}); "
+                       f"falling back to ~{CHARS_PER_TOKEN} characters per token")
+        return EstimatedTokenCounter()
+
+
+def count_message_tokens(counter, messages: List[Dict[str, str]]) -> int:
+    """
+    Prompt tokens of a chat message list
+
+    Args:
+        counter: TokenCounter or EstimatedTokenCounter
+        messages: Messages with 'role' and 'content'
+
+    Returns:
+        Token count including per-message template overhead
+    """
+    return sum(counter.count(message['content']) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+class PromptBudget:
+    """
+    Keeps each RAG prompt within max_prompt_tokens.
+
+    The prompt is system message + history + context passages + question.
+    When it is over budget, whole exchanges are dropped from the oldest
+    history, then whole passages from the lowest-scoring up (the best
+    passage always stays), then passage tails are cut, again lowest-scoring
+    first, down to min_passage_tokens. The system message and the question
+    are never trimmed; if they alone exceed the budget the prompt is sent
+    over budget and the report says so.
+
+    Counts are only as good as the tokenizer: without the LLM's own
+    tokenizer the characters-per-token estimate is used and trimming aims
+    safety_margin below the budget.
+    """
+
+    def __init__(self, counter=None, max_prompt_tokens: int = 4096, min_passage_tokens: int = 64,
+                 safety_margin: Optional[float] = None):
+        """
+        Initialize prompt budget
+
+        Args:
+            counter: Token counter (defaults to the characters-per-token estimate)
+            max_prompt_tokens: Prompt token budget per request (0 disables trimming)
+            min_passage_tokens: Passage tails are never cut shorter than this
+            safety_margin: Share of the budget left unused to absorb counting error
+                (defaults to ESTIMATE_SAFETY_MARGIN with the estimate, 0 with a tokenizer)
+        """
+        self.counter = counter or EstimatedTokenCounter()
+        self.max_prompt_tokens = max_prompt_tokens
+        self.min_passage_tokens = min_passage_tokens
+        if safety_margin is None:
+            safety_margin = ESTIMATE_SAFETY_MARGIN if isinstance(self.counter, EstimatedTokenCounter) else 0.0
+        self.safety_margin = safety_margin
+
+        # Trimming target: the budget less the margin
+        self.limit = int(max_prompt_tokens * (1 - safety_margin))
+
+        # Running totals for get_stats()
+        self._lock = threading.Lock()
+        self._totals = {'requests': 0, 'prompt_tokens': 0, 'trimmed_requests': 0, 'over_budget': 0,
+                        'dropped_history': 0, 'dropped_passages': 0, 'truncated_passages': 0}
+
+    def count(self, text: str) -> int:
+        """Tokens in a text, with the budget's tokenizer"""
+        return self.counter.count(text)
+
+    def fit(self, build: Callable[[List[Dict[str, str]], List[Dict[str, Any]]], List[Dict[str, str]]],
+            history: List[Dict[str, str]],
+            passages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Trim history and passages until the prompt fits the budget
+
+        Args:
+            build: Builds the chat messages from (history, passages)
+            history: Conversation history that would be sent, oldest first
+            passages: Context documents in rank order, with 'document' and 'similarity'
+
+        Returns:
+            Tuple of (kept history, kept passages in rank order, budget report).
+            Cut passages are copies; the inputs are never modified.
+        """
+        history = list(history)
+        passages = list(passages)
+
+        fixed = count_message_tokens(self.counter, build([], []))
+        history_tokens = [self.count(message['content']) + MESSAGE_OVERHEAD_TOKENS for message in history]
+        passage_tokens = [self.count(doc.get('document', '').strip()) + SEPARATOR_TOKENS for doc in passages]
+        total = fixed + sum(history_tokens) + sum(passage_tokens)
+
+        limit = self.limit
+        report = {'budget': self.max_prompt_tokens, 'trim_to': limit, 'tokenizer': self.counter.name,
+                  'tokens_before': total, 'dropped_history': 0, 'dropped_passages': 0,
+                  'truncated_passages': 0}
+
+        if self.max_prompt_tokens > 0:
+            # 1. Oldest history first, a whole exchange at a time
+            while total > limit and history:
+                drop = min(2, len(history))
+                total -= sum(history_tokens[:drop])
+                del history[:drop], history_tokens[:drop]
+                report['dropped_history'] += drop
+
+            # 2. Lowest-scoring passages (the best one always stays)
+            while total > limit and len(passages) > 1:
+                worst = min(range(len(passages)), key=lambda idx: passages[idx].get('similarity', 0.0))
+                total -= passage_tokens.pop(worst)
+                passages.pop(worst)
+                report['dropped_passages'] += 1
+
+            # 3. Passage tails, lowest-scoring first
+            order = sorted(range(len(passages)), key=lambda idx: passages[idx].get('similarity', 0.0))
+            for idx in order:
+                if total <= limit:
+                    break
+
+                keep = max(passage_tokens[idx] - (total - limit), self.min_passage_tokens)
+                if keep >= passage_tokens[idx]:
+                    continue
+
+                text = self.counter.truncate(passages[idx].get('document', '').strip(), keep - SEPARATOR_TOKENS)
+                passages[idx] = dict(passages[idx], document=text, truncated=True)
+                tokens = self.count(text) + SEPARATOR_TOKENS
+                total -= passage_tokens[idx] - tokens
+                passage_tokens[idx] = tokens
+                report['truncated_passages'] += 1
+
+        # Exact count of what is actually sent
+        prompt_tokens = count_message_tokens(self.counter, build(history, passages))
+        report.update(
+            prompt_tokens=prompt_tokens,
+            history_tokens=sum(history_tokens),
+            context_tokens=sum(passage_tokens),
+            over_budget=0 < self.max_prompt_tokens < prompt_tokens
+        )
+
+        trimmed = report['dropped_history'] or report['dropped_passages'] or report['truncated_passages']
+        with self._lock:
+            self._totals['requests'] += 1
+            self._totals['prompt_tokens'] += prompt_tokens
+            self._totals['trimmed_requests'] += 1 if trimmed else 0
+            self._totals['over_budget'] += 1 if report['over_budget'] else 0
+            for key in ('dropped_history', 'dropped_passages', 'truncated_passages'):
+                self._totals[key] += report[key]
+
+        if trimmed:
+            logger.info(f"Prompt trimmed from {report['tokens_before']} to {prompt_tokens} tokens "
+                        f"(history -{report['dropped_history']}, passages -{report['dropped_passages']}, "
+                        f"{report['truncated_passages']} cut)")
+        return history, passages, report
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get budget settings and per-request averages"""
+        with self._lock:
+            totals = dict(self._totals)
+
+        requests = totals.pop('requests')
+        return {
+            'tokenizer': self.counter.name,
+            'max_prompt_tokens': self.max_prompt_tokens,
+            'safety_margin': self.safety_margin,
+            'requests': requests,
+            'avg_prompt_tokens': round(totals.pop('prompt_tokens') / requests, 1) if requests else 0.0,
+            **totals
+        }
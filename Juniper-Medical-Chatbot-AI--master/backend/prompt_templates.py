@@ -0,0 +1,157 @@
+"""
+Prompt Templates Module
+Loads the versioned RAG prompt templates (prompts/<version>/) once and
+precompiles them per language
+"""
+
+from string import Formatter
+from typing import Dict, Any, List, Tuple
+import hashlib
+import os
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROMPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'prompts')
+DEFAULT_PROMPT_VERSION = 'v1'
+
+# Language used when a request's language has no templates
+FALLBACK_LANGUAGE = 'en'
+
+# Placeholders a user template must contain
+USER_FIELDS = ('context', 'query')
+
+
+def _read_template(path: str) -> str:
+    """Template file text without the file's final newline"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    return text[:-1] if text.endswith('\n') else text
+
+
+def compile_template(text: str, fields: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+    """
+    Split a str.format-style template into (literal, field) segments
+
+    Args:
+        text: Template text; {name} is a placeholder, {{ and }} are literal braces
+        fields: Placeholders the template must use, each exactly once
+
+    Returns:
+        Segments; the last field is '' when the template ends with a literal
+    """
+    segments = []
+    used = []
+    for literal, field, format_spec, conversion in Formatter().parse(text):
+        if field is not None:
+            if field not in fields or format_spec or conversion:
+                raise ValueError(f"Unsupported placeholder {{{field}}} (expected {', '.join(fields)})")
+            used.append(field)
+        segments.append((literal, field or ''))
+
+    if sorted(used) != sorted(fields):
+        raise ValueError(f"Template must use each of {', '.join(fields)} exactly once (found {used})")
+    return tuple(segments)
+
+
+class LanguageTemplates:
+    """Precompiled system and user templates for one language"""
+
+    __slots__ = ('language', 'system', 'user_segments')
+
+    def __init__(self, language: str, system: str, user: str):
+        """
+        Compile one language's templates
+
+        Args:
+            language: Language code
+            system: System message text
+            user: User message template with {context} and {query}
+        """
+        self.language = language
+        # One string object per process: every request sends the same bytes
+        # first, so the provider can reuse its cached prompt prefix
+        self.system = system
+        self.user_segments = compile_template(user, USER_FIELDS)
+
+    def render_user(self, context: str, query: str) -> str:
+        """Fill the user template"""
+        values = {'context': context, 'query': query, '': ''}
+        return ''.join(literal + values[field] for literal, field in self.user_segments)
+
+
+class PromptTemplates:
+    """
+    One version of the RAG prompt templates.
+
+    A version is a directory holding <language>.system.txt and
+    <language>.user.txt per language. The version string combines the
+    directory name with a hash of the files, so editing a template without
+    renaming the directory still changes it.
+    """
+
+    def __init__(self, templates_dir: str = DEFAULT_PROMPTS_DIR, version: str = DEFAULT_PROMPT_VERSION):
+        """
+        Load and compile a template version
+
+        Args:
+            templates_dir: Directory holding one subdirectory per version
+            version: Version (subdirectory) to load
+        """
+        path = os.path.join(templates_dir, version)
+        try:
+            languages = sorted({name.split('.', 1)[0] for name in os.listdir(path) if name.endswith('.txt')})
+            digest = hashlib.sha256()
+            self.languages = {}
+
+            for language in languages:
+                system = _read_template(os.path.join(path, f'{language}.system.txt'))
+                user = _read_template(os.path.join(path, f'{language}.user.txt'))
+                for text in (language, system, user):
+                    digest.update(text.encode('utf-8') + b'\0')
+                self.languages[language] = LanguageTemplates(language, system, user)
+
+            if FALLBACK_LANGUAGE not in self.languages:
+                raise ValueError(f"No '{FALLBACK_LANGUAGE}' templates")
+
+        except Exception as e:
+            logger.error(f"Error loading prompt templates from {path}: {e}")
+            raise
+
+        self.name = version
+        self.fingerprint = digest.hexdigest()[:12]
+        self.version = f"{version}:{self.fingerprint}"
+
+        logger.info(f"Loaded prompt templates {self.version} ({', '.join(self.languages)})")
+
+    def get(self, language: str) -> LanguageTemplates:
+        """Templates for a language (English when it has none)"""
+        return self.languages.get(language) or self.languages[FALLBACK_LANGUAGE]
+
+    def build_messages(self, language: str, context: str, query: str,
+                       history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Chat messages of a RAG turn: system prefix, history, then the question
+
+        Args:
+            language: Response language
+            context: Formatted context passages
+            query: User query
+            history: History messages to send
+
+        Returns:
+            Messages for the chat completion API
+        """
+        templates = self.get(language)
+        messages = [{"role": "system", "content": templates.system}]
+        messages.extend(history)
+        messages.append({"role": "user", "content": templates.render_user(context, query)})
+        return messages
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the loaded version and its languages"""
+        return {
+            'version': self.version,
+            'languages': list(self.languages)
+        }
@@ -3,10 +3,17 @@ RAG Engine Module
 Coordinates retrieval and generation for RAG chatbot
 """
 
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterator, Tuple
+import time
 import logging
 from .vector_store import VectorStore
 from .llm_service import LLMService
+from .retrieval_policy import AdaptiveRetrievalPolicy
+from .response_cache import SemanticResponseCache, context_key
+from .single_flight import SingleFlight, FlightAbandoned
+from .prompt_budget import PromptBudget
+from .embedding_cache import normalize_query
+from .metrics import StageTimings, get_process_memory
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,7 +25,10 @@ class RAGEngine:
     Coordinates document retrieval and response generation
     """
 
-    def __init__(self, vector_store: VectorStore, llm_service: LLMService, top_k: int = 5):
+    def __init__(self, vector_store: VectorStore, llm_service: LLMService, top_k: int = 5,
+                 retrieval_policy: Optional[AdaptiveRetrievalPolicy] = None,
+                 response_cache: Optional[SemanticResponseCache] = None, coalesce: bool = True,
+                 prompt_budget: Optional[PromptBudget] = None):
         """
         Initialize RAG engine
 
@@ -26,17 +36,37 @@ class RAGEngine:
             vector_store: Vector store instance
             llm_service: LLM service instance
             top_k: Number of documents to retrieve
+            retrieval_policy: Optional policy that trims the retrieved documents
+                before they go into the context (None sends all top_k)
+            response_cache: Optional cache of answers to stateless (no-history) turns
+            coalesce: Share one retrieval (and, for stateless turns, one LLM call)
+                between identical concurrent requests
+            prompt_budget: Optional per-request prompt token budget (trims history and context)
         """
         self.vector_store = vector_store
         self.llm_service = llm_service
         self.top_k = top_k
+        self.retrieval_policy = retrieval_policy
+        self.response_cache = response_cache
+        self.prompt_budget = prompt_budget
+
+        # Identical concurrent requests share in-flight work
+        self.retrieval_flights = SingleFlight('retrieval') if coalesce else None
+        self.generation_flights = SingleFlight('generation') if coalesce else None
 
         # Conversation memory
         self.conversations = {}
 
+        # Category each conversation is scoped to (retrieval only searches that partition)
+        self.conversation_scopes = {}
+
+        # Per-stage pipeline latency
+        self.timings = StageTimings()
+
         logger.info("RAG Engine initialized")
 
-    def query(self, user_query: str, conversation_id: Optional[str] = None, language: str = 'en') -> Dict[str, Any]:
+    def query(self, user_query: str, conversation_id: Optional[str] = None, language: str = 'en',
+              category: Optional[str] = None) -> Dict[str, Any]:
         """
         Process a user query using RAG pipeline
 
@@ -44,6 +74,8 @@ class RAGEngine:
             user_query: User's question
             conversation_id: Optional conversation ID for context
             language: Language for response ('en' for English, 'ur' for Roman Urdu)
+            category: Scope the conversation to one category ('' clears the scope,
+                None keeps the conversation's current scope)
 
         Returns:
             Dictionary containing response and metadata
@@ -51,32 +83,54 @@ class RAGEngine:
         try:
             logger.info(f"Processing query (lang: {language}): '{user_query[:100]}...'")
 
-            # Step 1: Retrieve relevant documents
-            retrieved_docs = self.vector_store.search(user_query, top_k=self.top_k)
+            category = self._resolve_scope(conversation_id, category)
+
+            # Steps 1-2: Retrieve relevant documents and keep those worth their prompt tokens
+            retrieved_docs, context_docs, retrieval_report = self._retrieve(user_query, category)
 
             if not retrieved_docs:
                 logger.warning("No relevant documents found")
                 return {
                     'response': self._generate_fallback_response(user_query, language),
                     'sources': [],
-                    'conversation_id': conversation_id
+                    'conversation_id': conversation_id,
+                    'category': category
                 }
 
-            # Step 2: Build context from retrieved documents
-            context = self._build_context(retrieved_docs)
-
-            # Step 3: Get conversation history
+            # Step 3: Get conversation history and pick the model; a first turn may already be answered
             conversation_history = self._get_conversation_history(conversation_id)
-
-            # Step 4: Generate response using LLM
-            response = self.llm_service.generate_rag_response(
-                query=user_query,
-                context=context,
-                conversation_history=conversation_history,
-                language=language
-            )
-
-            # Step 5: Update conversation history
+            model = self._route(user_query, language, context_docs, conversation_history)
+            cache_slot, response = self._cached_response(user_query, language, context_docs,
+                                                         conversation_history, model)
+            cached = response is not None
+            prompt_report = None
+            passages = context_docs
+
+            if not cached:
+                # Step 4: Fit history and documents to the prompt budget, then build context
+                history, passages, prompt_report = self._fit_prompt(user_query, language, context_docs,
+                                                                    conversation_history)
+                context = self._build_context(passages)
+
+                def generate():
+                    with self.timings.time('generation'):
+                        generated = self.llm_service.generate_rag_response(
+                            query=user_query,
+                            context=context,
+                            conversation_history=history,
+                            language=language,
+                            model=model
+                        )
+
+                    if cache_slot:
+                        self.response_cache.put(*cache_slot, generated)
+                    return generated
+
+                # Step 5: Generate response using LLM (identical concurrent first turns share one call)
+                flight_key = self._flight_key(user_query, language, context_docs, conversation_history, model)
+                response = self.generation_flights.do(flight_key, generate) if flight_key else generate()
+
+            # Step 6: Update conversation history
             if conversation_id:
                 self._update_conversation(
                     conversation_id,
@@ -84,8 +138,8 @@ class RAGEngine:
                     response
                 )
 
-            # Step 6: Format sources
-            sources = self._format_sources(retrieved_docs)
+            # Step 7: Format sources (the passages actually sent, after the prompt budget)
+            sources = self._format_sources(passages)
 
             logger.info("Query processed successfully")
 
@@ -93,19 +147,294 @@ class RAGEngine:
                 'response': response,
                 'sources': sources,
                 'conversation_id': conversation_id,
-                'retrieved_docs_count': len(retrieved_docs)
+                'category': category,
+                'retrieved_docs_count': len(retrieved_docs),
+                'retrieval': retrieval_report,
+                'prompt': prompt_report,
+                'model': model,
+                'cached': cached
             }
 
         except Exception as e:
             logger.error(f"Error processing query: {e}")
-            error_msg = "I apologize, but I encountered an error processing your request. Please try again." if language == 'en' else "Maafi, mujhe aapke sawal ka jawab dene mein masla ho raha hai. Mehrbani karke dobara koshish karein."
             return {
-                'response': error_msg,
+                'response': self._error_message(language),
                 'sources': [],
                 'conversation_id': conversation_id,
                 'error': str(e)
             }
 
+    def stream_query(self, user_query: str, conversation_id: Optional[str] = None, language: str = 'en',
+                     category: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Process a user query, streaming the response as it is generated
+
+        Events, in order: 'sources' once the prompt's passages are known, 'delta'
+        for every piece of generated text, then 'done' with the full
+        response ('error' replaces 'done' on failure). Conversation history
+        is only updated once the response is complete; closing the
+        generator early cancels the upstream generation.
+
+        Args:
+            user_query: User's question
+            conversation_id: Optional conversation ID for context
+            language: Language for response ('en' for English, 'ur' for Roman Urdu)
+            category: Scope the conversation to one category ('' clears the scope,
+                None keeps the conversation's current scope)
+
+        Yields:
+            (event name, event data) tuples
+        """
+        deltas = None
+        flight = None
+        try:
+            logger.info(f"Streaming query (lang: {language}): '{user_query[:100]}...'")
+            start = time.perf_counter()
+
+            category = self._resolve_scope(conversation_id, category)
+            retrieved_docs, context_docs, retrieval_report = self._retrieve(user_query, category)
+
+            sources_event = {
+                'sources': [],
+                'conversation_id': conversation_id,
+                'category': category,
+                'retrieved_docs_count': len(retrieved_docs),
+                'retrieval': retrieval_report
+            }
+
+            if not retrieved_docs:
+                logger.warning("No relevant documents found")
+                yield 'sources', sources_event
+                response = self._generate_fallback_response(user_query, language)
+                yield 'delta', {'text': response}
+                yield 'done', {'response': response, 'conversation_id': conversation_id}
+                return
+
+            conversation_history = self._get_conversation_history(conversation_id)
+            model = self._route(user_query, language, context_docs, conversation_history)
+            cache_slot, response = self._cached_response(user_query, language, context_docs,
+                                                         conversation_history, model)
+            cached = response is not None
+
+            # Sources are the passages that fit the prompt budget
+            history, passages, prompt_report = [], context_docs, None
+            if not cached:
+                history, passages, prompt_report = self._fit_prompt(user_query, language, context_docs,
+                                                                    conversation_history)
+            sources_event['sources'] = self._format_sources(passages)
+            yield 'sources', sources_event
+
+            # An identical stateless turn already generating: wait for its answer instead
+            flight_key = None if cached else self._flight_key(user_query, language, context_docs,
+                                                               conversation_history, model)
+            if flight_key:
+                flight, response = self.generation_flights.acquire(flight_key)
+
+            if response is not None:
+                if conversation_id:
+                    self._update_conversation(conversation_id, user_query, response)
+                yield 'delta', {'text': response}
+                yield 'done', {'response': response, 'conversation_id': conversation_id, 'cached': cached,
+                               'model': model}
+                return
+
+            deltas = self.llm_service.stream_rag_response(
+                query=user_query,
+                context=self._build_context(passages),
+                conversation_history=history,
+                language=language,
+                model=model
+            )
+
+            parts = []
+            generation_start = time.perf_counter()
+            for delta in deltas:
+                if not parts:
+                    self.timings.record('first_token', (time.perf_counter() - start) * 1000)
+                parts.append(delta)
+                yield 'delta', {'text': delta}
+            self.timings.record('generation', (time.perf_counter() - generation_start) * 1000)
+
+            response = ''.join(parts).strip()
+            if conversation_id:
+                self._update_conversation(conversation_id, user_query, response)
+            if cache_slot:
+                self.response_cache.put(*cache_slot, response)
+            if flight is not None:
+                self.generation_flights.land(flight, result=response)
+                flight = None
+
+            logger.info("Streamed query processed successfully")
+            yield 'done', {'response': response, 'conversation_id': conversation_id, 'cached': False,
+                           'prompt': prompt_report, 'model': model}
+
+        except GeneratorExit:
+            logger.info("Client disconnected; streamed query cancelled")
+            raise
+
+        except Exception as e:
+            logger.error(f"Error streaming query: {e}")
+            if flight is not None:
+                self.generation_flights.land(flight, error=e)
+                flight = None
+            yield 'error', {'response': self._error_message(language), 'error': str(e),
+                            'conversation_id': conversation_id}
+
+        finally:
+            if deltas is not None:
+                deltas.close()
+            if flight is not None:
+                # Cancelled mid-generation: waiting callers generate for themselves
+                self.generation_flights.land(flight, error=FlightAbandoned())
+
+    def _retrieve(self, user_query: str, category: Optional[str]):
+        """
+        Retrieve documents and choose the ones that go into the context
+
+        Concurrent calls for the same normalized query and category share
+        one embedding and search.
+
+        Args:
+            user_query: User's question
+            category: Category to search, or None for the whole knowledge base
+
+        Returns:
+            Tuple of (retrieved documents, context documents, retrieval report)
+        """
+        if self.retrieval_flights is None:
+            return self._search(user_query, category)
+
+        return self.retrieval_flights.do((normalize_query(user_query), category),
+                                         lambda: self._search(user_query, category))
+
+    def _search(self, user_query: str, category: Optional[str]):
+        """Uncoalesced _retrieve"""
+        filters = {'category': category} if category else None
+
+        with self.timings.time('retrieval'):
+            retrieved_docs = self.vector_store.search(user_query, top_k=self.top_k, filters=filters)
+
+        if self.retrieval_policy and retrieved_docs:
+            context_docs, retrieval_report = self.retrieval_policy.select(retrieved_docs)
+        else:
+            context_docs = retrieved_docs
+            retrieval_report = {'retrieved': len(retrieved_docs), 'selected': len(retrieved_docs)}
+
+        return retrieved_docs, context_docs, retrieval_report
+
+    def _fit_prompt(self, user_query: str, language: str, context_docs: List[Dict[str, Any]],
+                    conversation_history: List[Dict[str, str]]):
+        """
+        Choose the history and documents that fit the prompt budget
+
+        Args:
+            user_query: User's question
+            language: Response language
+            context_docs: Documents selected for the context, in rank order
+            conversation_history: Full conversation history
+
+        Returns:
+            Tuple of (history to send, documents to send, budget report or None without a budget)
+        """
+        history = conversation_history[-self.llm_service.HISTORY_MESSAGES:]
+        if self.prompt_budget is None:
+            return history, context_docs, None
+
+        def build(kept_history, kept_docs):
+            return self.llm_service.build_rag_messages(user_query, self._build_context(kept_docs),
+                                                       kept_history, language)
+
+        with self.timings.time('prompt_budget'):
+            history, context_docs, report = self.prompt_budget.fit(build, history, context_docs)
+
+        report['template'] = self.llm_service.prompt_version
+        return history, context_docs, report
+
+    def _route(self, user_query: str, language: str, context_docs: List[Dict[str, Any]],
+               conversation_history: List[Dict[str, str]]) -> str:
+        """
+        Model for a turn, from the question, language, best passage score and history
+
+        Returns:
+            Model name
+        """
+        top_similarity = max((doc.get('similarity', 0.0) for doc in context_docs), default=0.0)
+        return self.llm_service.route(user_query, language, top_similarity, bool(conversation_history))
+
+    def _flight_key(self, user_query: str, language: str, context_docs: List[Dict[str, Any]],
+                    conversation_history: List[Dict[str, str]], model: str):
+        """
+        Coalescing key of a generation: normalized query, prompt version, model, language and context
+
+        Returns:
+            Key, or None when the turn must not share its answer (history, or coalescing disabled)
+        """
+        if self.generation_flights is None or conversation_history:
+            return None
+        return (normalize_query(user_query),
+                context_key(language, context_docs, self.llm_service.prompt_version, model))
+
+    def _cached_response(self, user_query: str, language: str, context_docs: List[Dict[str, Any]],
+                         conversation_history: List[Dict[str, str]], model: str):
+        """
+        Look a turn up in the response cache
+
+        Only stateless turns are cacheable: with history the answer depends
+        on the conversation, not just the question and its context.
+
+        Args:
+            user_query: User's question
+            language: Response language
+            context_docs: Documents going into the context
+            conversation_history: History sent with the turn
+            model: Model the turn is routed to (answers are cached per model)
+
+        Returns:
+            Tuple of (cache slot to store a generated answer under, or None if
+            the turn is not cacheable; cached response or None)
+        """
+        if self.response_cache is None or conversation_history or not context_docs:
+            return None, None
+
+        with self.timings.time('response_cache'):
+            # Retrieval just embedded the query, so this is a query cache hit
+            slot = (context_key(language, context_docs, self.llm_service.prompt_version, model),
+                    self.vector_store.embed_query(user_query),
+                    self.vector_store.kb_version())
+            response = self.response_cache.get(*slot)
+
+        if response is not None:
+            logger.info("Answered from the response cache")
+        return slot, response
+
+    @staticmethod
+    def _error_message(language: str) -> str:
+        """Apology shown when a query fails"""
+        if language == 'en':
+            return "I apologize, but I encountered an error processing your request. Please try again."
+        return "Maafi, mujhe aapke sawal ka jawab dene mein masla ho raha hai. Mehrbani karke dobara koshish karein."
+
+    def _resolve_scope(self, conversation_id: Optional[str], category: Optional[str]) -> Optional[str]:
+        """
+        Get the category a query is scoped to, remembering it per conversation
+
+        Args:
+            conversation_id: Conversation identifier
+            category: Requested category ('' clears, None keeps the current scope)
+
+        Returns:
+            Category to search, or None for the whole knowledge base
+        """
+        if category is None:
+            return self.conversation_scopes.get(conversation_id) if conversation_id else None
+
+        if conversation_id:
+            if category:
+                self.conversation_scopes[conversation_id] = category
+            else:
+                self.conversation_scopes.pop(conversation_id, None)
+        return category or None
+
     def _build_context(self, retrieved_docs: List[Dict[str, Any]]) -> str:
         """
         Build context string from retrieved documents
@@ -171,9 +500,17 @@ class RAGEngine:
             List of formatted source dictionaries
         """
         sources = []
+        seen = set()
 
         for doc in retrieved_docs:
             metadata = doc.get('metadata', {})
+
+            # Several chunks of one topic are listed as a single source
+            parent = metadata.get('parent_id', doc.get('id'))
+            if parent in seen:
+                continue
+            seen.add(parent)
+
             sources.append({
                 'title': metadata.get('title', 'Unknown'),
                 'category': metadata.get('category', 'general'),
@@ -227,10 +564,16 @@ How can I help you with another medical topic?"""
         Args:
             conversation_id: Conversation identifier
         """
+        self.conversation_scopes.pop(conversation_id, None)
         if conversation_id in self.conversations:
             del self.conversations[conversation_id]
             logger.info(f"Cleared conversation: {conversation_id}")
 
+    def after_fork(self):
+        """Re-create per-process handles in a freshly forked worker"""
+        self.vector_store.after_fork()
+        self.llm_service.after_fork()
+
     def get_stats(self) -> Dict[str, Any]:
         """
         Get RAG engine statistics
@@ -241,7 +584,17 @@ How can I help you with another medical topic?"""
         return {
             'vector_store_stats': self.vector_store.get_stats(),
             'active_conversations': len(self.conversations),
-            'top_k': self.top_k
+            'top_k': self.top_k,
+            'llm': self.llm_service.get_stats(),
+            'retrieval_policy': self.retrieval_policy.get_stats() if self.retrieval_policy else None,
+            'response_cache': self.response_cache.get_stats() if self.response_cache else None,
+            'prompt_budget': self.prompt_budget.get_stats() if self.prompt_budget else None,
+            'coalescing': {
+                'retrieval': self.retrieval_flights.get_stats(),
+                'generation': self.generation_flights.get_stats()
+            } if self.retrieval_flights else None,
+            'timings': self.timings.get_stats(),
+            'process_memory': get_process_memory()
         }
 
 """
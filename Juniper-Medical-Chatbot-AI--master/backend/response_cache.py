@@ -0,0 +1,215 @@
+"""
+Response Cache Module
+Semantic cache of generated RAG answers for stateless (no-history) turns
+"""
+
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import threading
+import itertools
+import time
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def context_key(language: str, context_docs: List[Dict[str, Any]], prompt_version: str = '',
+                model: str = '') -> Tuple:
+    """
+    Bucket key of a turn: its prompt template version, model, language and the set of context documents
+
+    Each document contributes its id and the content hash it was indexed
+    with, so an edited chunk never serves an answer written from its old text;
+    likewise an answer is never served under a different prompt version or
+    from a different model.
+
+    Args:
+        language: Response language
+        context_docs: Documents that went into the context
+        prompt_version: Version of the prompt templates the answer is generated with
+        model: Model the answer is generated with
+
+    Returns:
+        Hashable key
+    """
+    docs = sorted((doc.get('id', ''), doc.get('metadata', {}).get('content_hash', '')) for doc in context_docs)
+    return (prompt_version, model, language, tuple(docs))
+
+
+class SemanticResponseCache:
+    """
+    Thread-safe LRU cache of answers keyed by context and query meaning.
+
+    A lookup only considers entries built from the same prompt version,
+    language and set of context documents, and among those returns the one whose
+    query embedding is closest, if its cosine similarity reaches the
+    threshold. Entries expire after a TTL, the least recently used entry
+    is evicted when full, and the whole cache is dropped when the knowledge
+    base version (the index generation marker) changes.
+    """
+
+    def __init__(self, max_size: int = 512, ttl_seconds: float = 3600,
+                 similarity_threshold: float = 0.92):
+        """
+        Initialize response cache
+
+        Args:
+            max_size: Maximum number of cached answers (0 disables caching)
+            ttl_seconds: Seconds before an answer expires (0 means no expiry)
+            similarity_threshold: Minimum query cosine similarity for a hit
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+
+        self._entries = OrderedDict()  # entry id -> (key, unit embedding, response, created_at)
+        self._buckets = {}  # key -> set of entry ids
+        self._ids = itertools.count()
+        self._kb_version = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _unit(embedding: np.ndarray) -> np.ndarray:
+        embedding = np.asarray(embedding, dtype=np.float32).ravel()
+        return embedding / max(float(np.linalg.norm(embedding)), 1e-12)
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def _remove(self, entry_id: int):
+        key = self._entries.pop(entry_id)[0]
+        bucket = self._buckets[key]
+        bucket.discard(entry_id)
+        if not bucket:
+            del self._buckets[key]
+
+    def _check_version(self, kb_version: Any):
+        """Drop every entry if the knowledge base changed (lock held)"""
+        if kb_version != self._kb_version:
+            if self._entries:
+                logger.info(f"Knowledge base changed; dropping {len(self._entries)} cached responses")
+                self.invalidations += 1
+            self._entries.clear()
+            self._buckets.clear()
+            self._kb_version = kb_version
+
+    def _closest(self, key: Tuple, unit: np.ndarray, now: float) -> Tuple[Optional[int], float]:
+        """Closest live entry in a bucket and its similarity (lock held)"""
+        best_id, best_similarity = None, -1.0
+        for entry_id in list(self._buckets.get(key, ())):
+            _, embedding, _, created_at = self._entries[entry_id]
+            if self._is_expired(created_at, now):
+                self._remove(entry_id)
+                self.expirations += 1
+                continue
+
+            similarity = float(embedding @ unit)
+            if similarity > best_similarity:
+                best_id, best_similarity = entry_id, similarity
+
+        return best_id, best_similarity
+
+    def get(self, key: Tuple, query_embedding: np.ndarray, kb_version: Any) -> Optional[str]:
+        """
+        Look up a cached answer
+
+        Args:
+            key: context_key() of the turn
+            query_embedding: Embedding of the user query
+            kb_version: Current knowledge base version
+
+        Returns:
+            Cached response text or None on miss
+        """
+        if self.max_size <= 0:
+            return None
+
+        unit = self._unit(query_embedding)
+        now = time.time()
+        with self._lock:
+            self._check_version(kb_version)
+            entry_id, similarity = self._closest(key, unit, now)
+            if entry_id is None or similarity < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return self._entries[entry_id][2]
+
+    def put(self, key: Tuple, query_embedding: np.ndarray, kb_version: Any, response: str):
+        """
+        Store an answer, replacing a near-identical query's entry and evicting the LRU entry when full
+
+        An answer generated against an older knowledge base version than the
+        cache's (the index was re-published during generation) is dropped;
+        it never resets the entries stored under the newer version.
+
+        Args:
+            key: context_key() of the turn
+            query_embedding: Embedding of the user query
+            kb_version: Knowledge base version the answer was generated against
+            response: Generated response text
+        """
+        if self.max_size <= 0:
+            return
+
+        unit = self._unit(query_embedding)
+        unit.flags.writeable = False
+        now = time.time()
+        with self._lock:
+            if kb_version != self._kb_version:
+                if self._kb_version is not None:
+                    logger.info("Knowledge base changed during generation; not caching the response")
+                    return
+                self._kb_version = kb_version
+
+            entry_id, similarity = self._closest(key, unit, now)
+            if entry_id is not None and similarity >= self.similarity_threshold:
+                self._remove(entry_id)
+
+            entry_id = next(self._ids)
+            self._entries[entry_id] = (key, unit, response, now)
+            self._buckets.setdefault(key, set()).add(entry_id)
+            self.stores += 1
+
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached answers"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            size = len(self._entries)
+            buckets = len(self._buckets)
+
+        lookups = self.hits + self.misses
+        return {
+            'size': size,
+            'contexts': buckets,
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'similarity_threshold': self.similarity_threshold,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations
+        }
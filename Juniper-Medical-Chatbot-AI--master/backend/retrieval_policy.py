@@ -0,0 +1,143 @@
+"""
+Retrieval Policy Module
+Adaptive selection of how many retrieved documents go into the LLM context:
+a minimum similarity cutoff, a score-gap (elbow) cutoff and a context token budget
+"""
+
+from typing import List, Dict, Any, Tuple, Callable, Optional
+import threading
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rough characters per token for English prose with Llama-family tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the prompt tokens a text will cost
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Approximate token count
+    """
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN) if text else 0
+
+
+class AdaptiveRetrievalPolicy:
+    """
+    Decides which retrieved documents are worth sending to the LLM.
+
+    Retrieval still fetches top_k candidates; the policy then drops
+    candidates below min_similarity, cuts at the first similarity drop
+    larger than score_gap (the elbow between relevant and filler hits),
+    and stops adding documents once max_context_tokens would be exceeded.
+    The best min_docs candidates survive the similarity cutoffs so a weak
+    match still yields an answer; the best candidate always survives the
+    budget.
+    """
+
+    def __init__(self, min_similarity: float = 0.25, score_gap: float = 0.15,
+                 max_context_tokens: int = 1500, min_docs: int = 1,
+                 count_tokens: Optional[Callable[[str], int]] = None):
+        """
+        Initialize retrieval policy
+
+        Args:
+            min_similarity: Candidates below this similarity are dropped (0 disables)
+            score_gap: Cut after the first similarity drop larger than this (0 disables)
+            max_context_tokens: Token budget for the context (0 disables)
+            min_docs: Candidates kept regardless of the similarity cutoffs
+            count_tokens: Token counter for the budget (defaults to estimate_tokens)
+        """
+        self.min_similarity = min_similarity
+        self.score_gap = score_gap
+        self.max_context_tokens = max_context_tokens
+        self.min_docs = max(min_docs, 1)
+        self.count_tokens = count_tokens or estimate_tokens
+
+        # Running totals for get_stats()
+        self._lock = threading.Lock()
+        self._totals = {'queries': 0, 'retrieved': 0, 'selected': 0, 'context_tokens': 0,
+                        'dropped_similarity': 0, 'dropped_gap': 0, 'dropped_budget': 0}
+
+    def _similarity_cutoff(self, similarities: List[float]) -> float:
+        """Lowest similarity that survives the min-similarity and score-gap cutoffs"""
+        ranked = sorted(similarities, reverse=True)
+        floor = ranked[min(self.min_docs, len(ranked)) - 1]
+
+        cutoff = self.min_similarity if self.min_similarity > 0 else float('-inf')
+        if self.score_gap > 0:
+            for idx in range(1, len(ranked)):
+                if ranked[idx - 1] - ranked[idx] > self.score_gap:
+                    cutoff = max(cutoff, ranked[idx - 1])
+                    break
+
+        return min(cutoff, floor)
+
+    def select(self, retrieved_docs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Choose the documents that go into the context
+
+        Args:
+            retrieved_docs: Retrieved documents in rank order, with 'similarity' and 'document'
+
+        Returns:
+            Tuple of (selected documents in rank order, selection report)
+        """
+        report = {'retrieved': len(retrieved_docs), 'selected': 0, 'context_tokens': 0,
+                  'dropped_similarity': 0, 'dropped_gap': 0, 'dropped_budget': 0}
+        if not retrieved_docs:
+            return [], report
+
+        similarities = [doc.get('similarity', 0.0) for doc in retrieved_docs]
+        cutoff = self._similarity_cutoff(similarities)
+
+        selected = []
+        for doc, similarity in zip(retrieved_docs, similarities):
+            if similarity < cutoff:
+                # Attribute the drop to the rule that removed it
+                if self.min_similarity > 0 and similarity < self.min_similarity:
+                    report['dropped_similarity'] += 1
+                else:
+                    report['dropped_gap'] += 1
+                continue
+
+            tokens = self.count_tokens(doc.get('document', '').strip())
+            if selected and self.max_context_tokens > 0 and report['context_tokens'] + tokens > self.max_context_tokens:
+                report['dropped_budget'] += 1
+                continue
+
+            selected.append(doc)
+            report['context_tokens'] += tokens
+
+        report['selected'] = len(selected)
+
+        with self._lock:
+            self._totals['queries'] += 1
+            for key, value in report.items():
+                self._totals[key] += value
+
+        logger.info(f"Adaptive retrieval kept {report['selected']}/{report['retrieved']} documents "
+                    f"(~{report['context_tokens']} tokens)")
+        return selected, report
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get policy settings and average selection per query"""
+        with self._lock:
+            totals = dict(self._totals)
+
+        queries = totals.pop('queries')
+        return {
+            'min_similarity': self.min_similarity,
+            'score_gap': self.score_gap,
+            'max_context_tokens': self.max_context_tokens,
+            'queries': queries,
+            'avg_selected': round(totals['selected'] / queries, 2) if queries else 0.0,
+            'avg_context_tokens': round(totals['context_tokens'] / queries, 1) if queries else 0.0,
+            'dropped': {key: totals[key] for key in ('dropped_similarity', 'dropped_gap', 'dropped_budget')}
+        }
@@ -0,0 +1,255 @@
+"""
+Single-Flight Module
+Coalesces identical concurrent calls: the first caller (the leader) runs
+the call, callers arriving while it is in flight wait for its outcome
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Callable, Hashable, Optional, Tuple
+import asyncio
+import threading
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class FlightAbandoned(Exception):
+    """The leader stopped without an outcome (e.g. its client disconnected); followers retry"""
+
+
+def _copy_error(error: BaseException) -> BaseException:
+    """Fresh exception of the same type, message and attributes, without a traceback"""
+    try:
+        fresh = type(error)(*error.args)
+        if str(fresh) != str(error):
+            # __init__ formats its arguments; rebuild without re-running it
+            fresh = type(error).__new__(type(error))
+            fresh.args = error.args
+        fresh.__dict__.update(error.__dict__)
+        return fresh
+    except Exception:
+        return RuntimeError(f"Coalesced call failed: {error}")
+
+
+class Flight:
+    """One in-flight call"""
+
+    __slots__ = ('key', 'done', 'result', 'error', 'followers')
+
+    def __init__(self, key: Hashable, done):
+        self.key = key
+        self.done = done
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+    def outcome(self):
+        """
+        Result of a landed flight
+
+        A leader's error is raised as a fresh copy chained from the original,
+        so followers never share (and concurrently rewrite the traceback of)
+        one exception instance.
+        """
+        if self.error is not None:
+            raise _copy_error(self.error) from self.error
+        return self.result
+
+
+class _FlightTable(ABC):
+    """In-flight calls by key, with coalescing counters"""
+
+    def __init__(self, name: str = ''):
+        """
+        Initialize flight table
+
+        Args:
+            name: Label used in logs
+        """
+        self.name = name
+        self._flights = {}
+        self._lock = threading.Lock()
+
+        self.leaders = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.abandoned = 0
+
+    @abstractmethod
+    def _new_event(self):
+        """Event the followers of a new flight wait on"""
+
+    def join(self, key: Hashable) -> Tuple[Flight, bool]:
+        """
+        Join the flight for a key, starting one if none is in flight
+
+        Args:
+            key: Call identity
+
+        Returns:
+            Tuple of (flight, whether the caller leads it and must land() it)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                self.coalesced += 1
+                return flight, False
+
+            flight = self._flights[key] = Flight(key, self._new_event())
+            self.leaders += 1
+            return flight, True
+
+    def land(self, flight: Flight, result: Any = None, error: Optional[BaseException] = None):
+        """
+        Publish a led flight's outcome to its followers
+
+        Args:
+            flight: Flight returned by join() as leader
+            result: Call result
+            error: Exception the call raised (FlightAbandoned makes followers retry)
+        """
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            if isinstance(error, FlightAbandoned):
+                self.abandoned += 1
+            elif error is not None:
+                self.errors += 1
+
+        flight.result, flight.error = result, error
+        flight.done.set()
+
+        if flight.followers:
+            if isinstance(error, FlightAbandoned):
+                outcome = 'retry after the leader was cancelled'
+            else:
+                outcome = 'failed with the leader' if error is not None else 'shared one call'
+            logger.info(f"Single-flight {self.name}: {flight.followers} coalesced callers {outcome}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing counters"""
+        with self._lock:
+            in_flight = len(self._flights)
+
+        return {
+            'in_flight': in_flight,
+            'leaders': self.leaders,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'abandoned': self.abandoned
+        }
+
+
+class SingleFlight(_FlightTable):
+    """
+    Thread-safe single-flight group for blocking calls.
+
+    Under gevent the lock and events are monkey-patched into greenlet
+    primitives, so followers park their greenlet instead of a thread.
+    """
+
+    def _new_event(self):
+        return threading.Event()
+
+    def acquire(self, key: Hashable) -> Tuple[Optional[Flight], Any]:
+        """
+        Lead the call for a key, or wait for the one in flight
+
+        Args:
+            key: Call identity
+
+        Returns:
+            (flight, None) when the caller leads and must land() the flight,
+            otherwise (None, the leader's result). A leader's error is re-raised.
+        """
+        while True:
+            flight, leader = self.join(key)
+            if leader:
+                return flight, None
+
+            flight.done.wait()
+            try:
+                return None, flight.outcome()
+            except FlightAbandoned:
+                continue
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key
+
+        Args:
+            key: Call identity
+            fn: Call to run when leading
+
+        Returns:
+            fn's result (the leader's, for followers)
+        """
+        flight, result = self.acquire(key)
+        if flight is None:
+            return result
+
+        try:
+            result = fn()
+        except Exception as e:
+            self.land(flight, error=e)
+            raise
+        except BaseException:
+            self.land(flight, error=FlightAbandoned())
+            raise
+
+        self.land(flight, result=result)
+        return result
+
+
+class AsyncSingleFlight(_FlightTable):
+    """
+    Single-flight group for coroutines on one event loop.
+
+    A cancelled leader lands FlightAbandoned, so its followers retry
+    instead of inheriting the cancellation.
+    """
+
+    def _new_event(self):
+        return asyncio.Event()
+
+    async def acquire(self, key: Hashable) -> Tuple[Optional[Flight], Any]:
+        """Async counterpart of SingleFlight.acquire"""
+        while True:
+            flight, leader = self.join(key)
+            if leader:
+                return flight, None
+
+            await flight.done.wait()
+            try:
+                return None, flight.outcome()
+            except FlightAbandoned:
+                continue
+
+    async def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Await fn() once for all concurrent callers with the same key
+
+        Args:
+            key: Call identity
+            fn: Coroutine function to await when leading
+
+        Returns:
+            fn's result (the leader's, for followers)
+        """
+        flight, result = await self.acquire(key)
+        if flight is None:
+            return result
+
+        try:
+            result = await fn()
+        except Exception as e:
+            self.land(flight, error=e)
+            raise
+        except BaseException:
+            self.land(flight, error=FlightAbandoned())
+            raise
+
+        self.land(flight, result=result)
+        return result
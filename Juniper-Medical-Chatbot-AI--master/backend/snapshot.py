@@ -0,0 +1,236 @@
+"""
+Snapshot Module
+Single-file, versioned, checksummed and memory-mappable index snapshot
+(embeddings, ids, texts, metadata and the embedding model fingerprint)
+"""
+
+from typing import List, Dict, Any, Optional
+import numpy as np
+import hashlib
+import struct
+import json
+import time
+import os
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAGIC = b'JUNIPSNP'
+FORMAT_VERSION = 1
+
+# Every section starts on this boundary so it can be memory-mapped as an array
+ALIGNMENT = 64
+
+# magic, format version, header length
+_PREAMBLE = struct.Struct('<8sII')
+
+_STRING_SECTIONS = ('ids', 'documents', 'metadatas')
+
+
+class SnapshotError(ValueError):
+    """Raised for unreadable, corrupt or incompatible snapshot files"""
+
+
+def _padding(offset: int) -> bytes:
+    return b'\0' * (-offset % ALIGNMENT)
+
+
+def _encode_strings(values: List[Any], as_json: bool = False):
+    """UTF-8 blob plus int64 offsets (the MappedStrings layout)"""
+    encoded = [(json.dumps(value) if as_json else value).encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    return offsets, b''.join(encoded)
+
+
+def write_snapshot(path: str, embeddings: np.ndarray, ids: List[str], documents: List[str],
+                   metadatas: List[Dict[str, Any]], fingerprint: Dict[str, Any], dtype: str = 'float32',
+                   partitions: Optional[Dict[str, List[int]]] = None,
+                   manifest: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Write an index snapshot atomically
+
+    Layout: a 16-byte preamble (magic, format version, header length), a
+    JSON header, then 64-byte aligned sections: the embedding matrix and an
+    offsets array plus UTF-8 blob for ids, texts and metadata. The header
+    records every section's offset, the model fingerprint and the SHA-256 of
+    everything after the header.
+
+    Args:
+        path: Snapshot file to write
+        embeddings: Normalized embedding matrix, one row per document
+        ids: Document IDs
+        documents: Document texts
+        metadatas: Document metadata
+        fingerprint: Embedding model fingerprint ('embedding_model', 'embedding_revision', 'dimension')
+        dtype: Stored embedding dtype ('float32' or 'float16')
+        partitions: Optional {partition value: [start, end)} row ranges
+        manifest: Extra header fields
+
+    Returns:
+        The written header
+    """
+    if dtype not in ('float32', 'float16'):
+        raise ValueError(f"Unsupported snapshot dtype: {dtype}")
+
+    embeddings = np.ascontiguousarray(np.asarray(embeddings).astype(dtype, copy=False))
+    if len(ids) != embeddings.shape[0] or len(documents) != len(ids) or len(metadatas) != len(ids):
+        raise ValueError("Snapshot ids, embeddings, documents and metadatas must have the same length")
+
+    arrays = [('embeddings', embeddings)]
+    for name, values in zip(_STRING_SECTIONS, (ids, documents, metadatas)):
+        offsets, blob = _encode_strings(values, as_json=name == 'metadatas')
+        arrays.append((f"{name}.offsets", offsets))
+        arrays.append((f"{name}.blob", np.frombuffer(blob, dtype=np.uint8)))
+
+    # Section offsets are relative to the payload start
+    sections, position = {}, 0
+    for name, array in arrays:
+        position += len(_padding(position))
+        sections[name] = {'offset': position, 'dtype': str(array.dtype), 'shape': list(array.shape)}
+        position += array.nbytes
+
+    digest = hashlib.sha256()
+    position = 0
+    for name, array in arrays:
+        digest.update(_padding(position))
+        position += len(_padding(position))
+        digest.update(memoryview(array).cast('B') if array.nbytes else b'')
+        position += array.nbytes
+
+    header = dict(
+        manifest or {},
+        format_version=FORMAT_VERSION,
+        created_at=time.time(),
+        fingerprint=fingerprint,
+        count=len(ids),
+        dtype=dtype,
+        partitions=partitions,
+        sections=sections,
+        payload_bytes=position,
+        checksum={'algorithm': 'sha256', 'payload': digest.hexdigest()}
+    )
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b' ' * (-(_PREAMBLE.size + len(header_bytes)) % ALIGNMENT)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        position = 0
+        for name, array in arrays:
+            f.write(_padding(position))
+            position += len(_padding(position))
+            f.write(memoryview(array).cast('B') if array.nbytes else b'')
+            position += array.nbytes
+    os.replace(tmp_path, path)
+
+    logger.info(f"Wrote index snapshot {path} with {len(ids)} documents ({dtype}, "
+                f"{os.path.getsize(path) / 1024 ** 2:.2f} MB)")
+    return header
+
+
+class IndexSnapshot:
+    """
+    Read-only view of a snapshot file.
+
+    Every section is a memory map into the one file, so opening a snapshot
+    costs a header parse regardless of corpus size and every process that
+    maps it shares the same page-cache pages.
+    """
+
+    def __init__(self, path: str, verify: bool = True):
+        """
+        Open a snapshot
+
+        Args:
+            path: Snapshot file
+            verify: Check the payload checksum (reads the whole file once)
+        """
+        self.path = path
+
+        with open(path, 'rb') as f:
+            preamble = f.read(_PREAMBLE.size)
+            if len(preamble) < _PREAMBLE.size:
+                raise SnapshotError(f"{path} is not an index snapshot (file too short)")
+            magic, version, header_length = _PREAMBLE.unpack(preamble)
+            if magic != MAGIC:
+                raise SnapshotError(f"{path} is not an index snapshot")
+            if version > FORMAT_VERSION:
+                raise SnapshotError(f"{path} uses snapshot format {version}; this build reads up to {FORMAT_VERSION}")
+
+            try:
+                self.header = json.loads(f.read(header_length).decode('utf-8'))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise SnapshotError(f"{path} has a corrupt header: {e}")
+
+        self._payload_start = _PREAMBLE.size + header_length
+        if os.path.getsize(path) != self._payload_start + self.header['payload_bytes']:
+            raise SnapshotError(f"{path} is truncated or has trailing data")
+
+        if verify:
+            self.verify()
+
+        self._sections = {name: self._map(name) for name in self.header['sections']}
+
+    def _map(self, name: str) -> np.ndarray:
+        section = self.header['sections'][name]
+        shape = tuple(section['shape'])
+        if not int(np.prod(shape)):
+            return np.empty(shape, dtype=section['dtype'])
+        return np.memmap(self.path, dtype=section['dtype'], mode='r',
+                         offset=self._payload_start + section['offset'], shape=shape)
+
+    def verify(self):
+        """Raise SnapshotError if the payload checksum does not match"""
+        digest = hashlib.sha256()
+        with open(self.path, 'rb') as f:
+            f.seek(self._payload_start)
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+
+        if digest.hexdigest() != self.header['checksum']['payload']:
+            raise SnapshotError(f"{self.path} failed its checksum; the file is corrupt")
+
+    @property
+    def fingerprint(self) -> Dict[str, Any]:
+        return self.header['fingerprint']
+
+    @property
+    def checksum(self) -> str:
+        return self.header['checksum']['payload']
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        return self._sections['embeddings']
+
+    def strings(self, name: str):
+        """
+        Offsets and blob arrays of a string section
+
+        Args:
+            name: 'ids', 'documents' or 'metadatas'
+
+        Returns:
+            Tuple of (int64 offsets, uint8 blob)
+        """
+        return self._sections[f"{name}.offsets"], self._sections[f"{name}.blob"]
+
+    def check_fingerprint(self, embedding_model: str, embedding_revision: str, dimension: int):
+        """
+        Raise SnapshotError unless the snapshot was built with this embedding model
+
+        Args:
+            embedding_model: Embedding model name
+            embedding_revision: Model revision label
+            dimension: Embedding dimension
+        """
+        expected = {'embedding_model': embedding_model, 'embedding_revision': embedding_revision,
+                    'dimension': dimension}
+        mismatched = {key: self.fingerprint.get(key) for key, value in expected.items()
+                      if self.fingerprint.get(key) != value}
+        if mismatched:
+            raise SnapshotError(f"{self.path} was built with a different embedding model: {mismatched} "
+                                f"(expected {expected})")
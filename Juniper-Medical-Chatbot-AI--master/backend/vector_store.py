@@ -1,25 +1,64 @@
 """
 Vector Store Module
-Manages ChromaDB for semantic search and retrieval
+Manages the embedding model and index backend for semantic search and retrieval
 """
 
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import hashlib
+import atexit
+import time
 import os
 import logging
 
+from .chunking import chunk_id, merge_chunks
+from .disk_embedding_cache import DiskEmbeddingCache
+from .diversity import maximal_marginal_relevance
+from .embedding_cache import QueryEmbeddingCache, normalize_query
+from .encoders import create_encoder_from_config, embedding_revision
+from .filters import PARTITION_FIELD, normalize_filters, matches
+from .ingestion import IngestionPipeline
+from .lexical_index import LexicalIndex, lexical_index_path, reciprocal_rank_fusion
+from .metrics import StageTimings
+from .snapshot import IndexSnapshot, write_snapshot
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def content_hash(text: str) -> str:
+    """
+    Fingerprint of a document's text, stored in its metadata
+
+    Args:
+        text: Document text
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
 class VectorStore:
     """
-    Vector store implementation using ChromaDB and sentence-transformers
+    Vector store implementation using sentence-transformers and a pluggable
+    index backend (ChromaDB HNSW or in-process NumPy exact search), with a
+    BM25 lexical index for exact-term and hybrid retrieval
     """
 
-    def __init__(self, db_path: str, collection_name: str, embedding_model_name: str):
+    RETRIEVAL_MODES = ('dense', 'lexical', 'hybrid')
+
+    def __init__(self, db_path: str, collection_name: str, embedding_model_name: str,
+                 query_cache_size: int = 1024, query_cache_ttl: float = 86400,
+                 query_cache_path: Optional[str] = None, backend: str = 'chroma',
+                 index_path: Optional[str] = None, index_dtype: str = 'float32',
+                 encoder=None, retrieval_mode: str = 'dense', hybrid_candidates: int = 4,
+                 rrf_k: int = 60, neighbor_chunks: int = 0, embedding_cache_path: Optional[str] = None,
+                 embedding_revision: str = 'main', cache_query_embeddings: bool = False,
+                 encoder_options: Optional[Dict[str, Any]] = None, ingest_workers: int = 0,
+                 ingest_queue_depth: int = 4, ingest_pool_min_docs: int = 2000,
+                 ingest_flush_every: int = 10, mmr_lambda: float = 1.0, mmr_candidates: int = 3,
+                 hnsw_params: Optional[Dict[str, int]] = None):
         """
         Initialize vector store
 
@@ -27,143 +66,812 @@ class VectorStore:
             db_path: Path to ChromaDB storage
             collection_name: Name of the collection
             embedding_model_name: Name of the sentence-transformer model
+            query_cache_size: Maximum number of cached query embeddings (0 disables)
+            query_cache_ttl: Seconds a cached query embedding stays valid
+            query_cache_path: Optional file used to keep the query cache warm across restarts
+            backend: Index backend, 'chroma' or 'numpy'
+            index_path: Directory for the NumPy index (defaults to db_path)
+            index_dtype: Storage dtype for the NumPy index ('float32' or 'float16')
+            encoder: Prebuilt encoder (defaults to an in-process sentence-transformer)
+            retrieval_mode: Default search mode, 'dense', 'lexical' or 'hybrid'
+            hybrid_candidates: Candidates fetched per retriever as a multiple of top_k
+            rrf_k: Reciprocal rank fusion damping constant
+            neighbor_chunks: Adjacent chunks merged into each chunk hit (0 returns bare chunks)
+            embedding_cache_path: Optional root of the persistent embedding cache
+            embedding_revision: Model revision label the cached embeddings belong to
+            cache_query_embeddings: Also persist query embeddings (documents always are;
+                queries are always looked up). Off by default: every unique question
+                would be appended to the unbounded cache files on the request path
+            encoder_options: create_local_encoder() arguments for ingestion worker processes
+            ingest_workers: Encoder processes used for large ingestion runs (0 encodes in-process)
+            ingest_queue_depth: Encoded batches allowed to wait for the index writer
+            ingest_pool_min_docs: Smallest ingestion run that starts the process pool
+            ingest_flush_every: Ingested batches between index flushes (publishes staged NumPy rows)
+            mmr_lambda: Default MMR relevance/diversity trade-off (1.0 disables re-selection)
+            mmr_candidates: Candidates MMR chooses from, as a multiple of top_k
+            hnsw_params: HNSW settings for a new ChromaDB collection ('M', 'construction_ef', 'search_ef')
         """
+        if retrieval_mode not in self.RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {retrieval_mode}")
+
         self.db_path = db_path
         self.collection_name = collection_name
+        self.embedding_model_name = embedding_model_name
+        self.embedding_revision = embedding_revision
+
+        # Initialize embedding model (in-process, ONNX, or shared through the embedding server)
+        if encoder is None:
+            from .encoders import SentenceTransformerEncoder
+            encoder = SentenceTransformerEncoder(embedding_model_name)
+        self.encoder = encoder
+        self.embedding_dim = self.encoder.dimension
+
+        # Query embedding cache (popular questions skip the encoder entirely)
+        self.query_cache = QueryEmbeddingCache(
+            max_size=query_cache_size,
+            ttl_seconds=query_cache_ttl,
+            spill_path=query_cache_path or None
+        )
+        if self.query_cache.spill_path:
+            atexit.register(self.query_cache.save)
+
+        # Persistent embedding cache (re-indexing unchanged text is a disk read, not a forward pass)
+        self.embedding_cache = DiskEmbeddingCache(
+            embedding_cache_path,
+            embedding_model_name,
+            revision=embedding_revision,
+            dimension=self.embedding_dim
+        ) if embedding_cache_path else None
+        self.cache_query_embeddings = cache_query_embeddings
+
+        # Ingestion pipeline settings
+        self.encoder_options = encoder_options or {'model_name': embedding_model_name}
+        self.ingest_workers = ingest_workers
+        self.ingest_queue_depth = ingest_queue_depth
+        self.ingest_pool_min_docs = ingest_pool_min_docs
+        self.ingest_flush_every = ingest_flush_every
+
+        # Per-stage search latency
+        self.timings = StageTimings()
+
+        # Initialize index backend
+        self.backend = backend
+        self.hnsw_params = hnsw_params
+        self.index = self._create_index(backend, index_path, index_dtype)
+
+        # BM25 lexical index persisted next to the vector data
+        data_path = (index_path or db_path) if backend == 'numpy' else db_path
+        self.lexical = LexicalIndex(lexical_index_path(data_path, collection_name))
+        self.retrieval_mode = retrieval_mode
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+        self.neighbor_chunks = neighbor_chunks
+        self.mmr_lambda = mmr_lambda
+        self.mmr_candidates = mmr_candidates
+
+    def _create_index(self, backend: str, index_path: Optional[str], index_dtype: str):
+        """
+        Create the configured index backend
 
-        # Initialize embedding model
-        logger.info(f"Loading embedding model: {embedding_model_name}")
-        self.embedding_model = SentenceTransformer(embedding_model_name)
-        self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
-
-        # Initialize ChromaDB
-        self._initialize_chromadb()
+        Args:
+            backend: Index backend name
+            index_path: Directory for the NumPy index
+            index_dtype: Storage dtype for the NumPy index
 
-    def _initialize_chromadb(self):
-        """Initialize ChromaDB client and collection"""
-        try:
-            # Create directory if it doesn't exist
-            os.makedirs(self.db_path, exist_ok=True)
-
-            # Initialize ChromaDB client with persistent storage
-            self.client = chromadb.PersistentClient(
-                path=self.db_path,
-                settings=Settings(
-                    anonymized_telemetry=False,
-                    allow_reset=True
-                )
+        Returns:
+            Index backend instance
+        """
+        if backend == 'chroma':
+            from .chroma_index import ChromaIndex
+            return ChromaIndex(self.db_path, self.collection_name, timings=self.timings,
+                               hnsw_params=self.hnsw_params)
+
+        if backend == 'numpy':
+            from .numpy_index import NumpyIndex
+            return NumpyIndex(
+                index_path or self.db_path,
+                self.collection_name,
+                dtype=index_dtype,
+                timings=self.timings
             )
 
-            # Get or create collection
-            try:
-                self.collection = self.client.get_collection(name=self.collection_name)
-                logger.info(f"Loaded existing collection: {self.collection_name}")
-                logger.info(f"Collection contains {self.collection.count()} documents")
-            except:
-                self.collection = self.client.create_collection(
-                    name=self.collection_name,
-                    metadata={"hnsw:space": "cosine"}  # Use cosine similarity
-                )
-                logger.info(f"Created new collection: {self.collection_name}")
+        raise ValueError(f"Unknown vector store backend: {backend}")
 
-        except Exception as e:
-            logger.error(f"Error initializing ChromaDB: {e}")
-            raise
+    @property
+    def collection(self):
+        """ChromaDB collection (only available with the chroma backend)"""
+        return self.index.collection
+
+    def count(self) -> int:
+        """Get number of documents in the index"""
+        return self.index.count()
 
-    def add_documents(self, documents: List[Dict[str, Any]], batch_size: int = 100):
+    def add_documents(self, documents: List[Dict[str, Any]], batch_size: int = 100,
+                      workers: Optional[int] = None, resume: bool = False) -> Dict[str, Any]:
         """
         Add documents to the vector store
 
         Args:
             documents: List of documents with 'id', 'text', and 'metadata'
             batch_size: Number of documents to process at once
+            workers: Encoder processes (defaults to the store's ingest_workers)
+            resume: Skip documents already stored with the same content (after a crashed run)
+
+        Returns:
+            Ingestion report with throughput and per-stage timings
         """
         try:
+            if resume:
+                stored = self.index.get_metadata()
+                skipped = len(documents)
+                documents = [doc for doc in documents if not self._is_current(stored.get(doc['id']), doc)]
+                skipped -= len(documents)
+                logger.info(f"Resuming: {skipped} documents already stored")
+
             logger.info(f"Adding {len(documents)} documents to vector store...")
+            report = self._ingest(documents, batch_size, workers)
 
-            for i in range(0, len(documents), batch_size):
-                batch = documents[i:i + batch_size]
+            self.index.flush()
 
-                ids = [doc['id'] for doc in batch]
-                texts = [doc['text'] for doc in batch]
-                metadatas = [doc.get('metadata', {}) for doc in batch]
+            # Lexical index is built once here, at indexing time
+            self._lexical_add(documents)
+            self.lexical.save()
 
-                # Generate embeddings
-                embeddings = self.embedding_model.encode(
-                    texts,
-                    show_progress_bar=True,
-                    convert_to_numpy=True
-                ).tolist()
+            logger.info(f"Successfully added {len(documents)} documents")
+            logger.info(f"Total documents in collection: {self.count()}")
+            return report
 
-                # Add to collection
-                self.collection.add(
-                    ids=ids,
-                    embeddings=embeddings,
-                    documents=texts,
-                    metadatas=metadatas
-                )
+        except Exception as e:
+            logger.error(f"Error adding documents: {e}")
+            raise
 
-                logger.info(f"Added batch {i // batch_size + 1}/{(len(documents) - 1) // batch_size + 1}")
+    @staticmethod
+    def _partition_of(document: Dict[str, Any]) -> str:
+        return str(document.get('metadata', {}).get(PARTITION_FIELD) or '')
+
+    def _lexical_add(self, documents: List[Dict[str, Any]]):
+        """Index documents in the BM25 index, tagged with their partition"""
+        self.lexical.add(
+            [doc['id'] for doc in documents],
+            [doc['text'] for doc in documents],
+            partitions=[self._partition_of(doc) for doc in documents]
+        )
+
+    def _ingest(self, documents: List[Dict[str, Any]], batch_size: int, workers: Optional[int]) -> Dict[str, Any]:
+        """Encode and upsert documents through the pipelined ingestion path"""
+        pipeline = IngestionPipeline(
+            self,
+            workers=self.ingest_workers if workers is None else workers,
+            queue_depth=self.ingest_queue_depth,
+            pool_min_docs=self.ingest_pool_min_docs,
+            flush_every=self.ingest_flush_every
+        )
+        report = pipeline.run(documents, batch_size=batch_size)
+        logger.info(f"Ingestion: {report['documents']} documents in {report['seconds']}s "
+                    f"({report['docs_per_sec']} docs/sec), stages: {report['stage_seconds']}")
+        return report
+
+    def _is_current(self, metadata: Optional[Dict[str, Any]], document: Dict[str, Any]) -> bool:
+        """Whether stored metadata says the document is indexed with its current text, model and revision"""
+        return (metadata is not None
+                and metadata.get('content_hash') == content_hash(document['text'])
+                and metadata.get('embedding_model') == self.embedding_model_name
+                and metadata.get('embedding_revision') == self.embedding_revision)
+
+    def stamp_metadata(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Document metadata plus the content hash, embedding model and revision it was indexed with"""
+        return dict(
+            document.get('metadata', {}),
+            content_hash=content_hash(document['text']),
+            embedding_model=self.embedding_model_name,
+            embedding_revision=self.embedding_revision
+        )
+
+    def sync_documents(self, documents: List[Dict[str, Any]], batch_size: int = 100,
+                       dry_run: bool = False, workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Bring the index in line with a document set, embedding only what changed
 
-            logger.info(f"Successfully added {len(documents)} documents")
-            logger.info(f"Total documents in collection: {self.collection.count()}")
+        A stored document is kept when its content hash, embedding model and
+        embedding revision (which differs per ONNX/int8 variant) match; new
+        or changed documents are embedded and upserted, and documents no
+        longer in the set are deleted.
+
+        Args:
+            documents: Complete list of documents with 'id', 'text', and 'metadata'
+            batch_size: Number of documents embedded at once
+            dry_run: Only compute the changes
+            workers: Encoder processes (defaults to the store's ingest_workers)
+
+        Returns:
+            Report with added/updated/deleted/unchanged counts and throughput
+        """
+        try:
+            start = time.perf_counter()
+            stored = self.index.get_metadata()
+            wanted = {doc['id'] for doc in documents}
+
+            added, updated, unchanged = [], [], 0
+            for doc in documents:
+                metadata = stored.get(doc['id'])
+                if metadata is None:
+                    added.append(doc)
+                elif not self._is_current(metadata, doc):
+                    updated.append(doc)
+                else:
+                    unchanged += 1
+            deleted = [doc_id for doc_id in stored if doc_id not in wanted]
+
+            report = {
+                'added': len(added),
+                'updated': len(updated),
+                'deleted': len(deleted),
+                'unchanged': unchanged,
+                'dry_run': dry_run
+            }
+            logger.info(f"Sync plan: {report}")
+
+            if dry_run:
+                return report
+
+            changed = added + updated
+            cache_hits = self.embedding_cache.hits if self.embedding_cache else 0
+            ingest = self._ingest(changed, batch_size, workers) if changed else None
+
+            if deleted:
+                self.index.delete(deleted)
+            if changed or deleted:
+                self.index.flush()
+
+            # Lexical index follows the same changes (rebuilt if it drifted, e.g. never built)
+            self.lexical.delete(deleted)
+            if changed:
+                self._lexical_add(changed)
+
+            expected = {doc['id']: self._partition_of(doc) for doc in documents}
+            rebuilt = dict(zip(self.lexical.ids, self.lexical.partitions)) != expected
+            if rebuilt:
+                self.lexical.clear()
+                self._lexical_add(documents)
+            if changed or deleted or rebuilt or not os.path.exists(self.lexical.path):
+                self.lexical.save()
+
+            elapsed = time.perf_counter() - start
+            report.update(
+                seconds=round(elapsed, 3),
+                embedding_cache_hits=(self.embedding_cache.hits - cache_hits) if self.embedding_cache else 0,
+                docs_per_sec=ingest['docs_per_sec'] if ingest else 0.0,
+                stage_seconds=ingest['stage_seconds'] if ingest else {}
+            )
+            logger.info(f"Synced {len(documents)} documents: {report}")
+            return report
 
         except Exception as e:
-            logger.error(f"Error adding documents: {e}")
+            logger.error(f"Error syncing documents: {e}")
             raise
 
-    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def search(self, query: str, top_k: int = 5, mode: Optional[str] = None,
+               filters: Optional[Dict[str, Any]] = None, mmr_lambda: Optional[float] = None) -> List[Dict[str, Any]]:
         """
-        Search for relevant documents using semantic similarity
+        Search for relevant documents using semantic similarity, BM25, or both
 
         Args:
             query: Search query
             top_k: Number of top results to return
+            mode: 'dense', 'lexical' or 'hybrid' (defaults to the store's retrieval mode)
+            filters: Metadata filter, e.g. {'category': 'cardiovascular'} or {'category': [...]}
+            mmr_lambda: MMR trade-off for this search (defaults to the store's; 1.0 disables)
 
         Returns:
             List of dictionaries containing document information
         """
+        mode = mode or self.retrieval_mode
+        mmr_lambda = self.mmr_lambda if mmr_lambda is None else mmr_lambda
+        # MMR picks top_k out of a wider candidate pool
+        pool = top_k * self.mmr_candidates if mmr_lambda < 1.0 else top_k
+
         try:
-            # Refresh collection reference to avoid stale object
-            self.collection = self.client.get_collection(name=self.collection_name)
-
-            # Generate query embedding
-            query_embedding = self.embedding_model.encode(
-                query,
-                convert_to_numpy=True
-            ).tolist()
-
-            # Query collection
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=top_k,
-                include=['documents', 'metadatas', 'distances']
-            )
+            filters = normalize_filters(filters)
+
+            if mode == 'lexical':
+                with self.timings.time('lexical'):
+                    formatted_results = self._search_lexical(query, pool, filters)
+                logger.info(f"Found {len(formatted_results)} lexical results for query: '{query[:50]}...'")
+                return self._merge_neighbors(self._diversify(formatted_results, top_k, mmr_lambda))
 
-            # Format results
-            formatted_results = []
-            if results['ids'] and len(results['ids'][0]) > 0:
-                for idx in range(len(results['ids'][0])):
-                    formatted_results.append({
-                        'id': results['ids'][0][idx],
-                        'document': results['documents'][0][idx],
-                        'metadata': results['metadatas'][0][idx],
-                        'distance': results['distances'][0][idx],
-                        'similarity': 1 - results['distances'][0][idx]  # Convert distance to similarity
-                    })
+            # Generate query embedding (served from cache for repeated questions)
+            with self.timings.time('encode'):
+                query_embedding = self.embed_query(query)
+
+            if mode == 'hybrid':
+                formatted_results = self._search_hybrid(query, query_embedding, pool, filters)
+            else:
+                formatted_results = self._search_embeddings(query_embedding.reshape(1, -1), pool, filters)[0]
 
             logger.info(f"Found {len(formatted_results)} results for query: '{query[:50]}...'")
-            return formatted_results
+            return self._merge_neighbors(self._diversify(formatted_results, top_k, mmr_lambda))
 
         except Exception as e:
             logger.error(f"Error searching documents: {e}")
             return []
 
+    def search_many(self, queries: List[str], top_k: int = 5, mode: Optional[str] = None,
+                    filters: Optional[Dict[str, Any]] = None,
+                    mmr_lambda: Optional[float] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Search for several queries at once with one batched encode (and, in
+        dense mode, one collection query)
+
+        Args:
+            queries: Search queries
+            top_k: Number of top results to return per query
+            mode: 'dense', 'lexical' or 'hybrid' (defaults to the store's retrieval mode)
+            filters: Metadata filter applied to every query
+            mmr_lambda: MMR trade-off for these searches (defaults to the store's; 1.0 disables)
+
+        Returns:
+            One result list per query, in the same order and shape as search()
+        """
+        if not queries:
+            return []
+
+        mode = mode or self.retrieval_mode
+        mmr_lambda = self.mmr_lambda if mmr_lambda is None else mmr_lambda
+        pool = top_k * self.mmr_candidates if mmr_lambda < 1.0 else top_k
+
+        try:
+            filters = normalize_filters(filters)
+
+            if mode == 'lexical':
+                with self.timings.time('lexical'):
+                    hits_per_query = [self._search_lexical(query, pool, filters) for query in queries]
+            else:
+                with self.timings.time('encode_many'):
+                    query_embeddings = self.embed_queries(queries)
+
+                if mode == 'hybrid':
+                    hits_per_query = [self._search_hybrid(query, query_embedding, pool, filters)
+                                      for query, query_embedding in zip(queries, query_embeddings)]
+                else:
+                    hits_per_query = self._search_embeddings(query_embeddings, pool, filters)
+
+            results = [self._merge_neighbors(self._diversify(hits, top_k, mmr_lambda)) for hits in hits_per_query]
+
+            logger.info(f"Batched {mode} search for {len(queries)} queries")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error searching documents: {e}")
+            return [[] for _ in queries]
+
+    def _diversify(self, results: List[Dict[str, Any]], top_k: int, mmr_lambda: float) -> List[Dict[str, Any]]:
+        """
+        Re-select top_k results with maximal marginal relevance
+
+        Relevance is each result's similarity; redundancy is computed from
+        the embeddings already stored in the index, so nothing is re-encoded.
+
+        Args:
+            results: Ranked candidate results
+            top_k: Number of results to keep
+            mmr_lambda: Relevance/diversity trade-off (1.0 keeps the ranking)
+
+        Returns:
+            Selected results in pick order
+        """
+        if mmr_lambda >= 1.0 or len(results) <= 1:
+            return results[:top_k]
+
+        with self.timings.time('mmr'):
+            stored = self.index.get([result['id'] for result in results], include_embeddings=True)
+            candidates = [result for result in results if result['id'] in stored]
+            if not candidates:
+                return results[:top_k]
+
+            picked = maximal_marginal_relevance(
+                np.array([result.get('similarity', 0.0) for result in candidates]),
+                np.stack([stored[result['id']]['embedding'] for result in candidates]),
+                top_k,
+                mmr_lambda
+            )
+            return [candidates[idx] for idx in picked]
+
+    def _search_embeddings(self, query_embeddings: np.ndarray, top_k: int,
+                           filters: Optional[Dict[str, List[Any]]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Query the index backend with precomputed embeddings
+
+        Args:
+            query_embeddings: Query embedding matrix, one row per query
+            top_k: Number of top results to return per query
+            filters: Normalized metadata filter, evaluated by the backend
+
+        Returns:
+            One formatted result list per query embedding
+        """
+        with self.timings.time('query'):
+            if filters:
+                return self.index.query(query_embeddings, top_k, filters=filters)
+            return self.index.query(query_embeddings, top_k)
+
+    def _lexical_hits(self, query: str, top_k: int, filters: Optional[Dict[str, List[Any]]]):
+        """
+        BM25 candidates; the partition filter is applied inside the lexical
+        index, any other fields are checked against stored metadata
+
+        Returns:
+            Tuple of ((id, score) pairs, fetched documents by id or None)
+        """
+        self.lexical.refresh()
+        partitions = filters.get(PARTITION_FIELD) if filters else None
+        others = {field: values for field, values in (filters or {}).items() if field != PARTITION_FIELD}
+
+        if not others:
+            return self.lexical.search(query, top_k, partitions=partitions), None
+
+        hits = self.lexical.search(query, top_k * self.hybrid_candidates, partitions=partitions)
+        documents = self.index.get([doc_id for doc_id, _ in hits])
+        hits = [(doc_id, score) for doc_id, score in hits
+                if doc_id in documents and matches(documents[doc_id]['metadata'], others)][:top_k]
+        return hits, documents
+
+    def _search_lexical(self, query: str, top_k: int,
+                        filters: Optional[Dict[str, List[Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        BM25-only search (no query encoding)
+
+        'similarity' is the BM25 score relative to the best hit, since no
+        dense score is computed on this path; the raw score is in 'bm25_score'.
+        """
+        hits, documents = self._lexical_hits(query, top_k, filters)
+        if not hits:
+            return []
+
+        if documents is None:
+            documents = self.index.get([doc_id for doc_id, _ in hits])
+        best = hits[0][1]
+
+        results = []
+        for doc_id, score in hits:
+            if doc_id not in documents:
+                continue
+            result = dict(documents[doc_id], bm25_score=score, similarity=score / best)
+            result['distance'] = 1 - result['similarity']
+            results.append(result)
+        return results
+
+    def _search_hybrid(self, query: str, query_embedding: np.ndarray, top_k: int,
+                       filters: Optional[Dict[str, List[Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Fuse dense and BM25 rankings with reciprocal rank fusion
+
+        Every returned document keeps its true dense cosine similarity, so
+        downstream consumers can treat hybrid results like dense ones.
+        """
+        pool = top_k * self.hybrid_candidates
+        dense = self._search_embeddings(query_embedding.reshape(1, -1), pool, filters)[0]
+
+        with self.timings.time('lexical'):
+            lexical, _ = self._lexical_hits(query, pool, filters)
+
+        with self.timings.time('fusion'):
+            fused = reciprocal_rank_fusion(
+                [[result['id'] for result in dense], [doc_id for doc_id, _ in lexical]],
+                k=self.rrf_k
+            )[:top_k]
+
+            by_id = {result['id']: result for result in dense}
+            bm25 = dict(lexical)
+
+            # Lexical-only hits need their embedding to report a dense similarity
+            missing = [doc_id for doc_id, _ in fused if doc_id not in by_id]
+            if missing:
+                query_unit = query_embedding / max(float(np.linalg.norm(query_embedding)), 1e-12)
+                for doc_id, doc in self.index.get(missing, include_embeddings=True).items():
+                    embedding = doc.pop('embedding')
+                    similarity = float(embedding @ query_unit / max(float(np.linalg.norm(embedding)), 1e-12))
+                    by_id[doc_id] = dict(doc, similarity=similarity, distance=1 - similarity)
+
+            results = []
+            for doc_id, fused_score in fused:
+                if doc_id in by_id:
+                    results.append(dict(by_id[doc_id], rrf_score=fused_score, bm25_score=bm25.get(doc_id, 0.0)))
+
+        return results
+
+    def _merge_neighbors(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Widen chunk hits with their neighbouring chunks
+
+        Each hit is expanded to neighbor_chunks chunks on either side within
+        its parent document; hits from the same parent whose windows touch
+        are merged into one passage, which keeps the best hit's rank and
+        similarity. Results without chunk metadata are passed through.
+
+        Args:
+            results: Ranked search results
+
+        Returns:
+            Ranked results with merged passages
+        """
+        if not self.neighbor_chunks or not results:
+            return results
+
+        with self.timings.time('merge'):
+            groups = []  # [parent_id, first chunk, last chunk, best hit, hit ids]
+            for result in results:
+                metadata = result.get('metadata') or {}
+                if 'parent_id' not in metadata:
+                    groups.append([None, 0, 0, result, [result['id']]])
+                    continue
+
+                index = metadata['chunk_index']
+                low = max(index - self.neighbor_chunks, 0)
+                high = min(index + self.neighbor_chunks, metadata['chunk_count'] - 1)
+
+                for group in groups:
+                    if group[0] == metadata['parent_id'] and low <= group[2] + 1 and high >= group[1] - 1:
+                        group[1], group[2] = min(group[1], low), max(group[2], high)
+                        group[4].append(result['id'])
+                        break
+                else:
+                    groups.append([metadata['parent_id'], low, high, result, [result['id']]])
+
+            wanted = [chunk_id(parent_id, idx) for parent_id, low, high, _, _ in groups
+                      if parent_id is not None for idx in range(low, high + 1)]
+            chunks = self.index.get(wanted)
+
+            merged = []
+            for parent_id, low, high, best, hit_ids in groups:
+                if parent_id is None:
+                    merged.append(best)
+                    continue
+
+                window = [chunks[chunk_id(parent_id, idx)] for idx in range(low, high + 1)
+                          if chunk_id(parent_id, idx) in chunks]
+                if not window:
+                    merged.append(best)
+                    continue
+
+                merged.append(dict(
+                    best,
+                    document=merge_chunks(window),
+                    metadata=dict(best['metadata'], chunk_start=low, chunk_end=high),
+                    merged_chunks=hit_ids
+                ))
+
+        return merged
+
+    def encode_texts(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False,
+                     persist: bool = True) -> np.ndarray:
+        """
+        Encode texts, reading and filling the persistent embedding cache
+
+        Args:
+            texts: Texts to encode
+            batch_size: Texts per forward pass for cache misses
+            show_progress_bar: Display a progress bar while encoding misses
+            persist: Append newly encoded embeddings to the cache
+
+        Returns:
+            Float32 embedding matrix, one row per text
+        """
+        if self.embedding_cache is None:
+            return self.encoder.encode(texts, batch_size=batch_size, show_progress_bar=show_progress_bar)
+
+        embeddings, missing = self.lookup_cached(texts)
+        if missing:
+            encoded = self.encoder.encode([texts[idx] for idx in missing], batch_size=batch_size,
+                                          show_progress_bar=show_progress_bar)
+            embeddings[missing] = encoded
+            if persist:
+                self.store_cached([texts[idx] for idx in missing], encoded)
+
+        return embeddings
+
+    def lookup_cached(self, texts: List[str]):
+        """
+        Fill an embedding matrix from the persistent cache
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            Tuple of (float32 matrix with cached rows filled in, indices of cache misses)
+        """
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        if self.embedding_cache is None:
+            return embeddings, list(range(len(texts)))
+
+        missing = []
+        for idx, embedding in enumerate(self.embedding_cache.get_many(texts)):
+            if embedding is None:
+                missing.append(idx)
+            else:
+                embeddings[idx] = embedding
+        return embeddings, missing
+
+    def store_cached(self, texts: List[str], embeddings: np.ndarray):
+        """
+        Append freshly encoded embeddings to the persistent cache
+
+        Args:
+            texts: Encoded texts
+            embeddings: Embedding matrix, one row per text
+        """
+        if self.embedding_cache is None:
+            return
+        try:
+            self.embedding_cache.put_many(texts, embeddings)
+        except OSError as e:
+            logger.warning(f"Could not write embedding cache: {e}")
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Get the embedding for a query, using the LRU cache when possible
+
+        Args:
+            query: Search query
+
+        Returns:
+            Query embedding vector
+        """
+        key = normalize_query(query)
+
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            embedding = self.encode_texts([key], persist=self.cache_query_embeddings)[0]
+            self.query_cache.put(key, embedding)
+
+        return embedding
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Get embeddings for several queries, encoding all cache misses in one batch
+
+        Args:
+            queries: Search queries
+
+        Returns:
+            Matrix of query embeddings, one row per query
+        """
+        keys = [normalize_query(query) for query in queries]
+        embeddings = {}
+
+        for key in keys:
+            if key not in embeddings:
+                embeddings[key] = self.query_cache.get(key)
+
+        missing = [key for key, embedding in embeddings.items() if embedding is None]
+        if missing:
+            encoded = self.encode_texts(missing, batch_size=len(missing), persist=self.cache_query_embeddings)
+            for key, embedding in zip(missing, encoded):
+                embeddings[key] = embedding
+                self.query_cache.put(key, embedding)
+
+        return np.stack([embeddings[key] for key in keys]).astype(np.float32)
+
+    def fingerprint(self) -> Dict[str, Any]:
+        """Identity of the embedding model the index must have been built with"""
+        return {
+            'embedding_model': self.embedding_model_name,
+            'embedding_revision': self.embedding_revision,
+            'dimension': self.embedding_dim
+        }
+
+    def kb_version(self) -> Tuple:
+        """
+        Version of the served knowledge base, for caches of derived answers
+
+        Changes whenever any process publishes index changes (the generation
+        marker is bumped on every flush, snapshot import and reset) or the
+        embedding model changes. Costs one os.stat().
+        """
+        return (self.embedding_model_name, self.embedding_revision, self.index.generation.current())
+
+    def export_snapshot(self, path: str, dtype: str = 'float32') -> Dict[str, Any]:
+        """
+        Write the whole index to a single snapshot file
+
+        Args:
+            path: Snapshot file to write
+            dtype: Stored embedding dtype ('float32' or 'float16' to halve the file)
+
+        Returns:
+            Snapshot header
+        """
+        try:
+            from .numpy_index import group_by_partition, normalize_rows
+
+            ids, embeddings, documents, metadatas = self.index.export()
+            embeddings = normalize_rows(embeddings) if len(ids) else \
+                np.empty((0, self.embedding_dim), dtype=np.float32)
+
+            # Same row grouping the NumPy index publishes, so partitions map directly
+            embeddings, ids, documents, metadatas, partitions = group_by_partition(
+                embeddings, ids, documents, metadatas)
+
+            return write_snapshot(path, embeddings, ids, documents, metadatas, self.fingerprint(),
+                                  dtype=dtype, partitions=partitions,
+                                  manifest={'collection_name': self.collection_name, 'source': self.backend})
+
+        except Exception as e:
+            logger.error(f"Error exporting snapshot: {e}")
+            raise
+
+    def load_snapshot(self, path: str, verify: bool = True, if_stale: bool = False,
+                      batch_size: int = 1000) -> Dict[str, Any]:
+        """
+        Replace the index with a snapshot, without running the embedding model
+
+        The NumPy backend publishes the snapshot file itself as its current
+        version and memory-maps it; ChromaDB is filled from it in batches.
+        The BM25 index is rebuilt from the snapshot texts.
+
+        Args:
+            path: Snapshot file
+            verify: Check the snapshot checksum before using it
+            if_stale: Skip the load when the index already holds this snapshot
+            batch_size: Documents written per batch (ChromaDB only)
+
+        Returns:
+            Report with the document count, whether it was loaded, and seconds taken
+        """
+        try:
+            start = time.perf_counter()
+            snapshot = IndexSnapshot(path, verify=False)
+            snapshot.check_fingerprint(**self.fingerprint())
+
+            if if_stale and self._holds_snapshot(snapshot):
+                logger.info(f"Index already holds snapshot {path}")
+                return {'documents': self.count(), 'loaded': False, 'seconds': 0.0}
+
+            if verify:
+                snapshot.verify()
+
+            if self.backend == 'numpy':
+                self.index.import_snapshot(snapshot)
+                ids, documents = list(self.index.ids), list(self.index.documents)
+                metadatas = list(self.index.metadatas)
+            else:
+                from .numpy_index import MappedStrings
+                ids = list(MappedStrings.from_arrays(*snapshot.strings('ids')))
+                documents = list(MappedStrings.from_arrays(*snapshot.strings('documents')))
+                metadatas = list(MappedStrings.from_arrays(*snapshot.strings('metadatas'), as_json=True))
+
+                self.index.reset()
+                for offset in range(0, len(ids), batch_size):
+                    batch = slice(offset, offset + batch_size)
+                    self.index.upsert(ids[batch], np.asarray(snapshot.embeddings[batch], dtype=np.float32),
+                                      documents[batch], metadatas[batch])
+                self.index.flush()
+                self.index.mark_snapshot(snapshot.checksum)
+
+            self.lexical.clear()
+            self._lexical_add([{'id': doc_id, 'text': text, 'metadata': metadata}
+                               for doc_id, text, metadata in zip(ids, documents, metadatas)])
+            self.lexical.save()
+
+            elapsed = time.perf_counter() - start
+            logger.info(f"Loaded snapshot {path}: {len(ids)} documents in {elapsed:.3f}s")
+            return {'documents': len(ids), 'loaded': True, 'seconds': round(elapsed, 3)}
+
+        except Exception as e:
+            logger.error(f"Error loading snapshot: {e}")
+            raise
+
+    def _holds_snapshot(self, snapshot: IndexSnapshot) -> bool:
+        """Whether the index was loaded from this exact snapshot"""
+        if self.backend == 'numpy':
+            return self.index.manifest.get('snapshot_checksum') == snapshot.checksum
+        return self.index.snapshot_checksum() == snapshot.checksum
+
     def delete_collection(self):
         """Delete the entire collection (use with caution)"""
         try:
-            self.client.delete_collection(name=self.collection_name)
-            logger.info(f"Deleted collection: {self.collection_name}")
+            self.index.delete_collection()
+            self.lexical.clear()
+            self.lexical.save()
         except Exception as e:
             logger.error(f"Error deleting collection: {e}")
             raise
@@ -171,18 +879,80 @@ class VectorStore:
     def reset_collection(self):
         """Reset collection (delete and recreate)"""
         try:
-            self.delete_collection()
-            self._initialize_chromadb()
+            self.index.reset()
+            self.lexical.clear()
+            self.lexical.save()
             logger.info("Collection reset successfully")
         except Exception as e:
             logger.error(f"Error resetting collection: {e}")
             raise
 
+    def after_fork(self):
+        """Re-open per-process index handles after fork (model weights stay shared)"""
+        self.index.after_fork()
+
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store"""
         return {
             'collection_name': self.collection_name,
-            'document_count': self.collection.count(),
-            'embedding_model': self.embedding_model.get_sentence_embedding_dimension(),
-            'embedding_dimension': self.embedding_dim
+            'document_count': self.count(),
+            'embedding_model': self.embedding_model_name,
+            'embedding_dimension': self.embedding_dim,
+            'encoder': self.encoder.get_stats(),
+            'query_cache': self.query_cache.get_stats(),
+            'embedding_cache': self.embedding_cache.get_stats() if self.embedding_cache else None,
+            'index': self.index.get_stats(),
+            'retrieval_mode': self.retrieval_mode,
+            'mmr_lambda': self.mmr_lambda,
+            'lexical_index': self.lexical.get_stats(),
+            'search_timings': self.timings.get_stats()
+        }
+
+
+def create_vector_store(config) -> VectorStore:
+    """
+    Build a vector store from a Config class
+
+    Args:
+        config: Configuration class or instance (see config.Config)
+
+    Returns:
+        Configured VectorStore
+    """
+    return VectorStore(
+        db_path=config.CHROMA_DB_PATH,
+        collection_name=config.COLLECTION_NAME,
+        embedding_model_name=config.EMBEDDING_MODEL,
+        query_cache_size=config.QUERY_CACHE_SIZE,
+        query_cache_ttl=config.QUERY_CACHE_TTL,
+        query_cache_path=config.QUERY_CACHE_PATH,
+        backend=config.VECTOR_BACKEND,
+        index_path=config.NUMPY_INDEX_PATH,
+        index_dtype=config.NUMPY_INDEX_DTYPE,
+        encoder=create_encoder_from_config(config),
+        retrieval_mode=config.RETRIEVAL_MODE,
+        hybrid_candidates=config.HYBRID_CANDIDATES,
+        rrf_k=config.RRF_K,
+        neighbor_chunks=config.CHUNK_NEIGHBORS,
+        embedding_cache_path=config.EMBEDDING_CACHE_PATH,
+        embedding_revision=embedding_revision(config),
+        cache_query_embeddings=config.EMBEDDING_CACHE_QUERIES,
+        encoder_options={
+            'model_name': config.EMBEDDING_MODEL,
+            'backend': config.EMBEDDING_BACKEND,
+            'onnx_model_dir': config.ONNX_MODEL_DIR,
+            'onnx_quantized': config.ONNX_QUANTIZED,
+            'onnx_threads': config.ONNX_NUM_THREADS
+        },
+        ingest_workers=config.INGEST_WORKERS,
+        ingest_queue_depth=config.INGEST_QUEUE_DEPTH,
+        ingest_pool_min_docs=config.INGEST_POOL_MIN_DOCS,
+        ingest_flush_every=config.INGEST_FLUSH_EVERY,
+        mmr_lambda=config.MMR_LAMBDA,
+        mmr_candidates=config.MMR_CANDIDATES,
+        hnsw_params={
+            'M': config.HNSW_M,
+            'construction_ef': config.HNSW_EF_CONSTRUCTION,
+            'search_ef': config.HNSW_EF_SEARCH
         }
+    )
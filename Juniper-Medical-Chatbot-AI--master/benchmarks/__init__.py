@@ -0,0 +1,5 @@
+"""
+Juniper Benchmarks
+Offline latency / quality benchmarks, run from the project root, e.g.
+    python -m benchmarks.vector_backends
+"""
@@ -0,0 +1,157 @@
+"""
+ANN Tuning Benchmark
+Recall-vs-latency of HNSW settings (M, ef_construction, ef_search) against
+exact brute-force search, on the real corpus and on synthetic corpora
+scaled to 100k+ chunks
+
+Synthetic chunks are real chunk embeddings plus Gaussian noise, so they keep
+the topical cluster structure of the knowledge base (uniform random vectors
+would make HNSW look far worse than it is on text embeddings). Every
+(M, ef_construction) graph is built once and swept over ef_search with
+hnswlib, the library ChromaDB runs on; --chroma also times each setting
+end to end through a ChromaDB collection.
+
+Usage:
+    python -m benchmarks.ann_tuning [--sizes 0 100000] [--m 8 16 32]
+        [--ef-construction 100 200] [--ef-search 10 20 50 100 200] [--chroma]
+"""
+
+import argparse
+import itertools
+import tempfile
+import time
+import numpy as np
+
+from backend.chroma_index import ChromaIndex
+from backend.encoders import create_local_encoder
+from backend.numpy_index import normalize_rows, top_k_indices
+from benchmarks.common import SAMPLE_QUERIES, summarize_latencies, time_call, print_row
+from config import Config
+from initialize_kb import prepare_documents
+
+try:
+    import hnswlib
+except ImportError:  # ChromaDB builds without the Python hnswlib binding
+    hnswlib = None
+
+
+def synthesize(embeddings: np.ndarray, size: int, noise: float, seed: int = 0) -> np.ndarray:
+    """Scale a corpus to `size` rows by jittering randomly chosen real rows"""
+    rng = np.random.default_rng(seed)
+    extra = size - len(embeddings)
+    if extra <= 0:
+        return embeddings[:size]
+
+    base = embeddings[rng.integers(0, len(embeddings), extra)]
+    jitter = rng.standard_normal(base.shape).astype(np.float32) * noise / np.sqrt(embeddings.shape[1])
+    return np.concatenate([embeddings, normalize_rows(base + jitter)])
+
+
+def recall(found: np.ndarray, exact: np.ndarray) -> float:
+    """Mean fraction of the exact top-k returned by the ANN search"""
+    return float(np.mean([len(set(row) & set(truth)) / len(truth) for row, truth in zip(found, exact)]))
+
+
+def sweep_hnswlib(corpus, queries, exact, args):
+    """One graph per (M, ef_construction), swept over ef_search"""
+    for m, ef_construction in itertools.product(args.m, args.ef_construction):
+        graph = hnswlib.Index(space='cosine', dim=corpus.shape[1])
+        start = time.perf_counter()
+        graph.init_index(max_elements=len(corpus), M=m, ef_construction=ef_construction)
+        graph.add_items(corpus, np.arange(len(corpus)))
+        build_seconds = time.perf_counter() - start
+
+        for ef_search in args.ef_search:
+            graph.set_ef(max(ef_search, args.top_k))
+            found, _ = graph.knn_query(queries, k=args.top_k)
+            samples = []
+            for query in queries:
+                samples.extend(time_call(lambda: graph.knn_query(query, k=args.top_k), args.repeat))
+
+            print_row(f"M={m} efC={ef_construction} efS={ef_search}", summarize_latencies(samples),
+                      f"recall@{args.top_k} {recall(found, exact):.3f}   build {build_seconds:.1f}s")
+
+
+def sweep_chroma(corpus, queries, exact, args):
+    """One ChromaDB collection per setting (ChromaDB fixes HNSW settings at creation)"""
+    ids = [f"chunk_{i:07d}" for i in range(len(corpus))]
+    texts = [''] * len(corpus)
+    metadatas = [{'category': 'bench'}] * len(corpus)
+
+    for m, ef_construction, ef_search in itertools.product(args.m, args.ef_construction, args.ef_search):
+        with tempfile.TemporaryDirectory() as tmp:
+            index = ChromaIndex(tmp, 'bench', hnsw_params={
+                'M': m, 'construction_ef': ef_construction, 'search_ef': ef_search})
+
+            start = time.perf_counter()
+            for offset in range(0, len(ids), 5000):
+                batch = slice(offset, offset + 5000)
+                index.add(ids[batch], corpus[batch], texts[batch], metadatas[batch])
+            index.flush()
+            build_seconds = time.perf_counter() - start
+
+            found = [[int(r['id'].split('_')[1]) for r in rows] for rows in index.query(queries, args.top_k)]
+            samples = []
+            for query in queries:
+                single = query.reshape(1, -1)
+                samples.extend(time_call(lambda: index.query(single, args.top_k), args.repeat))
+
+            print_row(f"chroma M={m} efC={ef_construction} efS={ef_search}", summarize_latencies(samples),
+                      f"recall@{args.top_k} {recall(found, exact):.3f}   build {build_seconds:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall vs latency of HNSW settings against exact search")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 100000],
+                        help="Corpus sizes (0 = the real corpus only)")
+    parser.add_argument('--m', type=int, nargs='+', default=[8, 16, 32])
+    parser.add_argument('--ef-construction', type=int, nargs='+', default=[100, 200])
+    parser.add_argument('--ef-search', type=int, nargs='+', default=[10, 20, 50, 100, 200])
+    parser.add_argument('--top-k', type=int, default=Config.TOP_K_RESULTS)
+    parser.add_argument('--repeat', type=int, default=20, help="Timed searches per query")
+    parser.add_argument('--noise', type=float, default=0.6, help="Jitter of synthetic chunks")
+    parser.add_argument('--chroma', action='store_true', help="Also time every setting through ChromaDB")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("JUNIPER - ANN Tuning Benchmark")
+    print("=" * 60)
+
+    encoder = create_local_encoder(
+        Config.EMBEDDING_MODEL,
+        Config.EMBEDDING_BACKEND,
+        onnx_model_dir=Config.ONNX_MODEL_DIR,
+        onnx_quantized=Config.ONNX_QUANTIZED,
+        onnx_threads=Config.ONNX_NUM_THREADS
+    )
+    documents = prepare_documents()
+    real = normalize_rows(encoder.encode([doc['text'] for doc in documents]))
+    queries = normalize_rows(encoder.encode(SAMPLE_QUERIES))
+
+    print(f"\nConfigured: M={Config.HNSW_M} ef_construction={Config.HNSW_EF_CONSTRUCTION} "
+          f"ef_search={Config.HNSW_EF_SEARCH}, top_k={args.top_k}")
+    if hnswlib is None and not args.chroma:
+        print("hnswlib is not importable; falling back to ChromaDB collections (--chroma)")
+        args.chroma = True
+
+    for size in args.sizes:
+        corpus = real if size <= 0 else synthesize(real, size, args.noise)
+        print(f"\nCorpus: {len(corpus)} chunks x {corpus.shape[1]} dims "
+              f"({'real' if size <= 0 else f'{len(real)} real + synthetic'}), {len(queries)} queries\n")
+
+        exact, _ = top_k_indices(queries @ corpus.T, args.top_k)
+        samples = []
+        for query in queries:
+            samples.extend(time_call(lambda: top_k_indices(query.reshape(1, -1) @ corpus.T, args.top_k), args.repeat))
+        print_row("exact (brute force)", summarize_latencies(samples), "recall 1.000")
+
+        if hnswlib is not None:
+            sweep_hnswlib(corpus, queries, exact, args)
+        if args.chroma:
+            sweep_chroma(corpus, queries, exact, args)
+
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Shared Benchmark Helpers
+Sample queries and latency summaries used by the benchmark scripts
+"""
+
+from typing import List, Dict
+import numpy as np
+import time
+
+# Suggested prompts from templates/index.html plus common phrasings
+SAMPLE_QUERIES = [
+    "What are the symptoms of Type 2 diabetes?",
+    "How do antibiotics work?",
+    "What is cardiovascular disease?",
+    "How does the immune system work?",
+    "what is diabetes",
+    "What causes high blood pressure?",
+    "Side effects of NSAIDs",
+    "When is CABG surgery needed?",
+    "How are ARBs different from ACE inhibitors?",
+    "What are the early signs of a stroke?",
+    "How is asthma treated?",
+    "What is the difference between a cold and the flu?",
+]
+
+
+def summarize_latencies(samples_ms: List[float]) -> Dict[str, float]:
+    """
+    Summarize latency samples
+
+    Args:
+        samples_ms: Latency samples in milliseconds
+
+    Returns:
+        Dictionary with mean, p50, p95 and max in milliseconds
+    """
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        'mean_ms': float(samples.mean()),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p95_ms': float(np.percentile(samples, 95)),
+        'max_ms': float(samples.max())
+    }
+
+
+def time_call(fn, repeat: int) -> List[float]:
+    """
+    Time repeated calls of a function
+
+    Args:
+        fn: Zero-argument callable
+        repeat: Number of timed calls
+
+    Returns:
+        Latency samples in milliseconds
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def print_row(label: str, summary: Dict[str, float], extra: str = ''):
+    """Print one aligned benchmark result row"""
+    print(f"  {label:<28} mean {summary['mean_ms']:8.3f} ms   p50 {summary['p50_ms']:8.3f} ms   "
+          f"p95 {summary['p95_ms']:8.3f} ms   {extra}")
@@ -0,0 +1,84 @@
+"""
+Embedding Backend Benchmark
+Per-query encode latency and process memory for each embedding backend.
+Every backend runs in its own subprocess so RSS is not shared between them.
+
+Usage:
+    python -m benchmarks.embedding_backends [--repeat 200]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+from benchmarks.common import SAMPLE_QUERIES, summarize_latencies, time_call, print_row
+
+BACKENDS = {
+    'torch fp32': ('sentence-transformers', False),
+    'onnx fp32': ('onnx', False),
+    'onnx int8': ('onnx', True),
+}
+
+
+def run_child(backend: str, quantized: bool, repeat: int):
+    """Measure one backend in this process and print the result as JSON"""
+    from backend.encoders import create_local_encoder
+    from backend.metrics import get_process_memory
+    from config import Config
+
+    encoder = create_local_encoder(
+        Config.EMBEDDING_MODEL,
+        backend,
+        onnx_model_dir=Config.ONNX_MODEL_DIR,
+        onnx_quantized=quantized,
+        onnx_threads=Config.ONNX_NUM_THREADS
+    )
+    encoder.encode(SAMPLE_QUERIES)  # warm up
+
+    samples = []
+    for query in SAMPLE_QUERIES:
+        samples.extend(time_call(lambda: encoder.encode([query]), repeat))
+
+    print(json.dumps({
+        'latency': summarize_latencies(samples),
+        'memory': get_process_memory(),
+        'torch_imported': 'torch' in sys.modules
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument('--repeat', type=int, default=200, help="Timed encodes per query")
+    parser.add_argument('--child', nargs=2, metavar=('BACKEND', 'QUANTIZED'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1] == 'true', args.repeat)
+        return
+
+    print("=" * 60)
+    print("JUNIPER - Embedding Backend Benchmark")
+    print("=" * 60)
+    print(f"\n{len(SAMPLE_QUERIES)} queries x {args.repeat} single-query encodes\n")
+
+    for label, (backend, quantized) in BACKENDS.items():
+        result = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.embedding_backends', '--repeat', str(args.repeat),
+             '--child', backend, 'true' if quantized else 'false'],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(f"  {label:<28} failed: {result.stderr.strip().splitlines()[-1:]}")
+            continue
+
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        memory = report['memory']
+        print_row(label, report['latency'],
+                  f"RSS {memory.get('vmrss_mb', 0):7.1f} MB   torch imported: {report['torch_imported']}")
+
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    main()
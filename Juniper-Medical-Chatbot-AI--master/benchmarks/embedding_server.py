@@ -0,0 +1,83 @@
+"""
+Embedding Server Benchmark
+Compares burst encode throughput of the micro-batching embedding server
+against one-at-a-time in-process encoding
+
+Usage:
+    python -m benchmarks.embedding_server [--clients 32] [--requests 20] [--max-batch 64] [--max-wait-ms 5]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from backend.embedding_server import EmbeddingServer, RemoteEncoder
+from backend.encoders import SentenceTransformerEncoder
+from benchmarks.common import SAMPLE_QUERIES
+from config import Config
+
+
+def run_burst(encoder, clients: int, requests: int) -> float:
+    """Fire requests from concurrent clients; return queries per second"""
+    def client(offset):
+        for i in range(requests):
+            encoder.encode([SAMPLE_QUERIES[(offset + i) % len(SAMPLE_QUERIES)]])
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return clients * requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the embedding server")
+    parser.add_argument('--clients', type=int, default=32, help="Concurrent clients (simulated workers/greenlets)")
+    parser.add_argument('--requests', type=int, default=20, help="Single-query requests per client")
+    parser.add_argument('--max-batch', type=int, default=Config.EMBEDDING_SERVER_MAX_BATCH)
+    parser.add_argument('--max-wait-ms', type=float, default=Config.EMBEDDING_SERVER_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("JUNIPER - Embedding Server Benchmark")
+    print("=" * 60)
+
+    encoder = SentenceTransformerEncoder(Config.EMBEDDING_MODEL)
+    encoder.encode(SAMPLE_QUERIES)  # warm up
+
+    lock = threading.Lock()
+
+    class SerialEncoder:
+        """In-process encoding, one request at a time (what each worker does today)"""
+        def encode(self, texts):
+            with lock:
+                return encoder.encode(texts)
+
+    serial_qps = run_burst(SerialEncoder(), args.clients, args.requests)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, 'embed.sock')
+        server = EmbeddingServer(socket_path, encoder, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        remote = RemoteEncoder(socket_path, Config.EMBEDDING_MODEL)
+        batched_qps = run_burst(remote, args.clients, args.requests)
+        batching = remote.server_info()['batching']
+
+        server.shutdown()
+        server.server_close()
+
+    print(f"\n{args.clients} clients x {args.requests} requests")
+    print(f"  In-process, one at a time : {serial_qps:8.1f} queries/s")
+    print(f"  Embedding server          : {batched_qps:8.1f} queries/s "
+          f"(avg batch {batching['avg_batch_size']}, {batching['batches']} batches)")
+    print(f"  Speedup                   : {batched_qps / serial_qps:8.2f}x")
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+MMR Evaluation
+Context-token savings of maximal marginal relevance re-selection against
+answer-quality proxies (recall of relevant topics, MRR, distinct topics and
+pairwise redundancy of the retrieved passages) on the golden query set
+
+Usage:
+    python -m benchmarks.mmr_eval [--top-k 5] [--lambdas 1.0 0.9 0.7 0.5 0.3]
+"""
+
+import argparse
+import numpy as np
+
+from backend.vector_store import create_vector_store
+from backend.retrieval_policy import estimate_tokens
+from benchmarks.common import summarize_latencies, time_call, print_row
+from benchmarks.retrieval_eval import load_golden_queries, score_results
+from config import Config
+
+
+def redundancy(vector_store, results):
+    """Mean pairwise cosine similarity of the retrieved passages (stored embeddings)"""
+    if len(results) < 2:
+        return 0.0
+
+    stored = vector_store.index.get([result['id'] for result in results], include_embeddings=True)
+    embeddings = np.stack([stored[result['id']]['embedding'] for result in results if result['id'] in stored])
+    units = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    pairwise = units @ units.T
+    upper = np.triu_indices(len(units), k=1)
+    return float(pairwise[upper].mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate MMR re-selection on the golden query set")
+    parser.add_argument('--top-k', type=int, default=Config.TOP_K_RESULTS)
+    parser.add_argument('--lambdas', type=float, nargs='+', default=[1.0, 0.9, 0.7, 0.5, 0.3])
+    parser.add_argument('--repeat', type=int, default=10, help="Timed searches per query")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("JUNIPER - MMR Evaluation")
+    print("=" * 60)
+
+    golden = load_golden_queries()
+    vector_store = create_vector_store(Config)
+    if vector_store.count() == 0:
+        print("Vector store is empty. Please run 'python initialize_kb.py' first")
+        return
+
+    vector_store.embed_queries([item['query'] for item in golden])
+
+    print(f"\n{len(golden)} golden queries, top_k={args.top_k}, mode={vector_store.retrieval_mode}, "
+          f"candidates={args.top_k * vector_store.mmr_candidates}\n")
+
+    baseline_tokens = None
+    for mmr_lambda in args.lambdas:
+        samples, recalls, reciprocal_ranks, tokens, topics, overlaps = [], [], [], [], [], []
+        for item in golden:
+            search = lambda: vector_store.search(item['query'], args.top_k, mmr_lambda=mmr_lambda)
+            samples.extend(time_call(search, args.repeat))
+            results = search()
+
+            recall, rr = score_results(results, item['relevant'])
+            recalls.append(recall)
+            reciprocal_ranks.append(rr)
+            tokens.append(sum(estimate_tokens(result['document'].strip()) for result in results))
+            topics.append(len({result['metadata'].get('title') for result in results}))
+            overlaps.append(redundancy(vector_store, results))
+
+        # Distinct topics can repeat facts; the token cost that matters is per distinct topic
+        tokens_per_topic = np.mean(tokens) / max(np.mean(topics), 1)
+        if baseline_tokens is None:
+            baseline_tokens = tokens_per_topic
+
+        print_row(f"lambda={mmr_lambda:.2f}", summarize_latencies(samples),
+                  f"recall@{args.top_k} {np.mean(recalls):.3f}   MRR {np.mean(reciprocal_ranks):.3f}   "
+                  f"topics {np.mean(topics):.2f}   redundancy {np.mean(overlaps):.3f}   "
+                  f"~{np.mean(tokens):.0f} tokens ({tokens_per_topic:.0f}/topic, "
+                  f"{1 - tokens_per_topic / max(baseline_tokens, 1):.0%} saved vs first)")
+
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Retrieval Evaluation
+Latency and recall of dense, lexical (BM25) and hybrid retrieval on the
+golden query set, using the configured vector store, and what the adaptive
+retrieval policy keeps of each result list
+
+Usage:
+    python -m benchmarks.retrieval_eval [--top-k 5] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import numpy as np
+
+from backend.vector_store import create_vector_store
+from backend.retrieval_policy import AdaptiveRetrievalPolicy, estimate_tokens
+from benchmarks.common import summarize_latencies, time_call, print_row
+from config import Config
+
+GOLDEN_QUERIES_PATH = os.path.join(os.path.dirname(__file__), 'golden_queries.json')
+
+
+def load_golden_queries(path: str = GOLDEN_QUERIES_PATH):
+    """Load the golden query set ({query, relevant titles})"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def score_results(results, relevant):
+    """Recall and reciprocal rank of one result list against relevant titles"""
+    titles = [result['metadata'].get('title') for result in results]
+    found = set(titles) & set(relevant)
+    first = next((rank for rank, title in enumerate(titles, 1) if title in relevant), None)
+    return len(found) / len(relevant), (1.0 / first) if first else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval modes on the golden query set")
+    parser.add_argument('--top-k', type=int, default=Config.TOP_K_RESULTS)
+    parser.add_argument('--repeat', type=int, default=20, help="Timed searches per query")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("JUNIPER - Retrieval Evaluation")
+    print("=" * 60)
+
+    policy = AdaptiveRetrievalPolicy(
+        min_similarity=Config.RETRIEVAL_MIN_SIMILARITY,
+        score_gap=Config.RETRIEVAL_SCORE_GAP,
+        max_context_tokens=Config.CONTEXT_MAX_TOKENS
+    )
+
+    golden = load_golden_queries()
+    vector_store = create_vector_store(Config)
+    if vector_store.count() == 0:
+        print("Vector store is empty. Please run 'python initialize_kb.py' first")
+        return
+
+    # Warm the query embedding cache so dense timings measure retrieval, not first encode
+    vector_store.embed_queries([item['query'] for item in golden])
+
+    print(f"\n{len(golden)} golden queries, top_k={args.top_k}, backend={vector_store.backend}\n")
+
+    for mode in vector_store.RETRIEVAL_MODES:
+        samples, recalls, reciprocal_ranks, context_chars, context_tokens = [], [], [], [], []
+        adaptive_recalls, adaptive_tokens, adaptive_k = [], [], []
+        for item in golden:
+            samples.extend(time_call(lambda: vector_store.search(item['query'], args.top_k, mode=mode), args.repeat))
+            results = vector_store.search(item['query'], args.top_k, mode=mode)
+            recall, rr = score_results(results, item['relevant'])
+            context_chars.append(sum(len(result['document']) for result in results))
+            context_tokens.append(sum(estimate_tokens(result['document'].strip()) for result in results))
+            recalls.append(recall)
+            reciprocal_ranks.append(rr)
+
+            selected, report = policy.select(results)
+            adaptive_recalls.append(score_results(selected, item['relevant'])[0])
+            adaptive_tokens.append(report['context_tokens'])
+            adaptive_k.append(report['selected'])
+
+        print_row(mode, summarize_latencies(samples),
+                  f"recall@{args.top_k} {np.mean(recalls):.3f}   MRR {np.mean(reciprocal_ranks):.3f}   "
+                  f"context {np.mean(context_chars):.0f} chars / ~{np.mean(context_tokens):.0f} tokens")
+        print(f"  {'':<28} adaptive: k {np.mean(adaptive_k):.2f}   recall {np.mean(adaptive_recalls):.3f}   "
+              f"context ~{np.mean(adaptive_tokens):.0f} tokens "
+              f"({1 - np.mean(adaptive_tokens) / max(np.mean(context_tokens), 1):.0%} saved)")
+
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Vector Backend Benchmark
+Compares ChromaDB HNSW search against the in-process NumPy exact index
+
+Usage:
+    python -m benchmarks.vector_backends [--repeat 200] [--top-k 5] [--synthetic 0]
+"""
+
+import argparse
+import tempfile
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from backend.chroma_index import ChromaIndex
+from backend.numpy_index import NumpyIndex
+from benchmarks.common import SAMPLE_QUERIES, summarize_latencies, time_call, print_row
+from config import Config
+from initialize_kb import prepare_documents
+
+
+def build_index(index, ids, embeddings, texts, metadatas, batch_size=1000):
+    """Load the same corpus into an index backend"""
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        index.add(ids[start:end], embeddings[start:end], texts[start:end], metadatas[start:end])
+    index.flush()
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector index backends")
+    parser.add_argument('--repeat', type=int, default=200, help="Timed searches per query")
+    parser.add_argument('--top-k', type=int, default=Config.TOP_K_RESULTS)
+    parser.add_argument('--synthetic', type=int, default=0,
+                        help="Extra random unit vectors appended to the real corpus")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("JUNIPER - Vector Backend Benchmark")
+    print("=" * 60)
+
+    documents = prepare_documents()
+    ids = [doc['id'] for doc in documents]
+    texts = [doc['text'] for doc in documents]
+    metadatas = [doc['metadata'] for doc in documents]
+
+    model = SentenceTransformer(Config.EMBEDDING_MODEL)
+    embeddings = model.encode(texts, convert_to_numpy=True).astype(np.float32)
+    query_embeddings = model.encode(SAMPLE_QUERIES, convert_to_numpy=True).astype(np.float32)
+
+    if args.synthetic:
+        rng = np.random.default_rng(0)
+        extra = rng.standard_normal((args.synthetic, embeddings.shape[1])).astype(np.float32)
+        embeddings = np.concatenate([embeddings, extra])
+        ids += [f"synthetic_{i:07d}" for i in range(args.synthetic)]
+        texts += [""] * args.synthetic
+        metadatas += [{'title': 'synthetic', 'category': 'synthetic'}] * args.synthetic
+
+    print(f"\nCorpus: {len(ids)} vectors x {embeddings.shape[1]} dims, "
+          f"{len(SAMPLE_QUERIES)} queries, top_k={args.top_k}, repeat={args.repeat}\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            'chroma (hnsw)': build_index(ChromaIndex(f"{tmp}/chroma", 'bench'), ids, embeddings, texts, metadatas),
+            'numpy float32': build_index(NumpyIndex(f"{tmp}/np32", 'bench'), ids, embeddings, texts, metadatas),
+            'numpy float16': build_index(NumpyIndex(f"{tmp}/np16", 'bench', dtype='float16'),
+                                         ids, embeddings, texts, metadatas),
+        }
+
+        exact = backends['numpy float32']
+        reference = [[r['id'] for r in rows] for rows in exact.query(query_embeddings, args.top_k)]
+
+        for label, index in backends.items():
+            samples = []
+            overlap = []
+            for row, query_embedding in enumerate(query_embeddings):
+                single = query_embedding.reshape(1, -1)
+                samples.extend(time_call(lambda: index.query(single, args.top_k), args.repeat))
+                found = [r['id'] for r in index.query(single, args.top_k)[0]]
+                overlap.append(len(set(found) & set(reference[row])) / max(len(reference[row]), 1))
+
+            print_row(label, summarize_latencies(samples), f"recall@{args.top_k} vs exact {np.mean(overlap):.3f}")
+
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -25,17 +25,103 @@ class Config:
     EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
     CHUNK_SIZE = 500
     CHUNK_OVERLAP = 50
+    CHUNK_NEIGHBORS = int(os.getenv('CHUNK_NEIGHBORS', '0'))  # Adjacent chunks merged into each hit at retrieval
     TOP_K_RESULTS = 5
 
+    # Adaptive Retrieval (trims the top_k candidates before they reach the LLM)
+    ADAPTIVE_RETRIEVAL = os.getenv('ADAPTIVE_RETRIEVAL', 'true').lower() == 'true'
+    RETRIEVAL_MIN_SIMILARITY = float(os.getenv('RETRIEVAL_MIN_SIMILARITY', '0.25'))  # 0 disables
+    RETRIEVAL_SCORE_GAP = float(os.getenv('RETRIEVAL_SCORE_GAP', '0.15'))  # Cut at a larger similarity drop; 0 disables
+    CONTEXT_MAX_TOKENS = int(os.getenv('CONTEXT_MAX_TOKENS', '1500'))  # Context token budget; 0 disables
+
+    # Prompt Budget (whole prompt per request; trims oldest history, then weakest passages, then passage tails)
+    PROMPT_MAX_TOKENS = int(os.getenv('PROMPT_MAX_TOKENS', '3072'))  # 0 disables trimming
+    PROMPT_MIN_PASSAGE_TOKENS = 64  # Passage tails are never cut shorter than this
+    # Tokens are only counted with a local tokenizer once this is set: the LLM's (Llama 3) tokenizer.json
+    # path/dir or HF id. '' (default) estimates ~4 characters per token and trims with a 20% margin
+    PROMPT_TOKENIZER = os.getenv('PROMPT_TOKENIZER', '')
+
+    # Semantic Response Cache (answers to first turns, reused for same-context, near-identical questions)
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '512'))  # 0 disables
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '3600'))  # Seconds
+    RESPONSE_CACHE_SIMILARITY = float(os.getenv('RESPONSE_CACHE_SIMILARITY', '0.92'))  # Query cosine similarity for a hit
+
+    # Request Coalescing (identical concurrent requests share one search and, for first turns, one LLM call)
+    COALESCE_REQUESTS = os.getenv('COALESCE_REQUESTS', 'true').lower() == 'true'
+
+    # Embedding Backend ('sentence-transformers' = PyTorch, 'onnx' = exported ONNX via onnxruntime)
+    EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'sentence-transformers')
+    ONNX_MODEL_DIR = os.getenv('ONNX_MODEL_DIR', './data/onnx/all-MiniLM-L6-v2')
+    ONNX_QUANTIZED = os.getenv('ONNX_QUANTIZED', 'true').lower() == 'true'  # int8 dynamic quantization
+    ONNX_NUM_THREADS = int(os.getenv('ONNX_NUM_THREADS', '0'))  # 0 = onnxruntime default
+
+    # Persistent Embedding Cache (content-addressed by model, revision and text hash; empty path disables)
+    EMBEDDING_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', './data/embedding_cache')
+    EMBEDDING_CACHE_QUERIES = os.getenv('EMBEDDING_CACHE_QUERIES', 'false').lower() == 'true'  # Also persist query embeddings (unbounded, written on the request path)
+    EMBEDDING_MODEL_REVISION = os.getenv('EMBEDDING_MODEL_REVISION', 'main')  # Bump when the model weights change
+
+    # Ingestion Pipeline (encoding overlaps index writes; a process pool encodes large corpora)
+    INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', '0'))  # 0 = encode in-process
+    INGEST_QUEUE_DEPTH = 4  # Encoded batches waiting for the writer
+    INGEST_POOL_MIN_DOCS = 2000  # Smaller runs never start the pool
+    INGEST_FLUSH_EVERY = 10  # Batches between index flushes (publishes staged NumPy rows)
+
+    # Shared Embedding Server (optional sidecar; empty socket path = encode in-process)
+    EMBEDDING_SERVER_SOCKET = os.getenv('EMBEDDING_SERVER_SOCKET', '')
+    EMBEDDING_SERVER_MAX_BATCH = int(os.getenv('EMBEDDING_SERVER_MAX_BATCH', '64'))
+    EMBEDDING_SERVER_MAX_WAIT_MS = float(os.getenv('EMBEDDING_SERVER_MAX_WAIT_MS', '5'))
+
+    # Retrieval Mode ('dense', 'lexical' BM25, or 'hybrid' reciprocal rank fusion of both)
+    RETRIEVAL_MODE = os.getenv('RETRIEVAL_MODE', 'dense')
+    HYBRID_CANDIDATES = 4  # Candidates per retriever, as a multiple of top_k
+    RRF_K = 60
+
+    # Maximal Marginal Relevance (re-selects hits to skip near-duplicate passages; 1.0 disables)
+    MMR_LAMBDA = float(os.getenv('MMR_LAMBDA', '1.0'))
+    MMR_CANDIDATES = 3  # Candidates MMR chooses from, as a multiple of top_k
+
+    # Query Embedding Cache
+    QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', '1024'))
+    QUERY_CACHE_TTL = int(os.getenv('QUERY_CACHE_TTL', '86400'))  # 24 hours in seconds
+    QUERY_CACHE_PATH = os.getenv('QUERY_CACHE_PATH', '')  # Optional spill file, e.g. ./data/query_cache.npz
+
     # LLM Configuration
     LLM_MODEL = "llama-3.3-70b-versatile"  # Groq's Llama 3.3 70B model (latest)
     LLM_TEMPERATURE = 0.3
     LLM_MAX_TOKENS = 1024
 
+    # Model Routing (short, confidently-retrieved turns go to a fast model; the rest to LLM_MODEL)
+    ROUTER_FAST_MODEL = os.getenv('ROUTER_FAST_MODEL', '')  # e.g. llama-3.1-8b-instant; '' disables routing
+    ROUTER_MAX_QUERY_CHARS = int(os.getenv('ROUTER_MAX_QUERY_CHARS', '200'))  # Longest first-turn question
+    ROUTER_MAX_FOLLOWUP_CHARS = int(os.getenv('ROUTER_MAX_FOLLOWUP_CHARS', '100'))  # Longest follow-up; 0 = never
+    ROUTER_MIN_SIMILARITY = float(os.getenv('ROUTER_MIN_SIMILARITY', '0.55'))  # Best passage similarity needed
+    ROUTER_FAST_LANGUAGES = os.getenv('ROUTER_FAST_LANGUAGES', 'en').split(',')
+
+    # Prompt Templates (prompts/<version>/<language>.system.txt and .user.txt, loaded once at startup)
+    PROMPT_TEMPLATES_DIR = os.getenv('PROMPT_TEMPLATES_DIR', './prompts')
+    PROMPT_TEMPLATE_VERSION = os.getenv('PROMPT_TEMPLATE_VERSION', 'v1')
+
+    # ASGI Server (asgi.py): threads running query encoding and index search per worker
+    ASYNC_SEARCH_WORKERS = int(os.getenv('ASYNC_SEARCH_WORKERS', '4'))
+
     # ChromaDB Configuration
     CHROMA_DB_PATH = './data/chroma_db'
     COLLECTION_NAME = 'medical_knowledge'
 
+    # HNSW Index Parameters (fixed when a collection is created; `python -m benchmarks.ann_tuning` to tune)
+    HNSW_M = int(os.getenv('HNSW_M', '16'))  # Graph links per node
+    HNSW_EF_CONSTRUCTION = int(os.getenv('HNSW_EF_CONSTRUCTION', '100'))  # Build-time candidate list
+    HNSW_EF_SEARCH = int(os.getenv('HNSW_EF_SEARCH', '10'))  # Query-time candidate list (>= top_k)
+
+    # Vector Index Backend ('chroma' for ChromaDB HNSW, 'numpy' for in-process exact search)
+    VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'chroma')
+    NUMPY_INDEX_PATH = os.getenv('NUMPY_INDEX_PATH', './data/numpy_index')
+    NUMPY_INDEX_DTYPE = os.getenv('NUMPY_INDEX_DTYPE', 'float32')  # or 'float16' to halve memory
+
+    # Prebuilt Index Snapshot (single file written by `python snapshot_index.py export`; empty = none)
+    INDEX_SNAPSHOT_PATH = os.getenv('INDEX_SNAPSHOT_PATH', '')
+    INDEX_SNAPSHOT_VERIFY = os.getenv('INDEX_SNAPSHOT_VERIFY', 'true').lower() == 'true'  # Checksum before loading
+
     # Application Settings
     MAX_MESSAGE_LENGTH = 2000
     CONVERSATION_TIMEOUT = 3600  # 1 hour in seconds
@@ -74,10 +74,13 @@ else
     echo ".env file already exists"
 fi
 
-# Initialize knowledge base
+# Initialize knowledge base (in ChromaDB, the export's source, whatever VECTOR_BACKEND .env sets)
 echo ""
 echo "[7/8] Initializing knowledge base..."
-python3 initialize_kb.py
+VECTOR_BACKEND=chroma python3 initialize_kb.py
+
+# Export the read-only index shared by all workers
+python3 export_index.py --if-stale
 
 # Create log directory
 sudo mkdir -p /var/log/juniper
@@ -89,10 +92,34 @@ echo "[8/8] Configuring Supervisor..."
 APP_DIR=$(pwd)
 VENV_DIR="$APP_DIR/venv"
 
+# Optional shared embedding server (EMBEDDING_SERVER_SOCKET in .env)
+EMBEDDING_SERVER_SOCKET=$(python3 -c "from config import Config; print(Config.EMBEDDING_SERVER_SOCKET)")
+if [ -n "$EMBEDDING_SERVER_SOCKET" ]; then
+    EMBEDDING_AUTOSTART=true
+else
+    EMBEDDING_AUTOSTART=false
+fi
+
 sudo tee /etc/supervisor/conf.d/juniper.conf > /dev/null <<EOF
+[program:juniper-embedding]
+directory=$APP_DIR
+command=$VENV_DIR/bin/python -m backend.embedding_server
+user=$USER
+priority=10
+autostart=$EMBEDDING_AUTOSTART
+autorestart=true
+startsecs=5
+stopasgroup=true
+killasgroup=true
+stderr_logfile=/var/log/juniper/embedding-err.log
+stdout_logfile=/var/log/juniper/embedding-out.log
+environment=PATH="$VENV_DIR/bin"
+
 [program:juniper]
 directory=$APP_DIR
-command=$VENV_DIR/bin/gunicorn wsgi:application --bind 0.0.0.0:8080 --workers 4 --worker-class gevent --timeout 120 --log-level info
+; Waits for the embedding server (returns at once when none is configured) so the preloading master never loads its own model
+command=/bin/bash -c "$VENV_DIR/bin/python -m backend.embedding_server --wait 120; exec $VENV_DIR/bin/gunicorn wsgi:application --config gunicorn.conf.py"
+priority=20
 user=$USER
 autostart=true
 autorestart=true
@@ -100,12 +127,15 @@ stopasgroup=true
 killasgroup=true
 stderr_logfile=/var/log/juniper/err.log
 stdout_logfile=/var/log/juniper/out.log
-environment=PATH="$VENV_DIR/bin"
+environment=PATH="$VENV_DIR/bin",VECTOR_BACKEND="numpy",GUNICORN_PRELOAD="true",PORT="8080"
 EOF
 
 # Update and start supervisor
 sudo supervisorctl reread
 sudo supervisorctl update
+if [ "$EMBEDDING_AUTOSTART" = "true" ]; then
+    sudo supervisorctl start juniper-embedding
+fi
 sudo supervisorctl start juniper
 
 # Wait a moment for app to start
@@ -0,0 +1,76 @@
+"""
+Shared Index Export Script
+Exports the ChromaDB collection to the read-only memory-mapped NumPy index
+that every gunicorn worker maps (VECTOR_BACKEND=numpy)
+Run this after initialize_kb.py and before starting the workers
+"""
+
+import argparse
+import sys
+import time
+from backend.chroma_index import ChromaIndex
+from backend.numpy_index import NumpyIndex
+from backend.filters import PARTITION_FIELD
+from backend.lexical_index import LexicalIndex, lexical_index_path
+from backend.encoders import embedding_revision
+from config import Config
+
+
+def main():
+    """Export the ChromaDB collection to the shared NumPy index"""
+    parser = argparse.ArgumentParser(description="Export ChromaDB to the shared memory-mapped index")
+    parser.add_argument('--if-stale', action='store_true',
+                        help="Skip the export when the index already matches the ChromaDB generation")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("JUNIPER - Shared Index Export")
+    print("=" * 60)
+
+    config = Config()
+
+    print(f"\nConfiguration:")
+    print(f"  Source (ChromaDB): {config.CHROMA_DB_PATH}")
+    print(f"  Target (NumPy index): {config.NUMPY_INDEX_PATH}")
+    print(f"  Storage dtype: {config.NUMPY_INDEX_DTYPE}")
+
+    try:
+        source = ChromaIndex(config.CHROMA_DB_PATH, config.COLLECTION_NAME)
+        target = NumpyIndex(config.NUMPY_INDEX_PATH, config.COLLECTION_NAME, dtype=config.NUMPY_INDEX_DTYPE)
+    except Exception as e:
+        print(f"Error opening indexes: {e}")
+        sys.exit(1)
+
+    source_generation = source.generation.token()
+    if args.if_stale and target.count() and target.manifest.get('source_generation') == source_generation:
+        print(f"\nShared index is up to date ({target.count()} documents). Skipping export.")
+        return
+
+    start = time.perf_counter()
+    ids, embeddings, documents, metadatas = source.export()
+    if not ids:
+        print("\nChromaDB collection is empty. Please run 'python initialize_kb.py' first")
+        sys.exit(1)
+
+    target.publish(embeddings, ids, documents, metadatas, manifest={
+        'source': 'chroma',
+        'source_generation': source_generation,
+        'embedding_model': config.EMBEDDING_MODEL,
+        'embedding_revision': embedding_revision(config)
+    })
+
+    # BM25 index travels with the shared vector index
+    lexical = LexicalIndex(lexical_index_path(config.NUMPY_INDEX_PATH, config.COLLECTION_NAME))
+    lexical.clear()
+    lexical.add(ids, documents, partitions=[str((metadata or {}).get(PARTITION_FIELD) or '') for metadata in metadatas])
+    lexical.save()
+    elapsed = time.perf_counter() - start
+
+    print(f"\nExported {len(ids)} documents in {elapsed:.2f}s")
+    print(f"  Version: {target.get_stats()['version']}")
+    print("\nStart the workers with VECTOR_BACKEND=numpy to share this index")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+ONNX Export Script
+Exports the configured sentence-transformer to ONNX, writes a dynamically
+quantized int8 copy, and verifies both against the PyTorch reference model
+Run this once (it needs torch); serving with EMBEDDING_BACKEND=onnx does not
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from backend.encoders import SentenceTransformerEncoder
+from backend.onnx_encoder import (OnnxEncoder, check_parity, ONNX_FP32_FILE, ONNX_INT8_FILE,
+                                  ENCODER_CONFIG_FILE)
+from benchmarks.common import SAMPLE_QUERIES
+from config import Config
+from initialize_kb import prepare_documents
+
+
+def export_model(reference: SentenceTransformerEncoder, output_dir: str, opset: int = 14):
+    """Export the transformer body to ONNX and save the tokenizer and pooling config"""
+    import torch
+
+    transformer = reference.model[0]
+    auto_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+
+    class TokenEmbeddings(torch.nn.Module):
+        """Returns per-token embeddings; pooling happens in OnnxEncoder"""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids
+            ).last_hidden_state
+
+    sample = tokenizer(["Juniper medical assistant"], return_tensors='pt')
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in ('input_ids', 'attention_mask', 'token_type_ids')}
+    dynamic_axes['token_embeddings'] = {0: 'batch', 1: 'sequence'}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(auto_model),
+            (sample['input_ids'], sample['attention_mask'], sample['token_type_ids']),
+            os.path.join(output_dir, ONNX_FP32_FILE),
+            input_names=['input_ids', 'attention_mask', 'token_type_ids'],
+            output_names=['token_embeddings'],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+
+    # tokenizer.json is all the tokenizers library needs at serve time
+    tokenizer.save_pretrained(output_dir)
+
+    with open(os.path.join(output_dir, ENCODER_CONFIG_FILE), 'w', encoding='utf-8') as f:
+        json.dump({
+            'model_name': reference.model_name,
+            'dimension': reference.dimension,
+            'max_seq_length': reference.model.max_seq_length,
+            'normalize': any(type(module).__name__ == 'Normalize' for module in reference.model),
+            'pad_token': tokenizer.pad_token,
+            'pad_id': tokenizer.pad_token_id
+        }, f, indent=2)
+
+
+def quantize_model(output_dir: str):
+    """Write a dynamically quantized (int8 weights) copy of the ONNX model"""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantize_dynamic(
+        os.path.join(output_dir, ONNX_FP32_FILE),
+        os.path.join(output_dir, ONNX_INT8_FILE),
+        weight_type=QuantType.QInt8
+    )
+
+
+def main():
+    """Export, quantize and verify the ONNX embedding model"""
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX / int8")
+    parser.add_argument('--output-dir', default=Config.ONNX_MODEL_DIR)
+    parser.add_argument('--min-cosine', type=float, default=0.99,
+                        help="Fail if any text's cosine agreement with the reference is lower")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("JUNIPER - ONNX Embedding Export")
+    print("=" * 60)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    reference = SentenceTransformerEncoder(Config.EMBEDDING_MODEL)
+
+    print(f"\n[1/3] Exporting {Config.EMBEDDING_MODEL} to {args.output_dir}...")
+    export_model(reference, args.output_dir)
+
+    print("\n[2/3] Quantizing to int8...")
+    quantize_model(args.output_dir)
+
+    print("\n[3/3] Checking parity against the reference model...")
+    texts = [doc['text'] for doc in prepare_documents()] + SAMPLE_QUERIES
+    failed = False
+
+    for quantized in (False, True):
+        candidate = OnnxEncoder(args.output_dir, quantized=quantized)
+        report = check_parity(reference, candidate, texts, top_k=Config.TOP_K_RESULTS)
+        label = 'int8' if quantized else 'fp32'
+        print(f"  {label}: cosine mean {report['cosine_mean']:.5f}  min {report['cosine_min']:.5f}  "
+              f"top-{Config.TOP_K_RESULTS} overlap {report['topk_overlap']:.3f}")
+        failed = failed or report['cosine_min'] < args.min_cosine
+
+    if failed:
+        print(f"\nERROR: cosine agreement below {args.min_cosine}; do not serve this export")
+        sys.exit(1)
+
+    print("\nExport verified. Serve it with EMBEDDING_BACKEND=onnx")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Gunicorn Configuration
+Used by start.sh and the droplet supervisor config:
+    gunicorn wsgi:application --config gunicorn.conf.py
+
+With GUNICORN_PRELOAD=true the master imports wsgi.py (and so runs startup())
+once before forking: model weights, the memory-mapped index and the knowledge
+base are built once and shared copy-on-write by every worker. Per-worker
+handles (ChromaDB/SQLite, Groq HTTP clients) are re-created in post_fork.
+"""
+
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = 1000
+timeout = 120
+keepalive = 5
+loglevel = 'info'
+accesslog = '-'
+errorlog = '-'
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false').lower() == 'true'
+
+if preload_app and worker_class == 'gevent':
+    # The app is imported in the master, so patch before ssl/threading/socket are imported
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def when_ready(server):
+    """Master finished loading the app; keep its objects out of the workers' GC passes"""
+    if preload_app:
+        # A GC pass in a worker would touch (and so copy) every preloaded object's page
+        gc.collect()
+        gc.freeze()
+        server.log.info("Preloaded application state frozen for copy-on-write sharing")
+
+
+def post_fork(server, worker):
+    """Re-create per-worker handles that must not be shared across fork()"""
+    if not preload_app:
+        return
+
+    from app import reinitialize_after_fork
+    reinitialize_after_fork()
+    server.log.info(f"Worker {worker.pid} re-initialized per-worker handles")
@@ -1,17 +1,66 @@
 """
 Knowledge Base Initialization Script
-Loads medical knowledge into ChromaDB vector store
-Run this once to initialize the knowledge base
+Loads medical knowledge into the vector store (ChromaDB or NumPy index)
+Safe to run on every deploy: only new or changed chunks are re-embedded
 """
 
+import argparse
 import sys
-import os
+from backend.chunking import chunk_documents
 from backend.knowledge_base import MEDICAL_KNOWLEDGE
-from backend.vector_store import VectorStore
+from backend.vector_store import create_vector_store
 from config import Config
 
+
+def prepare_documents(chunk_size: int = Config.CHUNK_SIZE, chunk_overlap: int = Config.CHUNK_OVERLAP):
+    """
+    Build indexable chunks from the embedded medical knowledge
+
+    Args:
+        chunk_size: Target maximum chunk length in characters
+        chunk_overlap: Characters shared by consecutive chunks of a topic
+
+    Returns:
+        List of chunks with 'id', 'text', and 'metadata'
+    """
+    documents = []
+
+    for idx, knowledge_item in enumerate(MEDICAL_KNOWLEDGE):
+        # Create document ID
+        doc_id = f"doc_{idx:04d}"
+
+        # Chunks are prefixed with the title for better embedding
+        text = knowledge_item['content']
+
+        # Create metadata
+        metadata = {
+            'title': knowledge_item['title'],
+            'category': knowledge_item['category'],
+            'doc_index': idx
+        }
+
+        documents.append({
+            'id': doc_id,
+            'text': text,
+            'metadata': metadata
+        })
+
+    return chunk_documents(documents, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
 def main():
-    """Initialize the knowledge base"""
+    """Initialize or incrementally update the knowledge base"""
+    parser = argparse.ArgumentParser(description="Load the medical knowledge base into the vector store")
+    parser.add_argument('--reset', action='store_true',
+                        help="Delete the collection and re-embed everything")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Only report what would be added, updated and deleted")
+    parser.add_argument('--batch-size', type=int, default=50,
+                        help="Documents embedded per batch")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Encoder processes for large corpora (default: INGEST_WORKERS)")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("JUNIPER - Medical Knowledge Base Initialization")
     print("=" * 60)
@@ -20,73 +69,58 @@ def main():
     config = Config()
 
     print(f"\nConfiguration:")
-    print(f"  Database Path: {config.CHROMA_DB_PATH}")
+    print(f"  Vector Backend: {config.VECTOR_BACKEND}")
+    print(f"  Database Path: {config.CHROMA_DB_PATH if config.VECTOR_BACKEND == 'chroma' else config.NUMPY_INDEX_PATH}")
     print(f"  Collection Name: {config.COLLECTION_NAME}")
     print(f"  Embedding Model: {config.EMBEDDING_MODEL}")
     print(f"  Total Medical Topics: {len(MEDICAL_KNOWLEDGE)}")
+    print(f"  Chunk Size / Overlap: {config.CHUNK_SIZE} / {config.CHUNK_OVERLAP}")
 
     # Initialize vector store
     print("\n[1/3] Initializing vector store...")
     try:
-        vector_store = VectorStore(
-            db_path=config.CHROMA_DB_PATH,
-            collection_name=config.COLLECTION_NAME,
-            embedding_model_name=config.EMBEDDING_MODEL
-        )
+        vector_store = create_vector_store(config)
         print("Vector store initialized")
     except Exception as e:
         print(f"Error initializing vector store: {e}")
         sys.exit(1)
 
-    # Check if collection already has documents
-    current_count = vector_store.collection.count()
-    if current_count > 0:
-        print(f"\nCollection already contains {current_count} documents")
-        response = input("Do you want to reset and reinitialize? (yes/no): ")
-        if response.lower() in ['yes', 'y']:
-            print("Resetting collection...")
-            vector_store.reset_collection()
-        else:
-            print("Skipping initialization.")
-            return
+    # Full rebuild only on request; otherwise only new or changed chunks are embedded
+    current_count = vector_store.count()
+    if args.reset and current_count > 0 and not args.dry_run:
+        print(f"\nResetting collection ({current_count} documents)...")
+        vector_store.reset_collection()
 
     # Prepare documents for indexing
     print("\n[2/3] Preparing documents...")
-    documents = []
-
-    for idx, knowledge_item in enumerate(MEDICAL_KNOWLEDGE):
-        # Create document ID
-        doc_id = f"doc_{idx:04d}"
-
-        # Combine title and content for better embedding
-        text = f"Title: {knowledge_item['title']}\n\n{knowledge_item['content']}"
-
-        # Create metadata
-        metadata = {
-            'title': knowledge_item['title'],
-            'category': knowledge_item['category'],
-            'doc_index': idx
-        }
-
-        documents.append({
-            'id': doc_id,
-            'text': text,
-            'metadata': metadata
-        })
+    documents = prepare_documents(config.CHUNK_SIZE, config.CHUNK_OVERLAP)
 
-    print(f"Prepared {len(documents)} documents")
+    print(f"Prepared {len(documents)} chunks from {len(MEDICAL_KNOWLEDGE)} topics")
 
-    # Add documents to vector store
-    print("\n[3/3] Adding documents to vector store...")
-    print("This may take a few minutes depending on your hardware...\n")
+    # Sync documents with the vector store
+    print("\n[3/3] Syncing documents with vector store...")
 
     try:
-        vector_store.add_documents(documents, batch_size=50)
-        print("Documents added successfully")
+        report = vector_store.sync_documents(documents, batch_size=args.batch_size, dry_run=args.dry_run,
+                                             workers=args.workers)
     except Exception as e:
-        print(f"Error adding documents: {e}")
+        print(f"Error syncing documents: {e}")
         sys.exit(1)
 
+    print(f"  Added: {report['added']}")
+    print(f"  Updated: {report['updated']}")
+    print(f"  Deleted: {report['deleted']}")
+    print(f"  Unchanged: {report['unchanged']}")
+
+    if args.dry_run:
+        print("\nDry run - no changes written.")
+        return
+
+    print(f"  Time: {report['seconds']:.2f}s ({report['docs_per_sec']:.1f} docs/sec, "
+          f"{report['embedding_cache_hits']} embeddings from cache)")
+    for stage, seconds in report['stage_seconds'].items():
+        print(f"    {stage}: {seconds:.2f}s")
+
     # Display statistics
     print("\n" + "=" * 60)
     print("INITIALIZATION COMPLETE")
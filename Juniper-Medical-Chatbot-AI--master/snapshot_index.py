@@ -0,0 +1,89 @@
+"""
+Index Snapshot Script
+Exports the configured index to a single versioned, checksummed snapshot
+file, or loads one, so a fresh worker or droplet starts from a prebuilt
+index artifact instead of re-embedding the knowledge base
+"""
+
+import argparse
+import json
+import sys
+import time
+from backend.snapshot import IndexSnapshot, SnapshotError
+from backend.vector_store import create_vector_store
+from config import Config
+
+
+def export_snapshot(args):
+    """Write the configured index to a snapshot file"""
+    vector_store = create_vector_store(Config)
+    if vector_store.count() == 0:
+        print("Vector store is empty. Please run 'python initialize_kb.py' first")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    header = vector_store.export_snapshot(args.path, dtype='float16' if args.float16 else 'float32')
+    print(f"\nExported {header['count']} documents to {args.path} in {time.perf_counter() - start:.2f}s")
+    print(f"  Embeddings: {header['dtype']}")
+    print(f"  Checksum: {header['checksum']['payload']}")
+
+
+def import_snapshot(args):
+    """Replace the configured index with a snapshot"""
+    vector_store = create_vector_store(Config)
+    report = vector_store.load_snapshot(args.path, verify=not args.no_verify, if_stale=args.if_stale)
+
+    if report['loaded']:
+        print(f"\nLoaded {report['documents']} documents from {args.path} in {report['seconds']:.3f}s")
+    else:
+        print(f"\nIndex already holds {args.path} ({report['documents']} documents). Skipping import.")
+
+
+def inspect_snapshot(args):
+    """Verify a snapshot and print its header"""
+    start = time.perf_counter()
+    snapshot = IndexSnapshot(args.path, verify=True)
+    header = {key: value for key, value in snapshot.header.items() if key not in ('sections', 'partitions')}
+
+    print(f"\nChecksum OK ({time.perf_counter() - start:.3f}s)")
+    print(json.dumps(header, indent=2))
+
+
+def main():
+    """Export, import or inspect an index snapshot"""
+    parser = argparse.ArgumentParser(description="Single-file index snapshots")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', help="Write the index to a snapshot file")
+    export_parser.add_argument('path')
+    export_parser.add_argument('--float16', action='store_true', help="Store embeddings as float16 (half the size)")
+    export_parser.set_defaults(run=export_snapshot)
+
+    import_parser = commands.add_parser('import', help="Replace the index with a snapshot file")
+    import_parser.add_argument('path')
+    import_parser.add_argument('--no-verify', action='store_true', help="Skip the checksum check")
+    import_parser.add_argument('--if-stale', action='store_true',
+                               help="Skip the import when the index already holds this snapshot")
+    import_parser.set_defaults(run=import_snapshot)
+
+    inspect_parser = commands.add_parser('inspect', help="Verify a snapshot and print its header")
+    inspect_parser.add_argument('path')
+    inspect_parser.set_defaults(run=inspect_snapshot)
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("JUNIPER - Index Snapshot")
+    print("=" * 60)
+
+    try:
+        args.run(args)
+    except SnapshotError as e:
+        print(f"\nError: {e}")
+        sys.exit(1)
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,29 +13,58 @@ if [ ! -f .env ]; then
     exit 1
 fi
 
-# Initialize knowledge base if needed
-if [ ! -d "data/chroma_db" ] || [ -z "$(ls -A data/chroma_db 2>/dev/null)" ]; then
+if [ -n "$INDEX_SNAPSHOT_PATH" ] && [ -f "$INDEX_SNAPSHOT_PATH" ]; then
+    # Prebuilt index artifact: map it instead of re-embedding the knowledge base
+    export VECTOR_BACKEND=${VECTOR_BACKEND:-numpy}
     echo ""
-    echo "Initializing knowledge base..."
-    python3 initialize_kb.py
+    echo "Loading index snapshot $INDEX_SNAPSHOT_PATH..."
+    python3 snapshot_index.py import "$INDEX_SNAPSHOT_PATH" --if-stale
+    if [ $? -ne 0 ]; then
+        echo "ERROR: Failed to load index snapshot"
+        exit 1
+    fi
+else
+    # Initialize / incrementally update the knowledge base (only changed chunks are re-embedded).
+    # The sync always targets ChromaDB, the export's source, whatever VECTOR_BACKEND .env sets
+    echo ""
+    echo "Syncing knowledge base..."
+    VECTOR_BACKEND=chroma python3 initialize_kb.py
     if [ $? -ne 0 ]; then
         echo "ERROR: Failed to initialize knowledge base"
         exit 1
     fi
+
+    # Export the read-only index that every worker memory-maps (shared page cache)
+    echo ""
+    echo "Exporting shared index..."
+    python3 export_index.py --if-stale
+    if [ $? -ne 0 ]; then
+        echo "ERROR: Failed to export shared index"
+        exit 1
+    fi
+    export VECTOR_BACKEND=${VECTOR_BACKEND:-numpy}
+fi
+
+# Optional shared embedding server (one model copy for all workers). The socket
+# setting is read through config.py so a value set only in .env is honoured.
+EMBEDDING_SERVER_SOCKET=$(python3 -c "from config import Config; print(Config.EMBEDDING_SERVER_SOCKET)")
+if [ -n "$EMBEDDING_SERVER_SOCKET" ]; then
+    echo ""
+    echo "Starting embedding server on $EMBEDDING_SERVER_SOCKET..."
+    python3 -m backend.embedding_server &
+
+    # Gunicorn's preloading master needs the server up, or it loads its own model copy
+    python3 -m backend.embedding_server --wait 120
+    if [ $? -ne 0 ]; then
+        echo "WARNING: Embedding server not ready; workers will encode in-process until it is"
+    fi
 fi
 
 echo ""
 echo "Starting Gunicorn server..."
 echo "========================================"
 
-# Start Gunicorn with optimal settings for DigitalOcean
-exec gunicorn wsgi:application \
-    --bind 0.0.0.0:${PORT:-8080} \
-    --workers 4 \
-    --worker-class gevent \
-    --worker-connections 1000 \
-    --timeout 120 \
-    --keep-alive 5 \
-    --log-level info \
-    --access-logfile - \
-    --error-logfile -
+# Start Gunicorn (settings in gunicorn.conf.py). Preload builds the model and
+# index once in the master and shares them copy-on-write with the workers.
+export GUNICORN_PRELOAD=${GUNICORN_PRELOAD:-true}
+exec gunicorn wsgi:application --config gunicorn.conf.py
@@ -15,6 +15,7 @@ class JuniperChat {
         this.sidebar = document.getElementById('sidebar');
         this.menuBtn = document.getElementById('menuBtn');
         this.sidebarClose = document.getElementById('sidebarClose');
+        this.categorySelect = document.getElementById('categorySelect');
 
         // State
         this.conversationId = this.generateId();
@@ -23,6 +24,7 @@ class JuniperChat {
         this.conversations = this.loadConversations();
         this.currentMessages = [];
         this.historyList = document.getElementById('historyList');
+        this.selectedCategory = ''; // Empty = whole knowledge base
 
         // Voice recognition state
         this.isRecording = false;
@@ -38,6 +40,26 @@ class JuniperChat {
         this.applyTheme();
         this.setupAutoResize();
         this.renderHistory();
+        this.loadCategories();
+    }
+
+    async loadCategories() {
+        if (!this.categorySelect) return;
+
+        try {
+            const response = await fetch('/api/categories');
+            if (!response.ok) return;
+            const data = await response.json();
+
+            data.categories.forEach(category => {
+                const option = document.createElement('option');
+                option.value = category.name;
+                option.textContent = `${category.name} (${category.topics})`;
+                this.categorySelect.appendChild(option);
+            });
+        } catch (error) {
+            console.error('Failed to load categories:', error);
+        }
     }
 
     setupEventListeners() {
@@ -93,6 +115,13 @@ class JuniperChat {
             this.voiceBtn.addEventListener('click', () => this.toggleVoiceRecording());
         }
 
+        // Category scope
+        if (this.categorySelect) {
+            this.categorySelect.addEventListener('change', () => {
+                this.selectedCategory = this.categorySelect.value;
+            });
+        }
+
         // Language selector buttons
         document.querySelectorAll('.lang-btn').forEach(btn => {
             btn.addEventListener('click', (e) => {
@@ -158,6 +187,28 @@ class JuniperChat {
         contentDiv.appendChild(textDiv);
 
         // Add sources
+        this.renderSources(contentDiv, sources);
+
+        messageDiv.appendChild(avatarDiv);
+        messageDiv.appendChild(contentDiv);
+
+        this.chatArea.appendChild(messageDiv);
+        this.scrollToBottom();
+
+        // Save message to current messages array for chat history
+        const record = {
+            sender: sender,
+            text: text,
+            sources: sources,
+            isError: isError,
+            timestamp: Date.now()
+        };
+        this.currentMessages.push(record);
+
+        return { textDiv, contentDiv, record };
+    }
+
+    renderSources(contentDiv, sources) {
         if (sources && sources.length > 0) {
             const sourcesDiv = document.createElement('div');
             sourcesDiv.className = 'message-sources';
@@ -177,21 +228,6 @@ class JuniperChat {
 
             contentDiv.appendChild(sourcesDiv);
         }
-
-        messageDiv.appendChild(avatarDiv);
-        messageDiv.appendChild(contentDiv);
-
-        this.chatArea.appendChild(messageDiv);
-        this.scrollToBottom();
-
-        // Save message to current messages array for chat history
-        this.currentMessages.push({
-            sender: sender,
-            text: text,
-            sources: sources,
-            isError: isError,
-            timestamp: Date.now()
-        });
     }
 
     showTyping() {
@@ -237,6 +273,8 @@ class JuniperChat {
 
         this.conversationId = this.generateId();
         this.currentMessages = [];
+        this.selectedCategory = '';
+        if (this.categorySelect) this.categorySelect.value = '';
         this.setStatus('ready', 'Ready');
         this.renderHistory();
 
@@ -621,9 +659,7 @@ class JuniperChat {
         this.sendBtn.disabled = true;
 
         try {
-            const response = await this.sendToAPI(message, this.selectedLanguage);
-            this.removeTyping();
-            this.addMessage('assistant', response.response, response.sources);
+            await this.streamFromAPI(message, this.selectedLanguage);
         } catch (error) {
             console.error('Error:', error);
             this.removeTyping();
@@ -639,6 +675,79 @@ class JuniperChat {
         }
     }
 
+    async streamFromAPI(message, language) {
+        const response = await fetch('/api/chat/stream', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                message: message,
+                conversation_id: this.conversationId,
+                language: language,
+                category: this.selectedCategory
+            })
+        });
+
+        if (!response.ok || !response.body) {
+            const error = await response.json().catch(() => ({}));
+            throw new Error(error.error || 'Failed to get response');
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let sources = [];
+        let answer = null;
+
+        // Answer bubble appears with the first delta, replacing the typing indicator
+        const showDelta = (text) => {
+            if (!answer) {
+                this.removeTyping();
+                answer = this.addMessage('assistant', '', []);
+            }
+            answer.textDiv.textContent += text;
+            answer.record.text += text;
+            this.scrollToBottom();
+        };
+
+        const handleEvent = (event, data) => {
+            if (event === 'sources') {
+                sources = data.sources || [];
+            } else if (event === 'delta') {
+                showDelta(data.text);
+            } else if (event === 'done') {
+                if (!answer) showDelta('');
+                answer.textDiv.textContent = data.response;
+                answer.record.text = data.response;
+                answer.record.sources = sources;
+                this.renderSources(answer.contentDiv, sources);
+            } else if (event === 'error') {
+                throw new Error(data.error || 'Failed to get response');
+            }
+        };
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const raw = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                let data = '';
+                raw.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) event = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                });
+                if (data) handleEvent(event, JSON.parse(data));
+            }
+        }
+
+        this.removeTyping();
+    }
+
     async sendToAPI(message, language) {
         const response = await fetch('/api/chat', {
             method: 'POST',
@@ -646,7 +755,8 @@ class JuniperChat {
             body: JSON.stringify({
                 message: message,
                 conversation_id: this.conversationId,
-                language: language
+                language: language,
+                category: this.selectedCategory
             })
         });
 